@@ -18,6 +18,14 @@ if __name__ == "__main__":
     """
     # main.extract_features_and_generate_arff(n=3, analyzer='char', year='2012')
 
+    """
+    Example code to generate a binary dataset, or to convert an existing arff file to one, and to load it
+    """
+    # dataset_path = main.extract_features_and_generate_binary_dataset(n=3, analyzer='char', year='2012')
+    # dataset_path = main.convert_arff_to_binary_dataset(arff_file_path)
+    # from helpers.BinaryDataset import BinaryDataset
+    # dataset = BinaryDataset.load(dataset_path)
+
     """
     Example code to plot __years' scores
     """
@@ -43,6 +51,26 @@ if __name__ == "__main__":
     """
     # main.plot_years_intersection_scores()
 
+    """
+    Example code to preprocess all tweets in a stream and export them
+    """
+    # main.export_preprocessed_tweets(year='ALL', find_roots=True)
+
+    """
+    Example code to compare cleaning engine with step by step cleaning
+    """
+    # main.benchmark_cleaning_engine(year='ALL', repeat=3)
+
+    """
+    Example code to compare active learning selections ranked by probabilities and by decision function margins
+    """
+    # main.compare_selection_uncertainties(n=1, analyzer='word')
+
+    """
+    Example code to check that linear_svc backend predicts the same with svc backend
+    """
+    # main.compare_classifier_backends(n=1, analyzer='word', name_one='svc', name_two='linear_svc')
+
     """
     Example code to make experiment
     """
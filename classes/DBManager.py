@@ -46,10 +46,12 @@ class DBManager:
 
         return successful_tweet_count, not_imported_tweets
 
-    def get_tweets_for_year(self, year):
+    def get_tweets_for_year(self, year, limit=ALE_EACH_YEAR_TWEET_LIMIT_COUNT, offset=0):
         """
         Returns tweet created at given year
         :param year: string, year
+        :param limit: int, tweets to return at most, not used for ALL
+        :param offset: int, tweets to skip in creation order, e.g. ones retrieved before, not used for ALL
         :return: list, tweets matching criteria
         """
 
@@ -57,13 +59,34 @@ class DBManager:
         if not 'ALL' == year:
             tweets = self.session.query(model).filter(
                 year == extract('year', model.created_at)).order_by(
-                model.created_at).limit(ALE_EACH_YEAR_TWEET_LIMIT_COUNT).all()
+                model.created_at).offset(offset).limit(limit).all()
         else:
             tweets = self.session.query(model).order_by(model.created_at).all()
 
         print("Retrieved " + str(len(tweets)) + " rows from database for year:" + str(year) + ".")
         return tweets
 
+    def iterate_tweet_rows_for_year(self, year, batch_size=DB_STREAM_BATCH_SIZE):
+        """
+        Streams tweets created at given year from a server-side cursor, without loading them all into memory
+        :param year: string, year or ALL
+        :param batch_size: int, rows fetched at once
+        :return: generator, (id, text, class, created_at) tuples
+        """
+        model = self.get_new_model()
+        query = self.session.query(model.id, model.text, model.tweet_class, model.created_at)
+
+        if not 'ALL' == year:
+            query = query.filter(year == extract('year', model.created_at)).order_by(
+                model.created_at).limit(ALE_EACH_YEAR_TWEET_LIMIT_COUNT)
+        else:
+            query = query.order_by(model.created_at)
+
+        query = query.execution_options(stream_results=True).yield_per(batch_size)
+
+        for row in query:
+            yield tuple(row)
+
     def get_new_model_instance(self):
         """
         Returns an instance of selected model in config.py
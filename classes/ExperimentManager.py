@@ -7,21 +7,22 @@ import numpy as np
 from scipy import *
 from scipy import sparse
 
-import xgboost as xgb
-
 from matplotlib import pyplot as plt
 
-from sklearn.svm import SVC
-from sklearn.cluster import KMeans
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.multiclass import OneVsRestClassifier
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 
 from sklearn.metrics import *
 from sklearn.utils import shuffle
 from sklearn import preprocessing
 from sklearn.decomposition import PCA, TruncatedSVD
-from sklearn.feature_extraction.text import CountVectorizer
+
+from helpers.GramMatrix import GramMatrix
+from helpers.ClassifierRegistry import ClassifierRegistry
+from helpers.SharedCSRMatrix import SharedCSRMatrix
+from helpers.ClusteringSelector import ClusteringSelector
+from helpers.UncertaintySampler import UncertaintySampler
+from helpers.DensityWeightedSelector import DensityWeightedSelector
+from helpers.KCenterSelector import KCenterSelector
+from helpers.PrecomputedKernelClassifier import PrecomputedKernelClassifier
 
 
 class ExperimentManager:
@@ -29,18 +30,44 @@ class ExperimentManager:
     This class consists core methods of an active learning experiment.
     """
 
-    def __init__(self, experiment_number, years_tweets_counts, n=1, analyzer='word'):
+    PROBABILITY_UNCERTAINTY = 'probability'
+    MARGIN_UNCERTAINTY = 'margin'
+
+    def __init__(self, experiment_number, years_tweets_counts, n=1, analyzer='word',
+                 classification_backend=CLASSIFICATION_BACKEND, logical_selection_backend=LOGICAL_SELECTION_BACKEND,
+                 selection_uncertainty=SELECTION_UNCERTAINTY, selection_strategy=SELECTION_STRATEGY):
         """
         Constructor method
         :param experiment_number: int
         :param years_tweets_counts: dict
         :param n: int
         :param analyzer: string
+        :param classification_backend: string, name of a ClassifierRegistry backend for final classifications
+        :param logical_selection_backend: string, name of a ClassifierRegistry backend for active learning selections
+        :param selection_uncertainty: string, 'probability' ranks samples by calibrated probabilities, 'margin' by
+        decision_function margins without calibration
+        :param selection_strategy: string, UncertaintySampler strategy which ranks probabilities, decision function
+        values are always ranked by margin
         :return: ExperimentManager
         """
+        if selection_uncertainty not in (self.PROBABILITY_UNCERTAINTY, self.MARGIN_UNCERTAINTY):
+            raise ValueError("Unknown selection uncertainty: " + str(selection_uncertainty))
+
+        # Validating the strategy name early
+        UncertaintySampler(selection_strategy)
+
+        ClassifierRegistry.check_role(classification_backend, ClassifierRegistry.CLASSIFICATION)
+        ClassifierRegistry.check_role(logical_selection_backend, ClassifierRegistry.LOGICAL_SELECTION,
+                                      selection_uncertainty == self.PROBABILITY_UNCERTAINTY)
+
+        self.__classification_backend = classification_backend
+        self.__logical_selection_backend = logical_selection_backend
+        self.__selection_uncertainty = selection_uncertainty
+        self.__selection_strategy = selection_strategy
 
         self.__n = n
         self.__all_scores = {}
+        self.__selected_rows = {}
         self.__feature_count = 0
         self.__analyzer = analyzer
         self.__experiment_number = experiment_number
@@ -49,37 +76,86 @@ class ExperimentManager:
         self.__label_encoder = preprocessing.LabelEncoder()
         self.__label_encoder.fit(SENTIMENT_CLASSES)
 
-    def run_experiment(self, document, classes):
+    @classmethod
+    def check_years_tweets_counts(cls, years_tweets_counts):
+        """
+        Checks if every year has ALE_EACH_YEAR_TWEET_LIMIT_COUNT tweets, test years' 300 and 200 partitions together
+        and other years' 500 partition need that many. Near-duplicate removal may leave a year short when database has
+        no more tweets for it, that's an error. Otherwise a short year is only warned about, its partitions are smaller.
+        :param years_tweets_counts: dict, year to tweet count
+        :return: void
         """
-        Main method for using resources and making method calls in order.
-        :param document: list
+        for year in sorted(years_tweets_counts.keys()):
+            if years_tweets_counts[year] == ALE_EACH_YEAR_TWEET_LIMIT_COUNT:
+                continue
+
+            message = "Year " + year + " has " + str(years_tweets_counts[year]) + " tweets, partitions need " + \
+                      str(ALE_EACH_YEAR_TWEET_LIMIT_COUNT) + "."
+
+            if NEAR_DUPLICATE_MODE is None:
+                print("Warning: " + message + " Its partitions will be smaller.")
+            else:
+                raise ValueError(message + " Near-duplicate removal left too few tweets in database, set "
+                                 "NEAR_DUPLICATE_MODE to None or import more tweets.")
+
+    def run_experiment_on_shared_matrix(self, shared_matrix_name):
+        """
+        Runs the experiment on a matrix shared by the parent process, so only the name is sent to the worker
+        :param shared_matrix_name: string, name of a SharedCSRMatrix
+        :return: dict
+        """
+        shared_matrix = SharedCSRMatrix.attach(shared_matrix_name)
+
+        gram_matrix = None
+        if USE_PRECOMPUTED_KERNEL:
+            gram_matrix = GramMatrix.attach(shared_matrix_name, shared_matrix.X_sparse)
+
+        return self.run_experiment(shared_matrix.X_sparse, shared_matrix.features, shared_matrix.get_labels(),
+                                   gram_matrix)
+
+    def run_experiment(self, X_sparse, features, classes, gram_matrix=None, line_names=None):
+        """
+        Main method for using resources and making method calls in order. Document is vectorized once by the caller
+        and shared by all experiments. Years, partitions and active learning additions are index arrays into X_sparse,
+        train and test matrices are taken from it by row indexing, so nothing is made dense.
+        With USE_PRECOMPUTED_KERNEL, train and test sets are row indexes and SVC fits on submatrices of the gram matrix.
+        :param X_sparse: scipy.sparse.csr_matrix, n-gram counts of document
+        :param features: list, n-grams
         :param classes: list
+        :param gram_matrix: GramMatrix, of X_sparse, created if None and USE_PRECOMPUTED_KERNEL is set
+        :param line_names: list, lines of LINES_SETUPS to run, all lines if None
         :return: dict
         """
         try:
-            # Fitting document
-            X_sparse, features = self._fit_document(document)
-
             self.__feature_count = len(features)
             self.__features = features
 
-            # Getting in ndarray format
-            X = X_sparse.toarray()
+            self.__X_sparse = X_sparse
+            self.__projection = None
+            self.__gram_matrix = None
+            if USE_PRECOMPUTED_KERNEL:
+                self.__gram_matrix = gram_matrix if gram_matrix is not None else GramMatrix(X_sparse)
+
+            self.__y = self.__label_encoder.transform(classes)
+
+            if NEAR_DUPLICATE_MODE is not None:
+                self.check_years_tweets_counts(self.__years_tweets_counts)
 
             # Splitting document for __years
-            years_X, years_X_sparse, years_y = self._split_dataset_to_years(X, X_sparse, classes)
+            years_indexes = self._split_dataset_to_years()
 
             # Shuffling them for the experiment
-            years_X, years_X_sparse, years_y = self._shuffle_years(years_X, years_X_sparse, years_y)
+            years_indexes = self._shuffle_years(years_indexes)
 
             # Creating 500, 300, 200 and 50 chunks of data
-            partitioned_X_sparse, partitioned_y = self._create_years_partitions(years_X_sparse, years_y)
+            partitioned_indexes = self._create_years_partitions(years_indexes)
 
             # Iterating over lines' setups dict
-            self._go_over_lines_setups(partitioned_X_sparse, partitioned_y)
+            self._go_over_lines_setups(partitioned_indexes, line_names)
 
             # Now let's cumulate line2's scores
-            self._cumulate_scores_of_line2()
+            if 'line2' in self.__all_scores:
+                self._cumulate_scores_of_line2()
 
         except Exception:
 
@@ -88,117 +164,134 @@ class ExperimentManager:
 
         return self.__all_scores
 
-    def _fit_document(self, document):
+    def get_selected_rows(self):
+        """
+        Returns rows chosen by line3's active learning methods in the last run
+        :return: dict, score key to row indexes
+        """
+        return self.__selected_rows
+
+    def _get_rows(self, indexes):
+        """
+        Returns rows and labels of given indexes. Rows are the indexes as a column if the kernel is precomputed.
+        :param indexes: np.array, int
+        :return: scipy.sparse or np.array, np.array
+        """
+        if self.__gram_matrix is not None:
+            return np.asarray(indexes)[:, np.newaxis], self.__y[indexes]
+
+        return self.__X_sparse[indexes], self.__y[indexes]
+
+    def _get_features(self, X):
+        """
+        Returns features of rows returned by _get_rows
+        :param X: scipy.sparse or np.array
+        :return: scipy.sparse
+        """
+        if self.__gram_matrix is not None:
+            return self.__X_sparse[X[:, 0]]
+
+        return X
+
+    def _stack_rows(self, X_one, X_two):
         """
-        Fits document and generates n-grams and features
-        :param document: list
-        :return: csr_matrix, list
+        Stacks rows returned by _get_rows
+        :param X_one: scipy.sparse or np.array
+        :param X_two: scipy.sparse or np.array
+        :return: scipy.sparse or np.array
         """
-        vectorizer = CountVectorizer(ngram_range=(self.__n, self.__n), analyzer=self.__analyzer)
-        X = vectorizer.fit_transform(document)
-        features = vectorizer.get_feature_names()
-        return X, features
+        if self.__gram_matrix is not None:
+            return np.vstack((X_one, X_two))
 
-    def _split_dataset_to_years(self, X, X_sparse, y):
+        return sparse.vstack((X_one, X_two), format='csr')
+
+    def _with_precomputed_kernel(self, classifier):
+        """
+        Wraps classifier to use the gram matrix if the kernel is precomputed
+        :param classifier: sklearn classifier
+        :return: sklearn classifier or PrecomputedKernelClassifier
+        """
+        if self.__gram_matrix is not None:
+            return PrecomputedKernelClassifier(classifier, self.__gram_matrix)
+
+        return classifier
+
+    def _split_dataset_to_years(self):
         """
         Splits dataset to each year respectively
-        :param X: dense data
-        :param X_sparse: scipy.sparse
-        :param y: list
-        :return: dense matrice, scipy.sparse, list
+        :return: dict, year to row indexes
         """
 
         start_index = 0
-        years_X = {}
-        years_y = {}
-        years_X_sparse = {}
+        years_indexes = {}
 
         for year, tweet_count in self.__years_tweets_counts.iteritems():
             end_index = start_index + tweet_count
-            years_X[year] = X[start_index:end_index]
-            years_y[year] = y[start_index:end_index]
-            years_X_sparse[year] = X_sparse[start_index:end_index]
+            years_indexes[year] = np.arange(start_index, end_index)
             start_index += tweet_count
 
-        return years_X, years_X_sparse, years_y
+        return years_indexes
 
-    def _shuffle_years(self, years_X, years_X_sparse, years_y):
+    def _shuffle_years(self, years_indexes):
         """
         Shuffles __years' tweets
-        :param years_X: dense data
-        :param years_X_sparse: scipy.sparse
-        :param years_y: list
-        :return: dense matrice, scipy.sparse, list
+        :param years_indexes: dict, year to row indexes
+        :return: dict, year to shuffled row indexes
         """
-        for year_name, year_data in years_X_sparse.iteritems():
-            normal = years_X[year_name]
-            sparse = years_X_sparse[year_name]
-            labels = years_y[year_name]
-            years_X[year_name], years_X_sparse[year_name], years_y[year_name] = shuffle(normal, sparse, labels)
+        for year_name, year_indexes in years_indexes.iteritems():
+            years_indexes[year_name] = shuffle(year_indexes)
 
-        return years_X, years_X_sparse, years_y
+        return years_indexes
 
-    def _create_years_partitions(self, years_X, years_y):
+    def _create_years_partitions(self, years_indexes):
         """
         Creates partitions of each year
-        :param years_X: scipy.sparse
-        :param years_y: list
-        :return: scipy.sparse, list
+        :param years_indexes: dict, year to row indexes
+        :return: dict, year to partition key to row indexes, 50 key has a list of row indexes
         """
-        splitted_X = {}
-        splitted_y = {}
+        partitions = {}
 
-        for (year_X, year_X_data), (year_y, year_y_data) in zip(years_X.iteritems(), years_y.iteritems()):
+        for year, year_indexes in years_indexes.iteritems():
 
-            splitted_X[year_X] = {}
-            splitted_y[year_y] = {}
+            partitions[year] = {}
 
-            if not year_X in TEST_YEARS and not year_y in TEST_YEARS:
-                splitted_X[year_X][ALE_PARTITION_500_KEY] = year_X_data
-                splitted_y[year_y][ALE_PARTITION_500_KEY] = year_y_data
+            if not year in TEST_YEARS:
+                partitions[year][ALE_PARTITION_500_KEY] = year_indexes
 
             else:
-                start_index = 0
-                end_index = year_X_data.shape[0]
                 int_300_key = int(ALE_PARTITION_300_KEY[0:3])
 
-                splitted_X[year_X][ALE_PARTITION_300_KEY] = year_X_data[start_index:start_index+int_300_key]
-                splitted_X[year_X][ALE_PARTITION_200_KEY] = year_X_data[start_index+int_300_key:end_index]
-                splitted_X[year_X][ALE_PARTITION_50_KEY]  = []
-
-                splitted_y[year_y][ALE_PARTITION_300_KEY] = year_y_data[start_index:start_index+int_300_key]
-                splitted_y[year_y][ALE_PARTITION_200_KEY] = year_y_data[start_index+int_300_key:end_index]
-                splitted_y[year_y][ALE_PARTITION_50_KEY]  = []
+                partitions[year][ALE_PARTITION_300_KEY] = year_indexes[:int_300_key]
+                partitions[year][ALE_PARTITION_200_KEY] = year_indexes[int_300_key:]
+                partitions[year][ALE_PARTITION_50_KEY]  = []
 
         for test_year in TEST_YEARS:
 
             for j in range(0,LINE2_RANDOM_ITERATION_NUMBER):
-                random_X_set = []
-                random_y_set = []
 
-                test_year_200_length = splitted_X[test_year][ALE_PARTITION_200_KEY].shape[0]
+                test_year_200_length = len(partitions[test_year][ALE_PARTITION_200_KEY])
                 random.seed()
                 random_start_index = randint(0, test_year_200_length-RANDOM_SAMPLE_SIZE)
                 random_end_index = random_start_index+RANDOM_SAMPLE_SIZE
 
-                random_X_set = splitted_X[test_year][ALE_PARTITION_200_KEY][random_start_index:random_end_index]
-                random_y_set = splitted_y[test_year][ALE_PARTITION_200_KEY][random_start_index:random_end_index]
-
-                splitted_X[test_year][ALE_PARTITION_50_KEY].append(random_X_set)
-                splitted_y[test_year][ALE_PARTITION_50_KEY].append(random_y_set)
+                random_indexes = partitions[test_year][ALE_PARTITION_200_KEY][random_start_index:random_end_index]
+                partitions[test_year][ALE_PARTITION_50_KEY].append(random_indexes)
 
-        return splitted_X, splitted_y
+        return partitions
 
-    def _go_over_lines_setups(self, years_X_sparse, years_y):
+    def _go_over_lines_setups(self, partitions, line_names=None):
         """
         Iterates over LINES_SETUPS dictionary to run classifications
-        :param years_X_sparse: scipy.sparse
-        :param years_y: list
+        :param partitions: dict, year to partition key to row indexes
+        :param line_names: list, lines to run, all lines if None
         :return: void
         """
 
         # Iterating over lines
         for line_name, line_value in LINES_SETUPS.iteritems():
+            if line_names is not None and line_name not in line_names:
+                continue
+
             print('Currently running on Experiment #'+str(self.__experiment_number)+', '+line_name)
             self.__all_scores[line_name] = {}
 
@@ -209,7 +302,7 @@ class ExperimentManager:
                 if line_name == "line1" or line_name == "line4":
 
                     X_train, X_test, y_train, y_test, train_set_name, test_set_name = \
-                            self._create_train_and_test_sets_from_setup_dict(years_X_sparse, years_y, train_set_setup, test_set_setup, line_name, -1)
+                            self._create_train_and_test_sets_from_setup_dict(partitions, train_set_setup, test_set_setup, line_name, -1)
 
                     acc_score = self._classify(X_train, X_test, y_train, y_test)
                     self._save_accuracy_score(line_name, train_set_name, test_set_name, acc_score)
@@ -219,8 +312,8 @@ class ExperimentManager:
                     for random_50_iteration_index in range(0, LINE2_RANDOM_ITERATION_NUMBER):
 
                         X_train, X_test, y_train, y_test, train_set_name, test_set_name = \
-                        self._create_train_and_test_sets_from_setup_dict(years_X_sparse, years_y, train_set_setup,
-                                                                         test_set_setup, line_name, random_50_iteration_index)
+                        self._create_train_and_test_sets_from_setup_dict(partitions, train_set_setup, test_set_setup,
+                                                                         line_name, random_50_iteration_index)
 
                         acc_score = self._classify(X_train, X_test, y_train, y_test)
                         self._save_accuracy_score(line_name, train_set_name, test_set_name, acc_score)
@@ -234,17 +327,16 @@ class ExperimentManager:
                     prob_train_year, prob_train_count = prob_train_setup[0], prob_train_setup[1]
                     prob_test_year, prob_test_count = prob_test_setup[0], prob_test_setup[1]
 
-                    prob_X_train = years_X_sparse[prob_train_year][prob_train_count]
-                    prob_y_train = years_y[prob_train_year][prob_train_count]
+                    prob_train_indexes = partitions[prob_train_year][prob_train_count]
+                    prob_X_train, prob_y_train = self._get_rows(prob_train_indexes)
 
-                    prob_X_test = years_X_sparse[prob_test_year][prob_test_count]
-                    prob_y_test = np.array(years_y[prob_test_year][prob_test_count])
+                    prob_test_indexes = partitions[prob_test_year][prob_test_count]
+                    prob_X_test, prob_y_test = self._get_rows(prob_test_indexes)
 
                     final_X_test_year = test_set_setup.keys()[0] #2013
                     final_X_test_tweet_count = test_set_setup[final_X_test_year] #300
 
-                    final_X_test = years_X_sparse[final_X_test_year][final_X_test_tweet_count]
-                    final_y_test = years_y[final_X_test_year][final_X_test_tweet_count]
+                    final_X_test, final_y_test = self._get_rows(partitions[final_X_test_year][final_X_test_tweet_count])
 
                     test_set_name = final_X_test_year + "_" + final_X_test_tweet_count
                     train_set_name_appendix = prob_train_year + "_" + prob_train_count + "+" + prob_test_year + "_" + str(MOST_DISTINCT_SAMPLE_SIZE)
@@ -262,6 +354,8 @@ class ExperimentManager:
 
                     train_set_name_one = "L0-" + train_set_name_appendix
                     self._save_accuracy_score(line_name, train_set_name_one, test_set_name, acc_score_for_ale_one)
+                    self._save_selected_rows(train_set_name_one, test_set_name,
+                                             prob_test_indexes[indexes_of_samples_closest_to_decision_boundary])
 
                     if PLOT_DECISION_BOUNDARIES_FOR_LINE_3:
                         # Plot decision boundary of probabilities with PCA
@@ -273,7 +367,7 @@ class ExperimentManager:
                     # Active Learning Method - II
                     print('Active Learning Method - II')
                     samples_closest_to_cluster_centroids_org_X, samples_closest_to_cluster_centroids_org_y, indices_of_closest_samples_to_centroids = \
-                        self._choose_ale_samples_from_cluster_centroids_with_original_features(prob_X_test, prob_y_test)
+                        self._choose_ale_samples_from_cluster_centroids_with_original_features(prob_X_test, prob_y_test, prob_test_indexes)
 
                     acc_score_for_ale_two = self._combine_train_sets_and_run_classification(prob_X_train, final_X_test,
                                                                                             samples_closest_to_cluster_centroids_org_X,
@@ -282,11 +376,13 @@ class ExperimentManager:
 
                     train_set_name_two = "L1-" + train_set_name_appendix
                     self._save_accuracy_score(line_name, train_set_name_two, test_set_name, acc_score_for_ale_two)
+                    self._save_selected_rows(train_set_name_two, test_set_name,
+                                             prob_test_indexes[indices_of_closest_samples_to_centroids])
 
 
                     # Active Learning Method - III
                     print('Active Learning Method - III')
-                    probabilities = self._predict_probabilities(prob_X_train, prob_X_test, prob_y_train)
+                    probabilities = self._predict_class_scores(prob_X_train, prob_X_test, prob_y_train)
 
                     samples_closest_to_cluster_centroids_cmb_X, samples_closest_to_cluster_centroids_cmb_y, indices_of_closest_samples_to_centroids = \
                         self._choose_ale_samples_from_cluster_centroids_with_combined_features(probabilities, prob_X_test, prob_y_test)
@@ -298,34 +394,65 @@ class ExperimentManager:
 
                     train_set_name_three = "L2-" + train_set_name_appendix
                     self._save_accuracy_score(line_name, train_set_name_three, test_set_name, acc_score_for_ale_three)
+                    self._save_selected_rows(train_set_name_three, test_set_name,
+                                             prob_test_indexes[indices_of_closest_samples_to_centroids])
 
 
 
                     # Active Learning Method - IV
                     print('Active Learning Method - IV')
-                    it_X_train, it_X_test, it_y_train, it_y_test = \
-                        self._choose_ale_samples_closest_to_decision_boundary_with_iteration(prob_X_train, prob_X_test, prob_y_train, prob_y_test)
+                    it_X_train, it_X_test, it_y_train, it_y_test, it_chosen_indexes = \
+                        self._choose_ale_samples_closest_to_decision_boundary_with_iteration(prob_train_indexes, prob_test_indexes)
                     acc_score_for_ale_four = self._classify(it_X_train, final_X_test, it_y_train, final_y_test)
                     train_set_name_three = "L3-" + train_set_name_appendix
                     self._save_accuracy_score(line_name, train_set_name_three, test_set_name, acc_score_for_ale_four)
+                    self._save_selected_rows(train_set_name_three, test_set_name, it_chosen_indexes)
+
+
+                    # Active Learning Method - V
+                    print('Active Learning Method - V')
+                    samples_density_weighted_X, samples_density_weighted_y, indexes_of_density_weighted_samples = \
+                        self._choose_ale_samples_with_density_weighted_uncertainty(prob_X_train, prob_X_test, prob_y_train, prob_y_test, MOST_DISTINCT_SAMPLE_SIZE)
+
+                    acc_score_for_ale_five = self._combine_train_sets_and_run_classification(prob_X_train, final_X_test,
+                                                                                             samples_density_weighted_X,
+                                                                                             prob_y_train, final_y_test,
+                                                                                             samples_density_weighted_y)
+
+                    train_set_name_five = "L4-" + train_set_name_appendix
+                    self._save_accuracy_score(line_name, train_set_name_five, test_set_name, acc_score_for_ale_five)
+                    self._save_selected_rows(train_set_name_five, test_set_name,
+                                             prob_test_indexes[indexes_of_density_weighted_samples])
+
+
+                    # Active Learning Method - VI
+                    print('Active Learning Method - VI')
+                    samples_k_centers_X, samples_k_centers_y, indexes_of_k_centers = \
+                        self._choose_ale_samples_with_k_centers(prob_X_train, prob_X_test, prob_y_train, prob_y_test,
+                                                                prob_train_indexes, prob_test_indexes)
+
+                    acc_score_for_ale_six = self._combine_train_sets_and_run_classification(prob_X_train, final_X_test,
+                                                                                            samples_k_centers_X,
+                                                                                            prob_y_train, final_y_test,
+                                                                                            samples_k_centers_y)
+
+                    train_set_name_six = "L5-" + train_set_name_appendix
+                    self._save_accuracy_score(line_name, train_set_name_six, test_set_name, acc_score_for_ale_six)
+                    self._save_selected_rows(train_set_name_six, test_set_name, prob_test_indexes[indexes_of_k_centers])
 
-    def _create_train_and_test_sets_from_setup_dict(self, years_X_sparse, years_y, train_setup, test_setup, line_name, iteration_number):
+    def _create_train_and_test_sets_from_setup_dict(self, partitions, train_setup, test_setup, line_name, iteration_number):
         """
         Creates necessary train set and test set from given setup dictionary
-        :param years_X_sparse: scipy.sparse
-        :param years_y: list
+        :param partitions: dict, year to partition key to row indexes
         :param train_setup: dict
         :param test_setup: dict
         :param line_name: string
         :param iteration_number: int
-        :return: scipy.sparse, scipy.sparse, list, list, string, string
+        :return: scipy.sparse, scipy.sparse, np.array, np.array, string, string
         """
 
-        X_train = []
-        y_train = []
-
-        X_test  = []
-        y_test  = []
+        train_indexes = []
+        test_indexes = []
 
         train_set_name = ""
         test_set_name = ""
@@ -334,55 +461,38 @@ class ExperimentManager:
 
         for train_set_year, tweet_to_take_from_train_year in train_setup.iteritems():
 
-            new_x_train = years_X_sparse[train_set_year][tweet_to_take_from_train_year]
-
-            if line_name == "line2" and isinstance(new_x_train, list) and len(new_x_train)==LINE2_RANDOM_ITERATION_NUMBER:
-                new_x_train = new_x_train[iteration_number]
-
-            new_x_train_dense = new_x_train.toarray().tolist()
-            X_train += new_x_train_dense
-
-            new_y_train = years_y[train_set_year][tweet_to_take_from_train_year]
+            new_train_indexes = partitions[train_set_year][tweet_to_take_from_train_year]
 
-            if line_name == "line2" and isinstance(y_train, list) and len(new_y_train)==LINE2_RANDOM_ITERATION_NUMBER:
-                y_train += new_y_train[iteration_number]
-            else:
-                y_train += new_y_train
+            if line_name == "line2" and isinstance(new_train_indexes, list) and len(new_train_indexes)==LINE2_RANDOM_ITERATION_NUMBER:
+                new_train_indexes = new_train_indexes[iteration_number]
 
+            train_indexes.append(new_train_indexes)
             train_set_name += train_set_year + '_' + tweet_to_take_from_train_year + '+'
 
-        X_train_sparse = sparse.csr_matrix(X_train)
+        X_train, y_train = self._get_rows(np.concatenate(train_indexes))
         train_set_name = train_set_name.rstrip('+')
 
         for test_set_year, tweet_to_take_from_test_year in test_setup.iteritems():
 
-            new_x_test = years_X_sparse[test_set_year][tweet_to_take_from_test_year]
-            new_x_test_dense = new_x_test.toarray().tolist()
-            X_test += new_x_test_dense
-
-            y_test += years_y[test_set_year][tweet_to_take_from_test_year]
-
+            test_indexes.append(partitions[test_set_year][tweet_to_take_from_test_year])
             test_set_name += test_set_year + '_' + tweet_to_take_from_test_year + '+'
 
-        sparse_X_test = sparse.csr_matrix(X_test)
+        X_test, y_test = self._get_rows(np.concatenate(test_indexes))
         test_set_name = test_set_name.rstrip('+')
 
-        return X_train_sparse, sparse_X_test, y_train, y_test, train_set_name, test_set_name
+        return X_train, X_test, y_train, y_test, train_set_name, test_set_name
 
     def _classify(self, X_train, X_test, y_train, y_test):
         """
         Makes a classification with given train and test sets
         :param X_train: scipy.sparse
         :param X_test: scipy.sparse
-        :param y_train: list
-        :param y_test: list
+        :param y_train: np.array, label codes
+        :param y_test: np.array, label codes
         :return: float
         """
         # Creating SVM instance
-        classifier = self._get_new_model_for_classification()
-
-        y_train = self.__label_encoder.transform(y_train)
-        y_test  = self.__label_encoder.transform(y_test)
+        classifier = self._with_precomputed_kernel(self._get_new_model_for_classification())
 
         # Fitting model
         classifier.fit(X_train, y_train)
@@ -413,6 +523,16 @@ class ExperimentManager:
         else:
             self.__all_scores[line_name][score_dict_key] = score
 
+    def _save_selected_rows(self, train_set_name, test_set_name, row_indexes):
+        """
+        Saves rows chosen by an active learning method with the key of its score
+        :param train_set_name: string
+        :param test_set_name: string
+        :param row_indexes: np.array, int
+        :return: void
+        """
+        self.__selected_rows[train_set_name + '/' + test_set_name] = np.asarray(row_indexes)
+
     def _cumulate_scores_of_line2(self):
         """
         Cumulates line2's scores from LINE2_RANDOM_ITERATION_NUMBER experiments into an array like: [min, mean, max]
@@ -434,6 +554,45 @@ class ExperimentManager:
 
             self.__all_scores['line2'][train_test_set] = min_mean_max
 
+    def _predict_class_scores(self, X_train, X_test, y_train):
+        """
+        Returns scores of test set samples for each sentiment class which logical selections rank samples with:
+        probabilities, or decision function values with margin uncertainty which needs no calibration
+        :param X_train: scipy.sparse
+        :param X_test: scipy.sparse
+        :param y_train: np.array
+        :return: np.array, n_samples x n_classes
+        """
+        if self.__selection_uncertainty == self.PROBABILITY_UNCERTAINTY:
+            return self._predict_probabilities(X_train, X_test, y_train)
+
+        return self._predict_decision_function(X_train, X_test, y_train)
+
+    def _get_class_scores(self, classifier, X_test):
+        """
+        Returns scores of a fitted logical selection classifier, see _predict_class_scores
+        :param classifier: sklearn classifier
+        :param X_test: scipy.sparse
+        :return: np.array, n_samples x n_classes
+        """
+        if self.__selection_uncertainty == self.PROBABILITY_UNCERTAINTY:
+            return classifier.predict_proba(X_test)
+
+        return classifier.decision_function(X_test)
+
+    def _predict_decision_function(self, X_train, X_test, y_train):
+        """
+        Returns decision function values of test set samples for each sentiment class
+        :param X_train: scipy.sparse
+        :param X_test: scipy.sparse
+        :param y_train: np.array
+        :return: np.array
+        """
+        classifier = self._with_precomputed_kernel(self._get_new_model_for_logical_selection_with_classification())
+        classifier.fit(X_train, y_train)
+
+        return classifier.decision_function(X_test)
+
     def _predict_probabilities(self, X_train, X_test, y_train):
         """
         This method calculates the probabilities of test set samples belogning each sentiment class using a model.
@@ -445,7 +604,7 @@ class ExperimentManager:
         :return: list
         """
         # Getting new model instance
-        classifier = self._get_new_model_for_logical_selection_with_classification()
+        classifier = self._with_precomputed_kernel(self._get_new_model_for_logical_selection_with_classification())
 
         # Fitting
         classifier.fit(X_train, y_train)
@@ -455,56 +614,71 @@ class ExperimentManager:
 
         return probabilities
 
-    def _get_new_model_for_classification(self):
+    def _get_new_model_for_classification(self, n_features=None):
         """
-        Returns new classifier instance
-        :return: OneVsRestClassifier
+        Returns new classifier instance of the classification backend
+        :param n_features: int, features the model will be fitted with, feature count of document if None
+        :return: sklearn classifier
         """
-        model_for_classification = SVC(C=1.0, kernel='poly', probability=True, degree=1.0, cache_size=250007)
-        model_for_classification = OneVsRestClassifier(model_for_classification)
-        #model_for_classification = RandomForestClassifier(n_estimators=100)
-        #model_for_classification = GradientBoostingClassifier(n_estimators=100)
-        #model_for_classification = GaussianNB()
-        #model_for_classification = xgb.XGBClassifier(n_estimators=100)
+        if n_features is None:
+            n_features = self.__feature_count
 
-        return model_for_classification
+        return ClassifierRegistry.create(self.__classification_backend, ClassifierRegistry.CLASSIFICATION, n_features,
+                                         probability=False)
 
     def _get_new_model_for_logical_selection_with_classification(self):
         """
-        Returns new classifier instance for logical selection
-        :return:
+        Returns new classifier instance of the logical selection backend
+        :return: sklearn classifier
         """
-        model_for_logical_selection_with_classification = SVC(C=1.0, kernel='poly', probability=True, degree=1.0, cache_size=250007)
-        model_for_logical_selection_with_classification = OneVsRestClassifier(model_for_logical_selection_with_classification)
-        #model_for_logical_selection_with_classification = RandomForestClassifier(n_estimators=100)
-        #model_for_logical_selection_with_classification = GradientBoostingClassifier(n_estimators=100)
-        #model_for_logical_selection_with_classification = MultinomialNB()
-        #model_for_logical_selection_with_classification = xgb.XGBClassifier(n_estimators=100)
-
-        return model_for_logical_selection_with_classification
+        return ClassifierRegistry.create(self.__logical_selection_backend, ClassifierRegistry.LOGICAL_SELECTION,
+                                         self.__feature_count,
+                                         probability=self.__selection_uncertainty == self.PROBABILITY_UNCERTAINTY)
 
     def _get_new_model_for_logical_selection_with_clustering(self):
         """
         Returns new model for clustering in active learning experiment II and III
-        :return: KMeans
+        :return: ClusteringSelector
         """
-        model_for_logical_selection_with_clustering = KMeans(n_clusters = MOST_DISTINCT_SAMPLE_SIZE)
+        model_for_logical_selection_with_clustering = ClusteringSelector(MOST_DISTINCT_SAMPLE_SIZE)
 
         return model_for_logical_selection_with_clustering
 
-    def _get_sample_indexes_closest_to_decision_boundary(self, samples_probabilities, sample_size):
+    def _get_projection(self):
+        """
+        Returns TruncatedSVD projection of all rows, computed once per experiment for clustering selections
+        :return: np.array, or None if CLUSTERING_SVD_COMPONENTS is 0
+        """
+        if not CLUSTERING_SVD_COMPONENTS:
+            return None
+
+        if self.__projection is None:
+            n_components = min(CLUSTERING_SVD_COMPONENTS, min(self.__X_sparse.shape) - 1)
+            self.__projection = TruncatedSVD(n_components=n_components).fit_transform(self.__X_sparse)
+
+        return self.__projection
+
+    def _get_sample_indexes_closest_to_decision_boundary(self, samples_probabilities, sample_size, strategy=None):
         """
         Returns samples' indexes which are closest to decision boundary
-        :param samples: list
-        :return: list
+        :param samples_probabilities: np.array, output of _predict_class_scores
+        :param sample_size: int
+        :param strategy: string, UncertaintySampler strategy, selection strategy of the experiment if None
+        :return: np.array, most uncertain first
         """
-        # Finding elements which have minimum standart deviations
-        np_array = self._find_standart_deviations_of_samples_probabilities(samples_probabilities)
+        # Finding elements which have minimum standart deviations by default
+        return self._get_uncertainty_sampler(strategy).select(samples_probabilities, sample_size)
 
-        indices_of_minimum_stds = np_array.argsort()[:sample_size]
-        # for indice in indices_of_minimum_stds:
-        #     print(samples_probabilities[indice], standart_deviations[indice])
-        return indices_of_minimum_stds
+    def _get_uncertainty_sampler(self, strategy=None):
+        """
+        Returns sampler of a strategy for the scores given by _predict_class_scores
+        :param strategy: string, UncertaintySampler strategy, selection strategy of the experiment if None
+        :return: UncertaintySampler
+        """
+        if self.__selection_uncertainty == self.MARGIN_UNCERTAINTY:
+            return UncertaintySampler(UncertaintySampler.MARGIN)
+
+        return UncertaintySampler(strategy or self.__selection_strategy)
 
     def _plot_decision_boundary(self, X_train, X_test, y_train, y_test, highlighted_samples_indexes, plot_title):
         """
@@ -519,13 +693,9 @@ class ExperimentManager:
         """
 
         # Creating classifiers
-        classifier = self._get_new_model_for_classification()
+        classifier = self._get_new_model_for_classification(n_features=2)
         svd = TruncatedSVD(n_components=2)
 
-        # Encoding labeles to float
-        y_train = self.__label_encoder.transform(y_train)
-        y_test = self.__label_encoder.transform(y_test)
-
         # Splitting normal and highlighted samples
         probability_ranges = np.arange(X_test.shape[0])
         normal_samples_indexes = np.setdiff1d(probability_ranges, highlighted_samples_indexes)
@@ -534,8 +704,8 @@ class ExperimentManager:
         highlighted_samples_y = y_test[highlighted_samples_indexes]
 
         # Dimensionality reduction
-        svd_X_train = svd.fit_transform(X_train)
-        svd_X_test = svd.fit_transform(X_test)
+        svd_X_train = svd.fit_transform(self._get_features(X_train))
+        svd_X_test = svd.fit_transform(self._get_features(X_test))
 
         # Training the model
         classifier.fit(svd_X_train, y_train)
@@ -586,78 +756,159 @@ class ExperimentManager:
 
         plt.show()
 
-    def _choose_ale_samples_closest_to_decision_boundary(self, prob_X_train, prob_X_test, prob_y_train, prob_y_test, sample_size):
+    def _choose_ale_samples_closest_to_decision_boundary(self, prob_X_train, prob_X_test, prob_y_train, prob_y_test, sample_size, strategy=None):
         """
         Returns closest samples to the decision boundary.
         :param prob_X_train: scipy.sparse
         :param prob_X_test: scipy.sparse
-        :param prob_y_train: list
-        :param prob_y_test: list
-        :return: scipy.sparse, list, list
+        :param prob_y_train: np.array
+        :param prob_y_test: np.array
+        :param strategy: string, UncertaintySampler strategy, selection strategy of the experiment if None
+        :return: scipy.sparse, np.array, np.array
         """
 
-        probabilities = self._predict_probabilities(prob_X_train, prob_X_test, prob_y_train)
+        probabilities = self._predict_class_scores(prob_X_train, prob_X_test, prob_y_train)
 
         # Find closest samples to the decision boundary
-        indexes_of_samples_closest_to_decision_boundary = self._get_sample_indexes_closest_to_decision_boundary(probabilities, sample_size)
+        indexes_of_samples_closest_to_decision_boundary = self._get_sample_indexes_closest_to_decision_boundary(probabilities, sample_size, strategy)
 
         samples_closest_to_decision_boundary_X = prob_X_test[indexes_of_samples_closest_to_decision_boundary]
         samples_closest_to_decision_boundary_y = prob_y_test[indexes_of_samples_closest_to_decision_boundary]
 
         return samples_closest_to_decision_boundary_X, samples_closest_to_decision_boundary_y, indexes_of_samples_closest_to_decision_boundary
 
-    def _choose_ale_samples_closest_to_decision_boundary_with_iteration(self, prob_X_train, prob_X_test, prob_y_train, prob_y_test):
+    def _choose_ale_samples_with_density_weighted_uncertainty(self, prob_X_train, prob_X_test, prob_y_train, prob_y_test, sample_size, strategy=None):
+        """
+        Returns uncertain samples which are similar to many samples of test set, see DensityWeightedSelector
+        :param prob_X_train: scipy.sparse
+        :param prob_X_test: scipy.sparse
+        :param prob_y_train: np.array
+        :param prob_y_test: np.array
+        :param sample_size: int
+        :param strategy: string, UncertaintySampler strategy, selection strategy of the experiment if None
+        :return: scipy.sparse, np.array, np.array
         """
+        probabilities = self._predict_class_scores(prob_X_train, prob_X_test, prob_y_train)
+        uncertainties = self._get_uncertainty_sampler(strategy).score(probabilities)
 
-        :param prob_X_train:
-        :param prob_X_test:
-        :param prob_y_train:
-        :param prob_y_test:
-        :return:
+        indexes_of_density_weighted_samples = DensityWeightedSelector().select(uncertainties,
+                                                                               self._get_features(prob_X_test),
+                                                                               sample_size)
+
+        samples_density_weighted_X = prob_X_test[indexes_of_density_weighted_samples]
+        samples_density_weighted_y = prob_y_test[indexes_of_density_weighted_samples]
+
+        return samples_density_weighted_X, samples_density_weighted_y, indexes_of_density_weighted_samples
+
+    def _choose_ale_samples_with_k_centers(self, prob_X_train, prob_X_test, prob_y_train, prob_y_test, prob_train_indexes, prob_test_indexes):
+        """
+        Returns a diverse batch of test set samples chosen by greedy k-center selection. With KCENTER_FEATURES
+        'features', train set samples are the initial centers so chosen samples are also far from the train set. With
+        'probabilities', centers are chosen among class scores of test set.
+        :param prob_X_train: scipy.sparse
+        :param prob_X_test: scipy.sparse
+        :param prob_y_train: np.array
+        :param prob_y_test: np.array
+        :param prob_train_indexes: np.array, row indexes of prob_X_train
+        :param prob_test_indexes: np.array, row indexes of prob_X_test
+        :return: scipy.sparse, np.array, np.array
+        """
+        k_center_selector = KCenterSelector(MOST_DISTINCT_SAMPLE_SIZE)
+
+        if KCENTER_FEATURES == 'probabilities':
+            probabilities = self._predict_class_scores(prob_X_train, prob_X_test, prob_y_train)
+            indexes_of_k_centers = k_center_selector.select(np.asarray(probabilities))
+        else:
+            projection = self._get_projection()
+            if projection is not None:
+                indexes_of_k_centers = k_center_selector.select(projection[prob_test_indexes],
+                                                                projection[prob_train_indexes])
+            else:
+                indexes_of_k_centers = k_center_selector.select(self._get_features(prob_X_test),
+                                                                self._get_features(prob_X_train))
+
+        samples_k_centers_X = prob_X_test[indexes_of_k_centers]
+        samples_k_centers_y = prob_y_test[indexes_of_k_centers]
+
+        return samples_k_centers_X, samples_k_centers_y, indexes_of_k_centers
+
+    def _choose_ale_samples_closest_to_decision_boundary_with_iteration(self, prob_train_indexes, prob_test_indexes, strategy=None):
         """
+        Moves samples closest to the decision boundary from test set to train set in iterations. Test set is a pool
+        mask over prob_test_indexes and chosen rows are appended to train indexes, so no set is rebuilt. Classifiers
+        with partial_fit are only updated with the chosen rows, warm startable ones continue from the last solution,
+        others are refitted. Only the remaining pool is scored in each iteration.
+        :param prob_train_indexes: np.array, row indexes of train set
+        :param prob_test_indexes: np.array, row indexes of test set to choose samples from
+        :param strategy: string, UncertaintySampler strategy, selection strategy of the experiment if None
+        :return: scipy.sparse, scipy.sparse, np.array, np.array, np.array, last one is row indexes of chosen samples
+        """
+        sampler = self._get_uncertainty_sampler(strategy)
+        backend = ClassifierRegistry.get(self.__logical_selection_backend)
 
-        iteration_X_train = prob_X_train
-        iteration_X_test = prob_X_test
+        # Train rows are prob_train_indexes followed by chosen rows
+        iteration_train_indexes = np.empty(len(prob_train_indexes) + len(prob_test_indexes), dtype=np.int64)
+        iteration_train_indexes[:len(prob_train_indexes)] = prob_train_indexes
+        train_count = len(prob_train_indexes)
 
-        iteration_y_train = prob_y_train[:]
-        iteration_y_test = prob_y_test[:]
+        is_in_pool = np.ones(len(prob_test_indexes), dtype=bool)
+        chosen_indexes = np.array([], dtype=np.int64)
+        classifier = None
 
         for i in range(0, LINE3_CHOOSING_SAMPLES_ITERATION_COUNT):
 
-            samples_X, samples_y, indexes = self._choose_ale_samples_closest_to_decision_boundary(iteration_X_train,
-                                                                                                  iteration_X_test,
-                                                                                                  iteration_y_train,
-                                                                                                  iteration_y_test,
-                                                                                                  LINE3_CHOOSING_SAMPLES_SIZE)
+            pool_positions = np.flatnonzero(is_in_pool)
+            if not len(pool_positions):
+                break
+
+            if classifier is not None and backend.supports_partial_fit:
+                # Updating with the rows chosen in the last iteration
+                new_X_train, new_y_train = self._get_rows(chosen_indexes)
+                classifier.partial_fit(new_X_train, new_y_train)
+            else:
+                if classifier is None or not backend.supports_warm_start:
+                    classifier = self._get_new_model_for_logical_selection_with_classification()
+                    if backend.supports_warm_start:
+                        classifier.set_params(warm_start=True)
+                    classifier = self._with_precomputed_kernel(classifier)
 
-            dense_X_train = iteration_X_train.toarray().tolist()
-            dense_X_train += samples_X.toarray().tolist()
-            iteration_X_train = sparse.csr_matrix(dense_X_train)
+                iteration_X_train, iteration_y_train = self._get_rows(iteration_train_indexes[:train_count])
+                classifier.fit(iteration_X_train, iteration_y_train)
 
-            iteration_y_train += samples_y.tolist()
+            pool_X, pool_y = self._get_rows(prob_test_indexes[pool_positions])
+            class_scores = self._get_class_scores(classifier, pool_X)
 
-            iteration_y_test = np.delete(iteration_y_test, indexes)
-            dense_X_test = iteration_X_test.toarray().tolist()
-            dense_X_test = np.delete(dense_X_test, indexes, axis=0)
+            chosen_positions = pool_positions[sampler.select(class_scores, LINE3_CHOOSING_SAMPLES_SIZE)]
+            is_in_pool[chosen_positions] = False
 
+            chosen_indexes = prob_test_indexes[chosen_positions]
+            iteration_train_indexes[train_count:train_count + len(chosen_indexes)] = chosen_indexes
+            train_count += len(chosen_indexes)
 
-            iteration_X_test = sparse.csr_matrix(dense_X_test, shape=(len(iteration_y_test), iteration_X_train.shape[1]))
+        iteration_X_train, iteration_y_train = self._get_rows(iteration_train_indexes[:train_count])
+        iteration_X_test, iteration_y_test = self._get_rows(prob_test_indexes[is_in_pool])
 
-        return iteration_X_train, iteration_X_test, iteration_y_train, iteration_y_test
+        return iteration_X_train, iteration_X_test, iteration_y_train, iteration_y_test, \
+               iteration_train_indexes[len(prob_train_indexes):train_count]
 
-    def _choose_ale_samples_from_cluster_centroids_with_original_features(self, prob_X_test, prob_y_test):
+    def _choose_ale_samples_from_cluster_centroids_with_original_features(self, prob_X_test, prob_y_test, prob_test_indexes):
         """
-        Returns samples closest to the cluster centroids with original features.
+        Returns samples closest to the cluster centroids with original features, or with their TruncatedSVD projection
+        if CLUSTERING_SVD_COMPONENTS is set.
         :param prob_X_test: scipy.sparse
         :param prob_y_test: scipy.sparse
+        :param prob_test_indexes: np.array, row indexes of prob_X_test
         :return: scipy.sparse, list, list
         """
-        indices_of_closest_samples_to_centroids = []
         clustering_model = self._get_new_model_for_logical_selection_with_clustering()
-        clustering_model.fit(prob_X_test)
-        distances_matrix = clustering_model.transform(prob_X_test)
 
-        indices_of_closest_samples_to_centroids = np.argmin(distances_matrix, axis=0)
+        projection = self._get_projection()
+        if projection is not None:
+            prob_X_test_features = projection[prob_test_indexes]
+        else:
+            prob_X_test_features = self._get_features(prob_X_test)
+
+        indices_of_closest_samples_to_centroids = clustering_model.select(prob_X_test_features)
 
         samples_closest_to_centroids_X = prob_X_test[indices_of_closest_samples_to_centroids]
         samples_closest_to_centroids_y = prob_y_test[indices_of_closest_samples_to_centroids]
@@ -672,16 +923,8 @@ class ExperimentManager:
         :param prob_y_test: scipy.sparse
         :return: scipy.sparse, list, list
         """
-        N_SAMPLES_WITH_MINIMUM_STDS_TO_CLUSTER = 100
-
-        standart_deviations = self._find_standart_deviations_of_samples_probabilities(probabilities)
-        indices_of_minimum_stds = standart_deviations.argsort()[:N_SAMPLES_WITH_MINIMUM_STDS_TO_CLUSTER]
-
         clustering_model = self._get_new_model_for_logical_selection_with_clustering()
-        clustering_model.fit(probabilities)
-        distances_matrix = clustering_model.transform(probabilities)
-
-        indices_of_closest_samples_to_centroids = np.argmin(distances_matrix, axis=0)
+        indices_of_closest_samples_to_centroids = clustering_model.select(np.asarray(probabilities))
 
         samples_closest_to_centroids_X = prob_X_test[indices_of_closest_samples_to_centroids]
         samples_closest_to_centroids_y = prob_y_test[indices_of_closest_samples_to_centroids]
@@ -695,40 +938,16 @@ class ExperimentManager:
         :param base_train_X: scipy.sparse
         :param base_test_X: scipy.sparse
         :param new_train_X: scipy.sparse
-        :param base_train_y: list
-        :param base_test_y: list
-        :param new_train_y: list
+        :param base_train_y: np.array
+        :param base_test_y: np.array
+        :param new_train_y: np.array
         :return:
         """
         # Find final train and test set
-        final_X_train = base_train_X.toarray().tolist()
-        final_X_train += new_train_X.toarray().tolist()
-        final_sparse_X_train = sparse.csr_matrix(final_X_train)
-
-        final_y_train = []
-        final_y_train = base_train_y[:]
-        final_y_train += new_train_y.tolist()
+        final_sparse_X_train = self._stack_rows(base_train_X, new_train_X)
+        final_y_train = np.concatenate((base_train_y, new_train_y))
 
         # Test model and save the score
         acc_score = self._classify(final_sparse_X_train, base_test_X, final_y_train, base_test_y)
 
         return acc_score
-
-    def _find_standart_deviations_of_samples_probabilities(self, probabilities):
-        """
-        Returns standart deviations of given probabilities list to find samples closest to the decision boundary in one
-        step further.
-        :param probabilities: list
-        :return: np.array
-        """
-
-        standart_deviations = []
-        for one_samples_probabilities in probabilities:
-
-            mean_of_samples_probabilities = np.std(one_samples_probabilities)
-            standart_deviations.append(mean_of_samples_probabilities)
-
-        # Finding elements which have minimum standart deviations
-        np_standart_deviations = np.array(standart_deviations)
-
-        return np_standart_deviations
\ No newline at end of file
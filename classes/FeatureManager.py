@@ -3,62 +3,274 @@ import numpy as np
 import PreprocessManager
 
 from config import *
+from multiprocessing import Pool, cpu_count
 from sklearn.feature_extraction.text import CountVectorizer
 
+from helpers.GeneralHelpers import GeneralHelpers
+
 class FeatureManager:
     """
     This class manages feature-related functionalities
     """
 
     def __init__(self):
-        pass
+        self.__helper = GeneralHelpers()
 
-    def create_document_and_classes_for_tweets(self, tweets, find_roots):
+    def create_document_and_classes_for_tweets(self, tweets, find_roots, n_jobs=PREPROCESS_N_JOBS,
+                                               use_document_cache=USE_DOCUMENT_CACHE):
         """
-        Creates document with irrelevant information removed and classes of them
+        Creates document with irrelevant information removed and classes of them. Tweets preprocessed before with the
+        same text and the same pipeline are taken from the document cache.
         :param tweets: list, list of tweets
         :param find_roots: bool, whether or not to find roots of words
+        :param n_jobs: int, worker processes for cleaning, 0 uses all cores
+        :param use_document_cache: bool, whether or not to use the cache of preprocessed tweets
         :return: list, list, document and classes
         """
 
-        classes = []
-        document = []
+        classes = [tweet.tweet_class for tweet in tweets]
 
         preprocess_manager = PreprocessManager.PreprocessManager()
+        document_cache, pipeline_fingerprint = self._load_document_cache(preprocess_manager, find_roots,
+                                                                         use_document_cache)
+
+        try:
+            document, cache_keys, missing_indexes = self._look_up_documents(
+                preprocess_manager, document_cache, pipeline_fingerprint, [tweet.id for tweet in tweets],
+                [tweet.text for tweet in tweets])
 
-        # Iterating over all tweets
-        for tweet_index, tweet in enumerate(tweets):
+            if len(missing_indexes):
+                process_pool = None
+                if len(missing_indexes) >= PREPROCESS_MIN_TWEETS_FOR_PARALLEL:
+                    process_pool = self._create_process_pool(n_jobs)
 
-            # Removing irrelevant features
-            preprocessed_tweet = preprocess_manager.clean_all(tweet.text)
+                try:
+                    missing_texts = [tweets[idx].text for idx in missing_indexes]
+                    self._fill_missing_documents(preprocess_manager, document_cache, document, cache_keys,
+                                                 missing_indexes, missing_texts, find_roots, process_pool)
+                finally:
+                    self._close_process_pool(process_pool)
+        finally:
+            self._save_preprocessing_caches(preprocess_manager, document_cache, close=True)
 
-            words_of_tweets = preprocessed_tweet.split(" ")
+        return document, classes
+
+    def iterate_processed_tweets(self, rows, find_roots, n_jobs=PREPROCESS_N_JOBS,
+                                 buffer_size=PREPROCESS_STREAM_BUFFER_SIZE,
+                                 checkpoint_interval=PREPROCESS_STREAM_CHECKPOINT_INTERVAL, use_document_cache=False):
+        """
+        Streaming variant of create_document_and_classes_for_tweets. Rows are read and preprocessed buffer by buffer,
+        so memory is bounded by the buffer size, not by the number of tweets. Caches are saved every
+        checkpoint_interval tweets and when the generator is closed. Document cache keeps all its entries in memory,
+        so it's off by default here.
+        :param rows: iterable, (id, text, class, created_at) tuples, e.g. DBManager.iterate_tweet_rows_for_year
+        :param find_roots: bool, whether or not to find roots of words
+        :param n_jobs: int, worker processes for cleaning, 0 uses all cores
+        :param buffer_size: int, tweets preprocessed together
+        :param checkpoint_interval: int, tweets between cache saves
+        :param use_document_cache: bool, whether or not to use the cache of preprocessed tweets
+        :return: generator, (id, preprocessed text, class, created_at) tuples in the same order
+        """
+        preprocess_manager = PreprocessManager.PreprocessManager()
+        document_cache, pipeline_fingerprint = self._load_document_cache(preprocess_manager, find_roots,
+                                                                         use_document_cache)
+        process_pool = None
+        processed_count = 0
+        last_checkpoint_count = 0
 
-            # Iterating over all words in tweet to correct misspellings
-            for word_index, word in enumerate(words_of_tweets):
+        try:
+            for buffered_rows in self._iterate_buffers(rows, buffer_size):
+                document, cache_keys, missing_indexes = self._look_up_documents(
+                    preprocess_manager, document_cache, pipeline_fingerprint, [row[0] for row in buffered_rows],
+                    [row[1] for row in buffered_rows])
 
-                # Correcting misspellings
-                spell_corrected_word = preprocess_manager.correct_misspelling(word)
-                words_of_tweets[word_index] = spell_corrected_word
+                if len(missing_indexes):
+                    # Pool is created once and used for all buffers
+                    if process_pool is None and (n_jobs or cpu_count()) > 1:
+                        process_pool = self._create_process_pool(n_jobs)
 
-            # If researcher wants to use root of words as features
-            if find_roots:
+                    missing_texts = [buffered_rows[idx][1] for idx in missing_indexes]
+                    self._fill_missing_documents(preprocess_manager, document_cache, document, cache_keys,
+                                                 missing_indexes, missing_texts, find_roots, process_pool)
 
-                # Iterating over all words in tweet to find roots
-                for word_index, word in enumerate(words_of_tweets):
+                for row, processed_text in zip(buffered_rows, document):
+                    yield row[0], processed_text, row[2], row[3]
 
-                    # Finding roots
-                    root_of_word = preprocess_manager.find_root_of_word(word)
-                    words_of_tweets[word_index] = root_of_word
+                processed_count += len(buffered_rows)
+                if processed_count - last_checkpoint_count >= checkpoint_interval:
+                    self._save_preprocessing_caches(preprocess_manager, document_cache)
+                    last_checkpoint_count = processed_count
+                    print("Checkpoint: " + str(processed_count) + " tweets preprocessed.")
+        finally:
+            self._close_process_pool(process_pool)
+            self._save_preprocessing_caches(preprocess_manager, document_cache, close=True)
 
-            processed_tweet = ' '.join(words_of_tweets)
+    def _iterate_buffers(self, rows, buffer_size):
+        """
+        Groups rows into lists of at most buffer_size rows
+        :param rows: iterable
+        :param buffer_size: int
+        :return: generator, lists of rows
+        """
+        buffered_rows = []
+        for row in rows:
+            buffered_rows.append(row)
+
+            if len(buffered_rows) >= buffer_size:
+                yield buffered_rows
+                buffered_rows = []
+
+        if len(buffered_rows):
+            yield buffered_rows
+
+    def _load_document_cache(self, preprocess_manager, find_roots, use_document_cache):
+        """
+        Loads the document cache and the fingerprint of the pipeline
+        :param preprocess_manager: PreprocessManager
+        :param find_roots: bool
+        :param use_document_cache: bool
+        :return: AppendOnlyCache, string, or None, None if document cache is not used
+        """
+        if not use_document_cache:
+            return None, None
+
+        pipeline_fingerprint = preprocess_manager.get_pipeline_fingerprint(find_roots)
+        return self.__helper.load_document_cache(pipeline_fingerprint), pipeline_fingerprint
+
+    def _look_up_documents(self, preprocess_manager, document_cache, pipeline_fingerprint, tweet_ids, texts):
+        """
+        Finds already preprocessed texts in the document cache
+        :param preprocess_manager: PreprocessManager
+        :param document_cache: AppendOnlyCache or None
+        :param pipeline_fingerprint: string or None
+        :param tweet_ids: list
+        :param texts: list, raw texts
+        :return: list, list, list, document with None for missing texts, cache keys and indexes of missing texts
+        """
+        document = [None] * len(texts)
 
-            # Appending to document
-            document.append(processed_tweet)
-            classes.append(tweet.tweet_class)
+        if document_cache is None:
+            return document, None, range(len(texts))
 
+        cache_keys = [preprocess_manager.get_document_cache_key(tweet_id, text, pipeline_fingerprint)
+                      for tweet_id, text in zip(tweet_ids, texts)]
+
+        missing_indexes = []
+        for idx, cache_key in enumerate(cache_keys):
+            if cache_key in document_cache:
+                document[idx] = document_cache[cache_key]
+            else:
+                missing_indexes.append(idx)
+
+        print(str(len(texts) - len(missing_indexes)) + " tweets found in document cache.")
+        return document, cache_keys, missing_indexes
+
+    def _fill_missing_documents(self, preprocess_manager, document_cache, document, cache_keys, missing_indexes,
+                                missing_texts, find_roots, process_pool):
+        """
+        Preprocesses missing texts, puts them into the document and the document cache
+        :param preprocess_manager: PreprocessManager
+        :param document_cache: AppendOnlyCache or None
+        :param document: list, filled in place
+        :param cache_keys: list or None
+        :param missing_indexes: list
+        :param missing_texts: list, raw texts at missing indexes
+        :param find_roots: bool
+        :param process_pool: multiprocessing.Pool or None
+        :return: void
+        """
+        preprocessed_texts = self._preprocess_texts(preprocess_manager, missing_texts, find_roots, process_pool)
+
+        for idx, preprocessed_text in zip(missing_indexes, preprocessed_texts):
+            document[idx] = preprocessed_text
+
+        if document_cache is not None:
+            document_cache.update(dict((cache_keys[idx], document[idx]) for idx in missing_indexes))
+
+    def _create_process_pool(self, n_jobs):
+        """
+        Creates worker processes of parallel preprocessing
+        :param n_jobs: int, 0 uses all cores
+        :return: multiprocessing.Pool, or None if n_jobs is 1
+        """
+        n_jobs = n_jobs or cpu_count()
+        if n_jobs <= 1:
+            return None
+
+        print("Preprocessing with " + str(n_jobs) + " processes.")
+        return Pool(n_jobs, initializer=PreprocessManager.initialize_preprocess_worker)
+
+    def _close_process_pool(self, process_pool):
+        """
+        Waits worker processes of parallel preprocessing to exit
+        :param process_pool: multiprocessing.Pool or None
+        :return: void
+        """
+        if process_pool is not None:
+            process_pool.close()
+            process_pool.join()
+
+    def _save_preprocessing_caches(self, preprocess_manager, document_cache, close=False):
+        """
+        Saves zemberek caches and the document cache
+        :param preprocess_manager: PreprocessManager
+        :param document_cache: AppendOnlyCache or None
+        :param close: bool, whether or not to close the document cache
+        :return: void
+        """
         preprocess_manager.save_caches()
-        return document, classes
+
+        if document_cache is not None:
+            document_cache.save()
+            if close:
+                document_cache.close()
+
+    def _preprocess_texts(self, preprocess_manager, texts, find_roots, process_pool):
+        """
+        Removes irrelevant information from texts, corrects misspellings and finds roots
+        :param preprocess_manager: PreprocessManager
+        :param texts: list, texts of tweets
+        :param find_roots: bool, whether or not to find roots of words
+        :param process_pool: multiprocessing.Pool, None to clean in this process
+        :return: list, preprocessed texts in the same order
+        """
+        preprocessed_texts = []
+
+        # Phase one: removing irrelevant features and collecting the vocabulary
+        words_of_all_texts = preprocess_manager.clean_and_split_many(texts, process_pool)
+
+        vocabulary = set()
+        for words_of_text in words_of_all_texts:
+            vocabulary.update(words_of_text)
+
+        # Phase two: correcting misspellings and finding roots for unique words only
+        print("Resolving " + str(len(vocabulary)) + " unique words.")
+        suggestions = preprocess_manager.resolve_suggestions(vocabulary)
+
+        # If researcher wants to use root of words as features
+        if find_roots:
+            roots = preprocess_manager.resolve_roots(set(suggestions.itervalues()))
+            resolutions = dict((word, roots[suggestion]) for word, suggestion in suggestions.iteritems())
+        else:
+            resolutions = suggestions
+
+        # Phase three: rewriting texts with the resolved words
+        for words_of_text in words_of_all_texts:
+            preprocessed_texts.append(' '.join([resolutions[word] for word in words_of_text]))
+
+        return preprocessed_texts
+
+    def vectorize_document(self, document, n, analyzer, years_tweets_counts=None):
+        """
+        Fits document and returns pruned n-gram counts without converting them to a dense matrix
+        :param document: list, document of tweets
+        :param n: int, count n in n-gram
+        :param analyzer: string, either 'word' or 'char'
+        :param years_tweets_counts: dict, year to tweet count in document's order, for per-year support pruning
+        :return: scipy.sparse.csr_matrix, np.array, counts and n-grams
+        """
+        X_sparse, features, vectorizer = self._fit_vectorizer(document, n, analyzer, years_tweets_counts)
+        return X_sparse, features
 
     def fit_data(self, document, classes, n, analyzer):
         """
@@ -71,14 +283,11 @@ class FeatureManager:
         # final_matrix = np.array([matrix_terms,matrix_freq])
         # print(len(X.toarray()))
 
-        # Creating the vectorizer
-        vectorizer = CountVectorizer(ngram_range=(n, n), analyzer=analyzer)
-
-        # Fitting document
-        X = vectorizer.fit_transform(document)
+        # Fitting document with the pruned vocabulary
+        X, features, vectorizer = self._fit_vectorizer(document, n, analyzer)
 
         # Getting our n-grams list
-        ngrams = np.array(vectorizer.get_feature_names()).tolist()
+        ngrams = features.tolist()
 
         # And our arff data
         arff_data = X.toarray().tolist()
@@ -89,6 +298,79 @@ class FeatureManager:
 
         return ngrams, arff_data, vectorizer, X
 
+    def _fit_vectorizer(self, document, n, analyzer, years_tweets_counts=None):
+        """
+        Fits a vectorizer, prunes its vocabulary with VOCABULARY_PRUNING of the analyzer and stores counts with the
+        smallest integer dtype which holds them
+        :param document: list, document of tweets
+        :param n: int, count n in n-gram
+        :param analyzer: string, either 'word' or 'char'
+        :param years_tweets_counts: dict, year to tweet count in document's order
+        :return: scipy.sparse.csr_matrix, np.array, CountVectorizer
+        """
+        vectorizer = CountVectorizer(ngram_range=(n, n), analyzer=analyzer, dtype=np.int32)
+        X_sparse = vectorizer.fit_transform(document)
+        features = np.array(vectorizer.get_feature_names())
+
+        kept_feature_indexes = self._find_kept_feature_indexes(X_sparse, years_tweets_counts,
+                                                               **VOCABULARY_PRUNING[analyzer])
+
+        if len(kept_feature_indexes) < len(features):
+            print("Vocabulary pruned from " + str(len(features)) + " to " + str(len(kept_feature_indexes)) +
+                  " n-grams.")
+            X_sparse = X_sparse[:, kept_feature_indexes]
+            features = features[kept_feature_indexes]
+
+            # Keeping the vectorizer consistent with the pruned matrix
+            vectorizer.vocabulary_ = dict((feature, idx) for idx, feature in enumerate(features))
+
+        if not X_sparse.nnz or X_sparse.data.max() <= np.iinfo(np.uint16).max:
+            X_sparse.data = X_sparse.data.astype(np.uint16)
+
+        return X_sparse, features, vectorizer
+
+    def _find_kept_feature_indexes(self, X_sparse, years_tweets_counts, min_df=1, max_df=1.0, max_features=None,
+                                   min_df_per_year=0):
+        """
+        Finds n-grams which pass all pruning rules. Document frequencies are counted from the column indexes of the
+        matrix, so every rule is one vectorized pass.
+        :param X_sparse: scipy.sparse.csr_matrix
+        :param years_tweets_counts: dict, year to tweet count in document's order, or None
+        :param min_df: int or float, minimum document count, or ratio of documents if float
+        :param max_df: int or float, maximum document count, or ratio of documents if float
+        :param max_features: int, keeps most frequent n-grams, None keeps all
+        :param min_df_per_year: int, minimum document count in at least one year, 0 disables
+        :return: np.array, indexes of kept n-grams
+        """
+        document_count, feature_count = X_sparse.shape
+
+        # Rows of a csr matrix made by CountVectorizer have one entry per n-gram
+        document_frequencies = np.bincount(X_sparse.indices, minlength=feature_count)
+
+        min_document_count = min_df if isinstance(min_df, int) else min_df * document_count
+        max_document_count = max_df if isinstance(max_df, int) else max_df * document_count
+        is_kept = (document_frequencies >= min_document_count) & (document_frequencies <= max_document_count)
+
+        if min_df_per_year and years_tweets_counts is not None:
+            has_year_support = np.zeros(feature_count, dtype=bool)
+
+            start_index = 0
+            for year, tweet_count in years_tweets_counts.iteritems():
+                year_indices = X_sparse.indices[X_sparse.indptr[start_index]:X_sparse.indptr[start_index + tweet_count]]
+                has_year_support |= np.bincount(year_indices, minlength=feature_count) >= min_df_per_year
+                start_index += tweet_count
+
+            is_kept &= has_year_support
+
+        kept_feature_indexes = np.flatnonzero(is_kept)
+
+        if max_features is not None and len(kept_feature_indexes) > max_features:
+            term_frequencies = np.asarray(X_sparse.sum(axis=0)).ravel()[kept_feature_indexes]
+            most_frequent = np.argsort(-term_frequencies, kind='mergesort')[:max_features]
+            kept_feature_indexes = np.sort(kept_feature_indexes[most_frequent])
+
+        return kept_feature_indexes
+
     def format_data_for_arff(self, ngrams, arff_data):
         """
         Formats given n-grams and arff data compatible with arff library
@@ -2,7 +2,9 @@
 import sys
 import time
 import types
+import codecs
 import copy_reg
+import collections
 import numpy as np
 from config import *
 from random import randint
@@ -14,7 +16,13 @@ from ImportManager import ImportManager
 from FeatureManager import FeatureManager
 from ExperimentManager import ExperimentManager
 
+from helpers.Preprocessor import Preprocessor
+from helpers.GramMatrix import GramMatrix
+from helpers.BinaryDataset import BinaryDataset
+from helpers.ClassifierRegistry import ClassifierRegistry
 from helpers.GeneralHelpers import GeneralHelpers
+from helpers.SharedCSRMatrix import SharedCSRMatrix
+from helpers.NearDuplicateDetector import NearDuplicateDetector
 
 class Main:
     """
@@ -46,19 +54,10 @@ class Main:
         :param year: string, 2012, 2013, 2014, 2015 or ALL
         :return: string, path of generated arff file
         """
-
-        # Getting tweets with year
-        print("Getting tweets for year "+ year)
-        tweets_for_given_year = self.__db_manager.get_tweets_for_year(year)
-
-        print("Generating document and classes of tweets.")
-        document, classes = self.__feature_manager.create_document_and_classes_for_tweets(tweets_for_given_year, True)
-
-        print("Fitting the data, finding ngrams and frequencies.")
-        ngrams, arff_data, vectorizer, X = self.__feature_manager.fit_data(document, classes, n, analyzer)
+        tweets_for_given_year, X_sparse, ngrams, classes = self._extract_features_for_year(n, analyzer, year)
 
         print("Formatting the data for arff lib format.")
-        formatted_arff_data = self.__feature_manager.format_data_for_arff(ngrams, arff_data)
+        arff_header = self.__feature_manager.format_data_for_arff(ngrams.tolist(), [])
 
         print("Generating file.")
         # Experiment name, 1grams, 2grams, 3grams.. or words
@@ -73,18 +72,231 @@ class Main:
         # Arff file path ...../DataSet-ARFF/3Gram/TTNet/TTNet_3grams_2012_asfas12.arff
         arff_file_path = PROJECT_ROOT_DIRECTORY + DATASET_ARFF_DIR_NAME + experiment_name + '/' + MODEL_NAME + '/'
 
-        # Generating the file with data
-        self.__helper.generate_arff_file(arff_file_path, file_name, formatted_arff_data)
+        # Generating the file with data, rows are streamed from the sparse matrix
+        generated_file_path = self.__helper.generate_sparse_arff_file(arff_file_path, file_name, arff_header, X_sparse,
+                                                                      classes, compress=ARFF_COMPRESS)
+
+        print("Arff file generated at path:"+generated_file_path)
+        return generated_file_path
+
+    def extract_features_and_generate_binary_dataset(self, n=3, analyzer='char', year='2012'):
+        """
+        Makes necessary function calls to extract features for given year and to save them as a binary dataset, which
+        loads much faster than an arff file, see BinaryDataset.load
+        :param n: int, ngram count
+        :param analyzer: string, word or char
+        :param year: string, 2012, 2013, 2014, 2015 or ALL
+        :return: string, path of generated dataset directory
+        """
+        tweets_for_given_year, X_sparse, ngrams, classes = self._extract_features_for_year(n, analyzer, year)
+
+        print("Generating binary dataset.")
+        # Experiment name, 1grams, 2grams, 3grams.. or words
+        experiment_name = str(n)+'Gram' if analyzer == 'char' else 'Word'
+
+        # Dataset name randomized TTNet_3grams_2012_asfas12.dataset
+        dataset_name = self.__helper.generate_random_file_name(MODEL_NAME + '_' + experiment_name + '_' + year,
+                                                               BINARY_DATASET_EXTENSION)
+
+        # Dataset path ...../DataSet-Binary/3Gram/TTNet/TTNet_3grams_2012_asfas12.dataset
+        dataset_path = PROJECT_ROOT_DIRECTORY + DATASET_BINARY_DIR_NAME + experiment_name + '/' + MODEL_NAME + '/' + \
+                       dataset_name
+
+        BinaryDataset.save(dataset_path, X_sparse, ngrams, classes,
+                           tweet_ids=[tweet.id for tweet in tweets_for_given_year],
+                           created_ats=[tweet.created_at for tweet in tweets_for_given_year])
+
+        print("Binary dataset generated at path:" + dataset_path)
+        return dataset_path
+
+    def convert_arff_to_binary_dataset(self, arff_file_path, dataset_path=None):
+        """
+        Converts an existing arff or arff.gz file to a binary dataset
+        :param arff_file_path: string
+        :param dataset_path: string, next to the arff file with BINARY_DATASET_EXTENSION if None
+        :return: string, path of generated dataset directory
+        """
+        if dataset_path is None:
+            dataset_path = arff_file_path
+            for extension in ('.gz', ARFF_FILE_EXTENSION):
+                if dataset_path.endswith(extension):
+                    dataset_path = dataset_path[:-len(extension)]
+            dataset_path += BINARY_DATASET_EXTENSION
+
+        print("Converting " + arff_file_path + " to binary dataset.")
+        BinaryDataset.convert_arff(arff_file_path, dataset_path)
+
+        print("Binary dataset generated at path:" + dataset_path)
+        return dataset_path
+
+    def _extract_features_for_year(self, n, analyzer, year):
+        """
+        Retrieves tweets of given year, preprocesses and vectorizes them
+        :param n: int, ngram count
+        :param analyzer: string, word or char
+        :param year: string, 2012, 2013, 2014, 2015 or ALL
+        :return: list, scipy.sparse.csr_matrix, np.array, list, tweets, counts, n-grams and classes
+        """
+        # Getting tweets with year
+        print("Getting tweets for year "+ year)
+        tweets_for_given_year = self.__db_manager.get_tweets_for_year(year)
 
-        print("Arff file generated at path:"+arff_file_path+file_name)
+        print("Generating document and classes of tweets.")
+        document, classes = self.__feature_manager.create_document_and_classes_for_tweets(tweets_for_given_year, True)
+
+        print("Fitting the data, finding ngrams and frequencies.")
+        X_sparse, ngrams = self.__feature_manager.vectorize_document(document, n, analyzer)
 
-    def run_experiment_with_scikit_learn(self, n=1, analyzer='word'):
+        return tweets_for_given_year, X_sparse, ngrams, classes
+
+    def run_experiment_with_scikit_learn(self, n=1, analyzer='word', classification_backend=CLASSIFICATION_BACKEND,
+                                         logical_selection_backend=LOGICAL_SELECTION_BACKEND):
         """
         Makes necessary method calls to run the experiment on scikit learn.
         :param n: int, count n in n-gram
         :param analyzer: string, either 'word' or 'char'
+        :param classification_backend: string, ClassifierRegistry backend for final classifications
+        :param logical_selection_backend: string, ClassifierRegistry backend for active learning selections
         :return: void
         """
+        X_sparse, features, classes, years_tweets_counts = self._create_experiment_matrix(n, analyzer)
+
+        # Workers memory-map the matrix and labels, tasks only carry its name
+        shared_matrix = SharedCSRMatrix.create(X_sparse, classes, features)
+
+        all_processes = []
+        self.all_experiments_results = []
+
+        pool = Pool(cpu_count()-1 or 1)
+        copy_reg.pickle(types.MethodType, self._reduce_method)
+
+        try:
+            if USE_PRECOMPUTED_KERNEL:
+                # Computed once here, workers memory-map it
+                print("Computing gram matrix.")
+                GramMatrix.create_shared(shared_matrix.name, shared_matrix.X_sparse)
+
+            print("Running experiments.")
+            t0 = time.time()
+            for i in range(0, N_EXPERIMENTS):
+                print("Experiment:"+str(i))
+                experiment_manager = ExperimentManager(i, years_tweets_counts, n, analyzer, classification_backend,
+                                                       logical_selection_backend)
+                r = pool.apply_async(experiment_manager.run_experiment_on_shared_matrix, args=(shared_matrix.name,), callback=self._accumulate_experiments_scores)
+                all_processes.append(r)
+
+            for a_process in all_processes:
+                a_process.wait()
+
+            t1 = time.time()
+
+            print("Elapsed time:", t1- t0, " seconds")
+
+            pool.close()
+            pool.join()
+        finally:
+            shared_matrix.unlink()
+
+        print("Cumulating all the experiments' scores.")
+        final_results_from_all_experiments = self.__helper.cumulate_years_scores(self.all_experiments_results)
+        return final_results_from_all_experiments
+
+    def compare_selection_uncertainties(self, n=1, analyzer='word', n_experiments=SELECTION_COMPARISON_EXPERIMENT_COUNT):
+        """
+        Runs line3 with calibrated probabilities and with decision function margins on the same shuffles, then reports
+        how much their chosen samples overlap and how their accuracies and run times differ
+        :param n: int, count n in n-gram
+        :param analyzer: string, either 'word' or 'char'
+        :param n_experiments: int, number of shuffles
+        :return: dict, line3 score key to mean accuracies of both uncertainties and mean jaccard overlap of their samples
+        """
+        X_sparse, features, classes, years_tweets_counts = self._create_experiment_matrix(n, analyzer)
+        gram_matrix = GramMatrix(X_sparse) if USE_PRECOMPUTED_KERNEL else None
+
+        uncertainties = (ExperimentManager.PROBABILITY_UNCERTAINTY, ExperimentManager.MARGIN_UNCERTAINTY)
+        elapsed_times = dict((uncertainty, 0.0) for uncertainty in uncertainties)
+        keys_accuracies = collections.defaultdict(lambda: collections.defaultdict(list))
+        keys_overlaps = collections.defaultdict(list)
+
+        for i in range(0, n_experiments):
+            experiments_selected_rows = {}
+
+            for uncertainty in uncertainties:
+                print("Experiment:" + str(i) + ", uncertainty: " + uncertainty)
+
+                # Same seed gives same shuffles and partitions for both uncertainties
+                np.random.seed(i)
+
+                experiment_manager = ExperimentManager(i, years_tweets_counts, n, analyzer,
+                                                       selection_uncertainty=uncertainty)
+                t0 = time.time()
+                scores = experiment_manager.run_experiment(X_sparse, features, classes, gram_matrix, ['line3'])
+                elapsed_times[uncertainty] += time.time() - t0
+
+                for score_key, score in scores['line3'].iteritems():
+                    keys_accuracies[score_key][uncertainty].append(score)
+
+                experiments_selected_rows[uncertainty] = experiment_manager.get_selected_rows()
+
+            probability_rows, margin_rows = [experiments_selected_rows[uncertainty] for uncertainty in uncertainties]
+            for score_key, rows in probability_rows.iteritems():
+                rows, other_rows = set(rows), set(margin_rows[score_key])
+                keys_overlaps[score_key].append(len(rows & other_rows) / float(len(rows | other_rows) or 1))
+
+        comparison = {}
+        print("Score key | probability accuracy | margin accuracy | samples overlap")
+        for score_key in sorted(keys_accuracies):
+            comparison[score_key] = {
+                'probability': np.mean(keys_accuracies[score_key][ExperimentManager.PROBABILITY_UNCERTAINTY]),
+                'margin': np.mean(keys_accuracies[score_key][ExperimentManager.MARGIN_UNCERTAINTY]),
+                'overlap': np.mean(keys_overlaps[score_key])
+            }
+            print(score_key + " | %.4f | %.4f | %.3f" % (comparison[score_key]['probability'],
+                                                         comparison[score_key]['margin'],
+                                                         comparison[score_key]['overlap']))
+
+        for uncertainty in uncertainties:
+            print("Elapsed time with " + uncertainty + ": " + str(elapsed_times[uncertainty]) + " seconds")
+
+        return comparison
+
+    def compare_classifier_backends(self, n=1, analyzer='word', name_one='svc', name_two='linear_svc'):
+        """
+        Trains two classifier backends on base year's tweets and reports how often they agree on each test year
+        :param n: int, count n in n-gram
+        :param analyzer: string, either 'word' or 'char'
+        :param name_one: string, ClassifierRegistry backend
+        :param name_two: string, ClassifierRegistry backend
+        :return: dict, test year to ratio of tweets predicted the same
+        """
+        X_sparse, features, classes, years_tweets_counts = self._create_experiment_matrix(n, analyzer)
+        classes = np.array(classes)
+
+        # Rows are in years' order of years_tweets_counts, see ExperimentManager._split_dataset_to_years
+        years_rows = {}
+        start_index = 0
+        for year, tweet_count in years_tweets_counts.iteritems():
+            years_rows[year] = slice(start_index, start_index + tweet_count)
+            start_index += tweet_count
+
+        agreements = {}
+        for test_year in TEST_YEARS:
+            agreements[test_year] = ClassifierRegistry.get_agreement(name_one, name_two,
+                                                                     X_sparse[years_rows[BASE_YEAR]],
+                                                                     classes[years_rows[BASE_YEAR]],
+                                                                     X_sparse[years_rows[test_year]])
+            print(name_one + " and " + name_two + " agree on " + str(round(agreements[test_year] * 100, 2)) +
+                  "% of " + test_year + "'s tweets.")
+
+        return agreements
+
+    def _create_experiment_matrix(self, n, analyzer):
+        """
+        Retrieves tweets of all years, preprocesses and vectorizes them once for all experiments
+        :param n: int, count n in n-gram
+        :param analyzer: string, either 'word' or 'char'
+        :return: scipy.sparse.csr_matrix, np.array, list, dict, counts, n-grams, classes and years' tweets counts
+        """
         # Retrieving all tweets from database
         print("Retrieving all tweets from database.")
         tweets_for_all_years = {}
@@ -94,6 +306,12 @@ class Main:
             tweets_for_year = self.__db_manager.get_tweets_for_year(year)
             tweets_for_all_years[year] = tweets_for_year
 
+        # Removing retweets and copy-pasted tweets, so they don't leak between train and test sets
+        class_overrides = {}
+        if NEAR_DUPLICATE_MODE is not None:
+            tweets_for_all_years, class_overrides = self.remove_near_duplicates_and_refill(tweets_for_all_years,
+                                                                                           NEAR_DUPLICATE_MODE)
+
         # Creating a big list of tweets
         print("Creating a big list of tweets.")
         all_tweets = []
@@ -105,6 +323,7 @@ class Main:
         print("Generating document and classes by preprocessing")
         # Preprocessing and generation of document
         document, classes = self.__feature_manager.create_document_and_classes_for_tweets(all_tweets, True)
+        classes = [class_overrides.get(tweet.id, a_class) for tweet, a_class in zip(all_tweets, classes)]
 
         # Getting years' tweets counts
         print("Getting years' tweets counts.")
@@ -112,33 +331,87 @@ class Main:
         for year in self.years:
             years_tweets_counts[year] = len(tweets_for_all_years[year])
 
-        all_processes = []
-        self.all_experiments_results = []
+        # Partitions have fixed sizes, after near-duplicate removal failing here instead of in every experiment
+        ExperimentManager.check_years_tweets_counts(years_tweets_counts)
 
-        pool = Pool(cpu_count()-1 or 1)
-        copy_reg.pickle(types.MethodType, self._reduce_method)
+        # Vectorizing once, experiments only shuffle, partition and classify
+        print("Vectorizing document.")
+        X_sparse, features = self.__feature_manager.vectorize_document(document, n, analyzer, years_tweets_counts)
 
-        print("Running experiments.")
-        t0 = time.time()
-        for i in range(0, N_EXPERIMENTS):
-            print("Experiment:"+str(i))
-            experiment_manager = ExperimentManager(i, years_tweets_counts, n, analyzer)
-            r = pool.apply_async(experiment_manager.run_experiment, args=(document, classes,), callback=self._accumulate_experiments_scores)
-            all_processes.append(r)
+        return X_sparse, features, classes, years_tweets_counts
+
+    def remove_near_duplicates_and_refill(self, tweets_for_all_years, mode):
+        """
+        Removes near-duplicate tweets, then retrieves the next tweets of years left with less than
+        ALE_EACH_YEAR_TWEET_LIMIT_COUNT tweets and removes again, until every year is full or has no more tweets.
+        Experiments' partitions have fixed sizes, so they stay comparable with and without duplicate removal.
+        :param tweets_for_all_years: dict, year to tweets, each year's first ALE_EACH_YEAR_TWEET_LIMIT_COUNT tweets
+        :param mode: string, NearDuplicateDetector.DROP or NearDuplicateDetector.COLLAPSE
+        :return: dict, dict, year to kept tweets and tweet id to class for collapsed clusters
+        """
+        retrieved_tweets_for_all_years = dict((year, list(tweets)) for year, tweets in tweets_for_all_years.iteritems())
+        exhausted_years = set()
 
-        for a_process in all_processes:
-            a_process.wait()
+        while True:
+            reduced_tweets_for_all_years, class_overrides = self.remove_near_duplicates(retrieved_tweets_for_all_years,
+                                                                                        mode)
 
-        t1 = time.time()
+            short_years = [year for year in sorted(reduced_tweets_for_all_years.keys())
+                           if len(reduced_tweets_for_all_years[year]) < ALE_EACH_YEAR_TWEET_LIMIT_COUNT and
+                           year not in exhausted_years]
+            if not short_years:
+                return reduced_tweets_for_all_years, class_overrides
 
-        print("Elapsed time:", t1- t0, " seconds")
+            for year in short_years:
+                missing_count = ALE_EACH_YEAR_TWEET_LIMIT_COUNT - len(reduced_tweets_for_all_years[year])
+                print("Retrieving " + str(missing_count) + " more tweets for year " + year + " to replace duplicates.")
 
-        pool.close()
-        pool.join()
+                # Next tweets in creation order
+                more_tweets = self.__db_manager.get_tweets_for_year(year, missing_count,
+                                                                    len(retrieved_tweets_for_all_years[year]))
+                retrieved_tweets_for_all_years[year] += more_tweets
 
-        print("Cumulating all the experiments' scores.")
-        final_results_from_all_experiments = self.__helper.cumulate_years_scores(self.all_experiments_results)
-        return final_results_from_all_experiments
+                if len(more_tweets) < missing_count:
+                    exhausted_years.add(year)
+
+    def remove_near_duplicates(self, tweets_for_all_years, mode):
+        """
+        Groups near-duplicate tweets of all years into clusters and keeps the earliest tweet of each cluster
+        :param tweets_for_all_years: dict, year to tweets
+        :param mode: string, NearDuplicateDetector.DROP or NearDuplicateDetector.COLLAPSE
+        :return: dict, dict, year to kept tweets and tweet id to class for collapsed clusters
+        """
+        if mode not in (NearDuplicateDetector.DROP, NearDuplicateDetector.COLLAPSE):
+            raise ValueError("Experiments support drop and collapse modes for near-duplicates, not: " + str(mode))
+
+        # Earlier years first, so a cluster is represented by its first appearance
+        years_and_tweets = [(year, tweet) for year in sorted(tweets_for_all_years.keys())
+                            for tweet in tweets_for_all_years[year]]
+
+        print("Finding near-duplicate tweets.")
+        preprocessor = Preprocessor()
+        detector = NearDuplicateDetector()
+        cleaned_texts = list(preprocessor.clean_many(tweet.text for year, tweet in years_and_tweets))
+        cluster_ids = detector.find_clusters(cleaned_texts)
+        detector.print_cluster_report(cluster_ids)
+
+        classes = [tweet.tweet_class for year, tweet in years_and_tweets]
+        kept_indexes, kept_classes, weights = detector.reduce(cluster_ids, classes, mode)
+
+        reduced_tweets_for_all_years = dict((year, []) for year in tweets_for_all_years)
+        class_overrides = {}
+        for idx, kept_class in zip(kept_indexes, kept_classes):
+            year, tweet = years_and_tweets[idx]
+            reduced_tweets_for_all_years[year].append(tweet)
+
+            if kept_class != tweet.tweet_class:
+                class_overrides[tweet.id] = kept_class
+
+        for year in sorted(reduced_tweets_for_all_years.keys()):
+            print(year + ": " + str(len(reduced_tweets_for_all_years[year])) + " of " +
+                  str(len(tweets_for_all_years[year])) + " tweets kept.")
+
+        return reduced_tweets_for_all_years, class_overrides
 
     def _reduce_method(self, m):
         """
@@ -247,3 +520,57 @@ class Main:
         :return:
         """
         self.__import_manager.import_new_tweets_from_csv(root_path)
+
+    def export_preprocessed_tweets(self, year='ALL', find_roots=True):
+        """
+        Streams tweets of given year from database, preprocesses them and writes them to a tab separated file. Memory
+        use doesn't grow with the number of tweets.
+        :param year: string, 2012, 2013, 2014, 2015 or ALL
+        :param find_roots: bool, whether or not to find roots of words
+        :return: string, path of generated file
+        """
+        file_path = PROJECT_ROOT_DIRECTORY + DATASET_TXT_DIR_NAME + MODEL_NAME + '_Preprocessed_' + year + '.tsv'
+
+        print("Streaming tweets for year " + year + " to " + file_path)
+        rows = self.__db_manager.iterate_tweet_rows_for_year(year)
+        processed_tweets = self.__feature_manager.iterate_processed_tweets(rows, find_roots)
+
+        written_count = 0
+        with codecs.open(file_path, 'w', encoding='utf-8') as output_file:
+            for tweet_id, processed_text, tweet_class, created_at in processed_tweets:
+                output_file.write(u'\t'.join([unicode(tweet_id), unicode(tweet_class), unicode(created_at),
+                                               processed_text]) + u'\n')
+                written_count += 1
+
+        print(str(written_count) + " tweets written.")
+        return file_path
+
+    def benchmark_cleaning_engine(self, year='ALL', repeat=3):
+        """
+        Compares single scan cleaning engine with step by step cleaning on tweets of given year
+        :param year: string, 2012, 2013, 2014, 2015 or ALL
+        :param repeat: int, number of runs, best run is reported
+        :return: dict, elapsed seconds of both methods and number of differing tweets
+        """
+        preprocessor = Preprocessor()
+        texts = [tweet.text for tweet in self.__db_manager.get_tweets_for_year(year)]
+
+        print("Benchmarking cleaning of " + str(len(texts)) + " tweets.")
+        results = {}
+        for method_name, clean in [('step_by_step', lambda: [preprocessor.clean_all_step_by_step(text) for text in texts]),
+                                   ('engine', lambda: list(preprocessor.clean_many(texts)))]:
+            elapsed_times = []
+            for _ in range(repeat):
+                t0 = time.time()
+                results[method_name + '_result'] = clean()
+                elapsed_times.append(time.time() - t0)
+
+            results[method_name] = min(elapsed_times)
+            print(method_name + ": " + str(results[method_name]) + " seconds")
+
+        step_by_step_result = results.pop('step_by_step_result')
+        engine_result = results.pop('engine_result')
+        results['mismatches'] = sum(1 for a, b in zip(step_by_step_result, engine_result) if a != b)
+        print("Differing tweets: " + str(results['mismatches']))
+
+        return results
@@ -16,7 +16,7 @@ class PlotManager:
     def __init__(self):
         self.__first_year = 2012
         self.__helper = GeneralHelpers()
-        self.__colors = ['r', 'b', 'y', 'm', 'g', 'c', 'k']
+        self.__colors = ['r', 'b', 'y', 'm', 'g', 'c', 'k', '#ff7f0e', '#8c564b']
         self.__years = ('2012', '2013', '2014', '2015')
         self.__regexp_for_predict_lines = "\d{1,}\s{1,}\d{1}:\w{1,8}.{1,}"
 
@@ -186,6 +186,8 @@ class PlotManager:
             'line3L1':'LINE3-kMEANS CLUSTERING',
             'line3L2':'LINE3-kMEANS CLUSTERING(probabilities)',
             'line3L3':'LINE3-MultinomialNB DB Iterative Approach',
+            'line3L4':'LINE3-Density Weighted DB',
+            'line3L5':'LINE3-Greedy k-CENTER',
             'line4':'LINE4'
         }
         # -(2012-500)/(YEAR-300)
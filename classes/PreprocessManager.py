@@ -1,9 +1,14 @@
 # -*- coding: utf-8 -*-
 
 import json
+import hashlib
+import inspect
 from config import *
+from multiprocessing.pool import ThreadPool
 from helpers.Preprocessor import Preprocessor
+from helpers.CleaningEngine import CleaningEngine
 from helpers.GeneralHelpers import GeneralHelpers
+from helpers.KeywordMatcher import KeywordMatcher
 
 
 class PreprocessManager(Preprocessor):
@@ -14,6 +19,7 @@ class PreprocessManager(Preprocessor):
         self.__root_cache = self.__helper.load_roots_cache()
         self.__suggestion_cache = self.__helper.load_suggestion_cache()
         self.__dictionaries_directory = PROJECT_ROOT_DIRECTORY + DICTIONARIES_DIR_NAME
+        self.__keyword_matcher = KeywordMatcher.get_shared(SPECIAL_KEYWORDS)
 
     def remove_characters_in_string(self, text, characters=[]):
         """
@@ -44,7 +50,7 @@ class PreprocessManager(Preprocessor):
                 self.__suggestion_cache[word] = corrected_word
                 return corrected_word
         else:
-            self.__suggestion_cache[word] = special_keyword
+            self.__suggestion_cache.set_override(word, special_keyword)
             return special_keyword
 
 
@@ -64,9 +70,113 @@ class PreprocessManager(Preprocessor):
                 self.__root_cache[word] = root_of_word
                 return root_of_word
         else:
-            self.__root_cache[word] = special_keyword
+            self.__root_cache.set_override(word, special_keyword)
             return special_keyword
 
+    def resolve_suggestions(self, words):
+        """
+        Resolves suggestions of all given words at once, only the words missing in cache are asked to zemberek
+        :param words: iterable, unique words
+        :return: dict, word to suggestion
+        """
+        return self._resolve_words(words, self.__suggestion_cache, 'correct_misspelling_from_zemberek')
+
+    def resolve_roots(self, words):
+        """
+        Resolves roots of all given words at once, only the words missing in cache are asked to zemberek
+        :param words: iterable, unique words
+        :return: dict, word to root
+        """
+        return self._resolve_words(words, self.__root_cache, 'find_root_from_zemberek')
+
+    def _resolve_words(self, words, cache, zemberek_method_name):
+        """
+        Fills the cache for given words and returns their resolutions. Missing words are asked to zemberek in chunks
+        by threads of this process, sharing its zemberek workers. Zemberek calls wait on the JVMs, not on this process,
+        so worker processes would only start more JVMs, each loading the whole lexicon.
+        :param words: iterable, unique words
+        :param cache: dict, suggestion or root cache
+        :param zemberek_method_name: string, GeneralHelpers method which makes the zemberek call for a word
+        :return: dict
+        """
+        resolutions = {}
+        missing_words = []
+
+        words = list(words)
+        special_keywords = self.__keyword_matcher.match_many(words)
+
+        for word, special_keyword in zip(words, special_keywords):
+            if special_keyword is not None:
+                cache.set_override(word, special_keyword)
+                resolutions[word] = special_keyword
+            elif word in cache:
+                resolutions[word] = cache[word]
+            else:
+                missing_words.append(word)
+
+        if len(missing_words):
+            print("Asking " + str(len(missing_words)) + " words to zemberek.")
+
+            chunks = self.__helper.get_chunks_of_list(missing_words, PREPROCESS_ZEMBEREK_CHUNK_SIZE)
+
+            # Merging each chunk's entries as soon as it's done, so a crash loses only the chunk in progress
+            for chunk in chunks:
+                new_entries = ask_zemberek(self.__helper, zemberek_method_name, chunk)
+                cache.update(new_entries)
+                resolutions.update(new_entries)
+
+        return resolutions
+
+    def clean_and_split_many(self, texts, process_pool=None):
+        """
+        Cleans given texts and splits them into words
+        :param texts: list, texts of tweets
+        :param process_pool: multiprocessing.Pool, initialized with initialize_preprocess_worker, None to clean in this process
+        :return: list, words of each text in the same order
+        """
+        if process_pool is None:
+            return [cleaned_text.split(" ") for cleaned_text in self.clean_many(texts)]
+
+        words_of_texts = []
+        chunks = self.__helper.get_chunks_of_list(texts, PREPROCESS_CHUNK_SIZE)
+        for words_of_chunk in process_pool.imap(_clean_and_split_in_worker, chunks):
+            words_of_texts += words_of_chunk
+
+        return words_of_texts
+
+    def get_pipeline_fingerprint(self, find_roots):
+        """
+        Returns a hash of everything a preprocessed tweet depends on except its text: root finding, special keywords,
+        cleaning patterns, cleaning code and keyword, root and suggestion resolution code. It changes when any of them
+        changes.
+        :param find_roots: bool
+        :return: string
+        """
+        fingerprint_parts = [str(PREPROCESS_PIPELINE_VERSION), str(bool(find_roots)), json.dumps(SPECIAL_KEYWORDS),
+                             self.regexpForURLs, self.pattern1]
+
+        try:
+            fingerprint_parts += [inspect.getsource(Preprocessor), inspect.getsource(CleaningEngine),
+                                  inspect.getsource(PreprocessManager), inspect.getsource(KeywordMatcher)]
+        except (IOError, TypeError):
+            # Source files are not available, only PREPROCESS_PIPELINE_VERSION tracks the cleaning code
+            pass
+
+        return hashlib.sha1('\n'.join(fingerprint_parts)).hexdigest()
+
+    def get_document_cache_key(self, tweet_id, text, pipeline_fingerprint):
+        """
+        Returns document cache key of a tweet, it changes when tweet's text or the pipeline changes
+        :param tweet_id: string
+        :param text: string, raw text of tweet
+        :param pipeline_fingerprint: string, see get_pipeline_fingerprint
+        :return: string
+        """
+        if isinstance(text, unicode):
+            text = text.encode('utf-8')
+
+        return u'\t'.join([unicode(tweet_id), hashlib.sha1(text).hexdigest(), pipeline_fingerprint])
+
     def save_caches(self):
         """
         Saves suggestion and root finding caches' changes
@@ -77,16 +187,56 @@ class PreprocessManager(Preprocessor):
 
     def _has_special_keyword(self, word):
         """
-        If model name is present in the word, returns the model name
+        If model name is present in the word, returns the model name. If many special keywords are present, the last
+        one in SPECIAL_KEYWORDS wins.
         :param word: string, word
         :return: bool, string
         """
-        has_special_keyword = False
-        special_keyword = ""
+        special_keyword = self.__keyword_matcher.match(word)
+
+        if special_keyword is None:
+            return False, ""
+        return True, special_keyword
+
+
+def ask_zemberek(helper, zemberek_method_name, words):
+    """
+    Asks given words to zemberek, one thread per zemberek worker
+    :param helper: GeneralHelpers
+    :param zemberek_method_name: string, find_root_from_zemberek or correct_misspelling_from_zemberek
+    :param words: list, words
+    :return: dict, word to zemberek's answer
+    """
+    zemberek_call = getattr(helper, zemberek_method_name)
+    thread_pool = ThreadPool(ZEMBEREK_WORKER_POOL_SIZE)
+
+    try:
+        return dict(zip(words, thread_pool.map(zemberek_call, words)))
+    finally:
+        thread_pool.close()
+        thread_pool.join()
+
+
+# Preprocessor of a worker process, set by initialize_preprocess_worker
+_worker_preprocessor = None
+
+
+def initialize_preprocess_worker():
+    """
+    Initializer of parallel preprocessing's worker processes. Workers only clean texts, they don't touch the caches or
+    zemberek, the parent process owns them.
+    :return: void
+    """
+    global _worker_preprocessor
+
+    _worker_preprocessor = Preprocessor()
+
 
-        for keyword in SPECIAL_KEYWORDS:
-            if keyword.lower() in word.lower():
-                has_special_keyword = True
-                special_keyword = keyword
+def _clean_and_split_in_worker(texts):
+    """
+    Cleans a chunk of texts in a worker process
+    :param texts: list
+    :return: list, words of each text
+    """
+    return [cleaned_text.split(" ") for cleaned_text in _worker_preprocessor.clean_many(texts)]
 
-        return has_special_keyword, special_keyword
\ No newline at end of file
@@ -10,19 +10,57 @@ CHARTS_DIR_NAME = "/Charts/"
 DATASET_CSV_DIR_NAME = "/DataSet-CSV/"
 DATASET_TXT_DIR_NAME = "/DataSet-TXT/"
 DATASET_ARFF_DIR_NAME = "/DataSet-ARFF/"
+DATASET_BINARY_DIR_NAME = "/DataSet-Binary/"
 DATASET_LOGS_DIR_NAME = "/DataSet-Logs/"
 DICTIONARIES_DIR_NAME = "/Dictionaries/"
 
 ROOTS_CACHE_FILE_NAME = "roots.json"
 SUGGESTION_CACHE_FILE_NAME = "suggestions.json"
+ROOTS_CACHE_LOG_FILE_NAME = "roots.jsonl"
+SUGGESTION_CACHE_LOG_FILE_NAME = "suggestions.jsonl"
+CACHE_COMPACTION_RATIO = 2 # log is compacted when it has this many times more lines than entries
+CACHE_COMPACTION_MIN_LINES = 1000
+LEXICON_CACHE_FILE_NAME = "lexicon.jsonl" # shared by all brands, under DICTIONARIES_DIR_NAME
+DOCUMENT_CACHE_FILE_NAME = "documents.jsonl" # preprocessed tweets, under model's dictionary directory
+USE_DOCUMENT_CACHE = True
+PREPROCESS_PIPELINE_VERSION = 1 # increase to invalidate preprocessed tweets when preprocessing changes outside cleaning code
 
 ZEMBEREK_ROOT_FINDER_JAR_FILE_NAME = "ZemberekWordStemFinder.jar"
 ZEMBEREK_SUGGESTION_FINDER_JAR_FILE_NAME = "ZemberekSuggestionFinder.jar"
 
+#ZEMBEREK WORKER POOL CONSTANTS
+USE_ZEMBEREK_WORKER_POOL = True # False falls back to one java call per word
+ZEMBEREK_WORKER_SOURCE_FILE_NAME = "src/ZemberekWorker.java"
+ZEMBEREK_WORKER_LIB_DIR_NAME = "lib/"
+ZEMBEREK_WORKER_POOL_SIZE = 2 # worker processes per jar
+ZEMBEREK_WORKER_REQUEST_TIMEOUT = 10 # seconds
+ZEMBEREK_WORKER_STARTUP_TIMEOUT = 60 # seconds, JVM start and source compilation
+ZEMBEREK_WORKER_HEALTH_CHECK_INTERVAL = 60 # seconds, idle workers are pinged after this
+ZEMBEREK_WORKER_MAX_RETRIES = 2
+
+#PARALLEL PREPROCESSING CONSTANTS
+PREPROCESS_N_JOBS = 0 # worker processes, 0 uses all cores, 1 preprocesses in the main process
+PREPROCESS_CHUNK_SIZE = 2000 # tweets per cleaning task
+PREPROCESS_ZEMBEREK_CHUNK_SIZE = 200 # words asked to zemberek between cache updates
+PREPROCESS_MIN_TWEETS_FOR_PARALLEL = 10000 # smaller corpora are preprocessed in the main process
+PREPROCESS_STREAM_BUFFER_SIZE = 5000 # tweets preprocessed together by the streaming api
+PREPROCESS_STREAM_CHECKPOINT_INTERVAL = 50000 # tweets between cache saves of the streaming api
+DB_STREAM_BATCH_SIZE = 1000 # rows fetched at once from a server-side cursor
+
+#NEAR-DUPLICATE DETECTION CONSTANTS
+NEAR_DUPLICATE_MODE = None # None, 'drop' or 'collapse' for experiments; NearDuplicateDetector also supports 'weight'
+NEAR_DUPLICATE_THRESHOLD = 0.8 # estimated jaccard similarity of cleaned texts' shingles
+MINHASH_PERMUTATION_COUNT = 64
+MINHASH_BAND_COUNT = 16 # 4 rows per band
+MINHASH_SHINGLE_SIZE = 4 # characters
+
 ARFF_FILE_RELATION = "Ngrams"
 ARFF_FILE_EXTENSION = ".arff"
 ARFF_FILE_TWEET_Y_NAME = "sentiment"
 ARFF_FILE_DESCRIPTION = "Ngrams of Tweets"
+ARFF_COMPRESS = False # gzip exported arff files, weka reads .arff.gz
+ARFF_WRITE_CHUNK_SIZE = 1000 # rows written at once by the sparse arff writer
+BINARY_DATASET_EXTENSION = ".dataset" # directory of memory-mappable arrays, see BinaryDataset
 
 LOGS_YEARS_ITSELF_DIR_NAME = "/YearsOnly/"
 LOGS_2012_VS_REST = "/2012vsREST/"
@@ -34,6 +72,14 @@ TWITTER_ACCESS_TOKEN_SECRET = ""
 
 FEATURE_TYPE = "Word" # or #3Gram
 
+# Vocabulary pruning per analyzer. min_df/max_df: document count if int, ratio of documents if float.
+# max_features: most frequent n-grams to keep, None keeps all. min_df_per_year: document count needed in at least one
+# year, 0 disables.
+VOCABULARY_PRUNING = {
+    'word': {'min_df': 1, 'max_df': 1.0, 'max_features': None, 'min_df_per_year': 0},
+    'char': {'min_df': 1, 'max_df': 1.0, 'max_features': None, 'min_df_per_year': 0}
+}
+
 SPECIAL_KEYWORDS = ['TTNet', 'Turkcell', '3G'] # TODO
 
 LINES_DIR_DICT = {
@@ -70,10 +116,31 @@ NOT_INCLUDE_YEARS_TWEETS = '-999'
 LINE3_CHOOSING_SAMPLES_SIZE = 10
 LINE2_RANDOM_ITERATION_NUMBER = 10
 TEST_YEARS = ('2013', '2014', '2015')
-ALE_LINE3_KEYS = ["L0", "L1", "L2", "L3"]
-LINE3_CHOOSING_SAMPLES_ITERATION_COUNT = 5
+ALE_LINE3_KEYS = ["L0", "L1", "L2", "L3", "L4", "L5"]
+LINE3_CHOOSING_SAMPLES_ITERATION_COUNT = 5 # many small iterations are cheap with sgd or nb, they are updated with partial_fit
 PLOT_DECISION_BOUNDARIES_FOR_LINE_3 = False
 SENTIMENT_CLASSES = ["positive", "negative", "neutral"]
+SHARED_MATRIX_DIRECTORY = "/dev/shm" # memory file system for matrices shared with experiment processes, temp dir if missing
+CLASSIFICATION_BACKEND = 'svc' # see ClassifierRegistry: svc, linear_svc, sgd, logistic, rf, gbm, nb, xgb
+LOGICAL_SELECTION_BACKEND = 'svc' # backend of active learning selections
+SELECTION_UNCERTAINTY = 'probability' # 'probability' (calibrated) or 'margin' (decision_function, no calibration)
+SELECTION_STRATEGY = 'std' # UncertaintySampler strategy ranking probabilities: std, margin, least_confidence, entropy
+SELECTION_COMPARISON_EXPERIMENT_COUNT = 5 # shuffles compared by Main.compare_selection_uncertainties
+CLUSTERING_ALGORITHM = 'kmeans' # clustering of active learning methods II and III, 'kmeans' or 'minibatch'
+CLUSTERING_N_INIT = 10 # k-means++ restarts
+CLUSTERING_MINIBATCH_SIZE = 100
+CLUSTERING_SVD_COMPONENTS = 0 # method II clusters a TruncatedSVD projection of this many components, 0 clusters n-grams
+CLASSIFIER_N_JOBS = 1 # experiments already run in parallel processes
+USE_PRECOMPUTED_KERNEL = False # SVC fits on submatrices of the corpus gram matrix instead of evaluating its kernel
+GRAM_BLOCK_SIZE = 1000 # gram matrix is computed lazily in blocks of this many rows and columns
+LSH_TABLE_COUNT = 16 # random projection hash tables of find_most_distinct_n_samples
+LSH_HASH_SIZE = 6 # hyperplanes of a table, a bucket has about n_samples / 2^LSH_HASH_SIZE base year samples
+LSH_MAX_BUCKET_CANDIDATES = 100 # a query is compared to at most this many samples of a bucket, e.g. of a retweet cluster
+DENSITY_NEIGHBOUR_COUNT = 10 # active learning method V weights uncertainty by mean similarity to this many neighbours
+DENSITY_WEIGHT_BETA = 1.0 # 0 is pure uncertainty
+DENSITY_BLOCK_SIZE = 1000 # pool rows multiplied with the pool at once
+KCENTER_FEATURES = 'features' # active learning method VI picks k-centers of 'features' (projection if CLUSTERING_SVD_COMPONENTS) or 'probabilities'
+KCENTER_BLOCK_SIZE = 1000 # train set rows compared with the pool at once
 
 if "TurkcellMerged" == MODEL_NAME:
     RANDOM_SAMPLE_SIZE = 400 # OR 50
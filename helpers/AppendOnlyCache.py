@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import fcntl
+
+from config import *
+
+
+class AppendOnlyCache:
+    """
+    A dict-like cache which is stored in an append-only log file. Every new entry is written to the log as soon as it's
+    set, so a crash loses nothing but the entry being written. The log is compacted when it grows too much.
+    Log format is one json list per line: ["key", "value"]
+
+    Many processes can use the same log at the same time. Appends and compaction are made under an exclusive lock on
+    a sidecar lock file, and lines appended by other processes are read when a key is missing.
+
+    A key filter drops entries which aren't valid anymore, e.g. of an old pipeline, they're left out of the log when
+    it's compacted.
+    """
+
+    def __init__(self, file_path, legacy_json_file_path=None):
+        """
+        Constructor method
+        :param file_path: string, path of the log file
+        :param legacy_json_file_path: string, path of a whole-dict json file to migrate from, if log does not exist
+        :return: AppendOnlyCache
+        """
+        self.file_path = file_path
+        self.__entries = {}
+        self.__log_line_count = 0
+        self.__log_file = None
+        self.__read_offset = 0
+        self.__read_inode = None
+        self.__keep_key = None
+
+        directory = os.path.dirname(file_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.__lock_file = open(file_path + '.lock', 'a')
+
+        with self._locked():
+            if os.path.isfile(file_path):
+                self._read_new_lines()
+            elif legacy_json_file_path is not None and os.path.isfile(legacy_json_file_path):
+                self._load_legacy_json(legacy_json_file_path)
+
+            self.compact_if_necessary()
+
+    def __contains__(self, key):
+        if key in self.__entries:
+            return True
+
+        # Another process may have resolved it
+        self.refresh()
+        return key in self.__entries
+
+    def __getitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        return self.__entries[key]
+
+    def __setitem__(self, key, value):
+        """
+        Sets the entry and appends it to the log if it's new or changed
+        :param key: string
+        :param value: string
+        :return: void
+        """
+        self.update({key: value})
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def get(self, key, default=None):
+        if key in self:
+            return self.__entries[key]
+        return default
+
+    def peek(self, key, default=None):
+        """
+        Returns an entry without reading the lines appended by other processes, for keys which are missing most of
+        the time
+        :param key: string
+        :param default: string
+        :return: string
+        """
+        return self.__entries.get(key, default)
+
+    def iteritems(self):
+        return self.__entries.iteritems()
+
+    def update(self, entries):
+        """
+        Sets many entries with one write to the log
+        :param entries: dict
+        :return: void
+        """
+        changed_entries = [(key, value) for key, value in entries.iteritems()
+                           if not (key in self.__entries and self.__entries[key] == value)]
+
+        if len(changed_entries):
+            self.__entries.update(changed_entries)
+
+            with self._locked():
+                self._append_lines(changed_entries)
+                self.compact_if_necessary()
+
+    def set_key_filter(self, keep_key):
+        """
+        Drops entries whose keys don't pass the filter, now and when other processes' lines are read. Dropped lines
+        still count as log lines, so the log is compacted without them once they're too many.
+        :param keep_key: function, key to bool
+        :return: void
+        """
+        self.__keep_key = keep_key
+
+        with self._locked():
+            self._read_new_lines()
+            self.__entries = dict((key, value) for key, value in self.__entries.iteritems() if keep_key(key))
+            self.compact_if_necessary()
+
+    def refresh(self):
+        """
+        Reads the lines appended by other processes since the last read
+        :return: void
+        """
+        try:
+            log_stat = os.stat(self.file_path)
+        except OSError:
+            return
+
+        if log_stat.st_ino != self.__read_inode or log_stat.st_size > self.__read_offset:
+            with self._locked():
+                self._read_new_lines()
+
+    def save(self):
+        """
+        Makes sure everything is on disk
+        :return: void
+        """
+        if self.__log_file is not None:
+            self.__log_file.flush()
+            os.fsync(self.__log_file.fileno())
+
+        with self._locked():
+            self.compact_if_necessary()
+
+    def close(self):
+        """
+        Closes the log file
+        :return: void
+        """
+        if self.__log_file is not None:
+            self.__log_file.close()
+            self.__log_file = None
+
+    def compact_if_necessary(self):
+        """
+        Compacts the log when it has too many overwritten entries, lock must be held
+        :return: void
+        """
+        if self.__log_line_count > max(CACHE_COMPACTION_MIN_LINES, CACHE_COMPACTION_RATIO * len(self.__entries)):
+            self.compact()
+
+    def compact(self):
+        """
+        Rewrites the log with one line per entry, lock must be held. New log is written to a temporary file and renamed
+        over the old one, so a crash during compaction leaves the old log intact.
+        :return: void
+        """
+        self.close()
+
+        # Not to drop other processes' entries
+        self._read_new_lines()
+
+        temporary_file_path = self.file_path + '.tmp'
+        with open(temporary_file_path, 'w') as temporary_file:
+            for key, value in self.__entries.iteritems():
+                temporary_file.write(self._format_line(key, value))
+            temporary_file.flush()
+            os.fsync(temporary_file.fileno())
+
+        os.rename(temporary_file_path, self.file_path)
+
+        log_stat = os.stat(self.file_path)
+        self.__read_inode = log_stat.st_ino
+        self.__read_offset = log_stat.st_size
+        self.__log_line_count = len(self.__entries)
+
+    def _locked(self):
+        """
+        Returns a context manager which holds the exclusive lock of the log
+        :return: _FileLock
+        """
+        return _FileLock(self.__lock_file)
+
+    def _append_lines(self, entries):
+        """
+        Appends entries to the log, lock must be held
+        :param entries: list, (key, value) tuples
+        :return: void
+        """
+        # Catching up with other processes, so our own lines are not read back later
+        self._read_new_lines()
+
+        # Log may have been compacted (replaced) by another process
+        if self.__log_file is not None and os.fstat(self.__log_file.fileno()).st_ino != self.__read_inode:
+            self.close()
+
+        if self.__log_file is None:
+            self.__log_file = open(self.file_path, 'a')
+
+        self.__log_file.write(''.join([self._format_line(key, value) for key, value in entries]))
+        self.__log_file.flush()
+
+        log_stat = os.fstat(self.__log_file.fileno())
+        self.__read_inode = log_stat.st_ino
+        self.__read_offset = log_stat.st_size
+        self.__log_line_count += len(entries)
+
+    def _format_line(self, key, value):
+        """
+        Formats a log line
+        :param key: string
+        :param value: string
+        :return: string
+        """
+        return json.dumps([key, value]) + '\n'
+
+    def _read_new_lines(self):
+        """
+        Replays the log from the last read offset, or from the beginning if the log was replaced. Later lines override
+        earlier ones. A broken line (crash while writing) is skipped. Lock must be held.
+        :return: void
+        """
+        if not os.path.isfile(self.file_path):
+            return
+
+        has_broken_lines = False
+
+        with open(self.file_path, 'r') as log_file:
+            log_inode = os.fstat(log_file.fileno()).st_ino
+
+            if log_inode != self.__read_inode or os.fstat(log_file.fileno()).st_size < self.__read_offset:
+                self.__read_inode = log_inode
+                self.__read_offset = 0
+                self.__log_line_count = 0
+
+            log_file.seek(self.__read_offset)
+            new_content = log_file.read()
+            self.__read_offset += len(new_content)
+
+        for line in new_content.splitlines():
+            try:
+                key, value = json.loads(line)
+            except ValueError:
+                print("Skipping broken line in cache log " + self.file_path)
+                has_broken_lines = True
+                continue
+
+            self.__log_line_count += 1
+            if self.__keep_key is None or self.__keep_key(key):
+                self.__entries[key] = value
+
+        # New lines must not be appended to a broken one
+        if has_broken_lines:
+            self.compact()
+
+    def _load_legacy_json(self, legacy_json_file_path):
+        """
+        Migrates a whole-dict json cache file to the log, lock must be held
+        :param legacy_json_file_path: string
+        :return: void
+        """
+        with open(legacy_json_file_path, 'r') as legacy_file:
+            self.__entries = json.load(legacy_file)
+
+        print("Migrating " + str(len(self.__entries)) + " entries from " + legacy_json_file_path)
+        self.compact()
+
+
+class _FileLock:
+    """
+    Exclusive advisory lock on an open file, usable with the with statement
+    """
+
+    def __init__(self, lock_file):
+        self.__lock_file = lock_file
+
+    def __enter__(self):
+        fcntl.flock(self.__lock_file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        fcntl.flock(self.__lock_file.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import gzip
+import arff
+import shutil
+import tempfile
+import numpy as np
+
+from config import *
+from array import array
+from scipy import sparse
+
+
+class BinaryDataset:
+    """
+    A dataset stored as a directory of .npy files and a meta.json: csr arrays of n-gram counts, n-gram names, class
+    codes, tweet ids and creation times. Loading memory-maps the arrays, so it takes milliseconds regardless of the
+    dataset's size and pages are read only when they are used.
+    """
+
+    FORMAT_VERSION = 1
+
+    __ARRAY_NAMES = ('data', 'indices', 'indptr', 'features', 'class_codes', 'tweet_ids', 'created_ats')
+
+    def __init__(self, path, X_sparse, features, class_codes, class_names, tweet_ids, created_ats):
+        """
+        Constructor method, use save, load or convert_arff
+        :param path: string, directory of the dataset
+        :param X_sparse: scipy.sparse.csr_matrix, n-gram counts
+        :param features: np.array, n-grams
+        :param class_codes: np.array, int8, index of each row's class in class_names
+        :param class_names: list, possible classes
+        :param tweet_ids: np.array, unicode
+        :param created_ats: np.array, datetime64[s], NaT if unknown
+        :return: BinaryDataset
+        """
+        self.path = path
+        self.X_sparse = X_sparse
+        self.features = features
+        self.class_codes = class_codes
+        self.class_names = class_names
+        self.tweet_ids = tweet_ids
+        self.created_ats = created_ats
+
+    @classmethod
+    def save(cls, path, X_sparse, features, classes, tweet_ids=None, created_ats=None, class_names=SENTIMENT_CLASSES):
+        """
+        Writes a dataset to a new directory. Files are written to a temporary directory first, so a dataset is either
+        complete or missing.
+        :param path: string, directory of the dataset, must not exist
+        :param X_sparse: scipy.sparse matrix, n-gram counts
+        :param features: list or np.array, n-grams
+        :param classes: list, class of each row
+        :param tweet_ids: list, id of each row, empty if None
+        :param created_ats: list, datetime of each row, NaT if None
+        :param class_names: list, possible classes
+        :return: BinaryDataset
+        """
+        X_sparse = sparse.csr_matrix(X_sparse)
+        row_count = X_sparse.shape[0]
+
+        class_indexes = dict((class_name, code) for code, class_name in enumerate(class_names))
+        class_codes = np.array([class_indexes[a_class] for a_class in classes], dtype=np.int8)
+
+        if tweet_ids is None:
+            tweet_ids = [u''] * row_count
+        if created_ats is None:
+            created_ats = [None] * row_count
+
+        arrays = {
+            'data': X_sparse.data,
+            'indices': X_sparse.indices,
+            'indptr': X_sparse.indptr,
+            'features': np.array([unicode(feature) for feature in features], dtype=np.unicode_),
+            'class_codes': class_codes,
+            'tweet_ids': np.array([unicode(tweet_id) for tweet_id in tweet_ids], dtype=np.unicode_),
+            'created_ats': np.array(created_ats, dtype='datetime64[s]')
+        }
+
+        for array_name in ('class_codes', 'tweet_ids', 'created_ats'):
+            if len(arrays[array_name]) != row_count:
+                raise ValueError(array_name + " must have one value for each row.")
+
+        parent_directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(parent_directory):
+            os.makedirs(parent_directory)
+
+        temporary_path = tempfile.mkdtemp(prefix='.binary_dataset_', dir=parent_directory)
+        try:
+            for array_name, an_array in arrays.iteritems():
+                np.save(os.path.join(temporary_path, array_name + '.npy'), an_array)
+
+            meta = {
+                'format_version': cls.FORMAT_VERSION,
+                'shape': X_sparse.shape,
+                'class_names': list(class_names)
+            }
+            with open(os.path.join(temporary_path, 'meta.json'), 'w') as meta_file:
+                json.dump(meta, meta_file)
+
+            os.rename(temporary_path, path)
+        except:
+            shutil.rmtree(temporary_path, ignore_errors=True)
+            raise
+
+        return BinaryDataset(path, X_sparse, arrays['features'], class_codes, list(class_names), arrays['tweet_ids'],
+                             arrays['created_ats'])
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Loads a dataset, arrays are memory-mapped read-only unless mmap is False
+        :param path: string, directory of the dataset
+        :param mmap: bool, whether or not to memory-map the arrays instead of reading them
+        :return: BinaryDataset
+        """
+        with open(os.path.join(path, 'meta.json'), 'r') as meta_file:
+            meta = json.load(meta_file)
+
+        if meta['format_version'] != cls.FORMAT_VERSION:
+            raise ValueError("Unsupported binary dataset format version: " + str(meta['format_version']))
+
+        mmap_mode = 'r' if mmap else None
+        arrays = dict((array_name, np.load(os.path.join(path, array_name + '.npy'), mmap_mode=mmap_mode))
+                      for array_name in cls.__ARRAY_NAMES)
+
+        X_sparse = sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                                     shape=tuple(meta['shape']), copy=False)
+
+        # Json gives unicode, classes must stay the same type with SENTIMENT_CLASSES for LabelEncoder
+        class_names = [class_name.encode('utf-8') for class_name in meta['class_names']]
+
+        return BinaryDataset(path, X_sparse, arrays['features'], arrays['class_codes'], class_names,
+                             arrays['tweet_ids'], arrays['created_ats'])
+
+    @classmethod
+    def convert_arff(cls, arff_file_path, path, class_attribute_name=ARFF_FILE_TWEET_Y_NAME):
+        """
+        Converts an arff or arff.gz file in dense or sparse format to a binary dataset. Rows are read one by one, so a
+        dense file is never held in memory. Arff files have no tweet ids and creation times, they are left empty.
+        :param arff_file_path: string
+        :param path: string, directory of the dataset, must not exist
+        :param class_attribute_name: string, nominal attribute of classes
+        :return: BinaryDataset
+        """
+        is_sparse = cls._is_sparse_arff(arff_file_path)
+
+        with cls._open_arff(arff_file_path) as arff_file:
+            return_type = arff.LOD_GEN if is_sparse else arff.DENSE_GEN
+            decoded_arff = arff.load(arff_file, return_type=return_type)
+
+            attributes = decoded_arff['attributes']
+            attribute_names = [attribute_name for attribute_name, attribute_type in attributes]
+            class_index = attribute_names.index(class_attribute_name)
+
+            # Classes of the arff are kept in their declaration order
+            class_names = [class_name.encode('utf-8') for class_name in attributes[class_index][1]]
+
+            # Omitted values are zero in sparse arff, the first declared value for nominal attributes
+            omitted_class = class_names[0]
+
+            # Feature columns, without the class column
+            column_indexes = np.array([idx for idx in range(len(attributes)) if idx != class_index])
+            feature_indexes = np.full(len(attributes), -1, dtype=np.int64)
+            feature_indexes[column_indexes] = np.arange(len(column_indexes))
+
+            data = array('d')
+            indices = array('i')
+            indptr = array('i', [0])
+            classes = []
+
+            for row in decoded_arff['data']:
+                if is_sparse:
+                    a_class = row.get(class_index, omitted_class)
+                    row_items = sorted(item for item in row.iteritems() if item[0] != class_index)
+                else:
+                    a_class = row[class_index]
+                    row_items = [(idx, value) for idx, value in enumerate(row) if idx != class_index]
+
+                for column_index, value in row_items:
+                    if value:
+                        indices.append(feature_indexes[column_index])
+                        data.append(value)
+
+                indptr.append(len(indices))
+                classes.append(a_class.encode('utf-8') if isinstance(a_class, unicode) else a_class)
+
+        data = np.frombuffer(data, dtype=np.float64)
+        X_sparse = sparse.csr_matrix((cls._get_compact_data(data), np.frombuffer(indices, dtype=np.int32),
+                                      np.frombuffer(indptr, dtype=np.int32)),
+                                     shape=(len(indptr) - 1, len(column_indexes)))
+
+        features = [attribute_names[idx] for idx in column_indexes]
+        return cls.save(path, X_sparse, features, classes, class_names=class_names)
+
+    def get_classes(self):
+        """
+        Returns classes of rows
+        :return: list
+        """
+        return [self.class_names[code] for code in self.class_codes]
+
+    @classmethod
+    def _get_compact_data(cls, data):
+        """
+        Casts counts to the smallest integer dtype which holds them, non-integer values stay float
+        :param data: np.array, float64
+        :return: np.array
+        """
+        if len(data) and not np.array_equal(data, np.floor(data)):
+            return data
+
+        for dtype in (np.uint16, np.int32):
+            if not len(data) or (data.min() >= np.iinfo(dtype).min and data.max() <= np.iinfo(dtype).max):
+                return data.astype(dtype)
+
+        return data
+
+    @classmethod
+    def _open_arff(cls, arff_file_path):
+        """
+        Opens an arff file, gzipped if it ends with .gz
+        :param arff_file_path: string
+        :return: file, lines are unicode
+        """
+        if arff_file_path.endswith('.gz'):
+            return _UnicodeLines(gzip.open(arff_file_path, 'rb'))
+        return _UnicodeLines(open(arff_file_path, 'rb'))
+
+    @classmethod
+    def _is_sparse_arff(cls, arff_file_path):
+        """
+        Checks if the first data row of an arff file is in sparse format
+        :param arff_file_path: string
+        :return: bool
+        """
+        with cls._open_arff(arff_file_path) as arff_file:
+            is_data_section = False
+            for line in arff_file:
+                line = line.strip()
+                if not line or line.startswith(u'%'):
+                    continue
+                if is_data_section:
+                    return line.startswith(u'{')
+                if line.upper().startswith(u'@DATA'):
+                    is_data_section = True
+
+        return False
+
+
+class _UnicodeLines:
+    """
+    Decodes lines of a byte file as utf-8, arff lib needs unicode lines
+    """
+
+    def __init__(self, byte_file):
+        self.__byte_file = byte_file
+
+    def __iter__(self):
+        for line in self.__byte_file:
+            yield line.decode('utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.__byte_file.close()
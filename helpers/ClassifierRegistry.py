@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+
+import collections
+import numpy as np
+
+from config import *
+
+from sklearn.svm import SVC, LinearSVC
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.multiclass import OneVsRestClassifier
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.linear_model import SGDClassifier, LogisticRegression
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+
+try:
+    import xgboost as xgb
+except ImportError:
+    xgb = None
+
+
+# create: function of (n_features, n_jobs, probability) returning a new classifier, probability asks for predict_proba
+# supports_decision_function: whether the classifier created without probability has decision_function
+# supports_warm_start: whether setting warm_start=True makes a refit continue from the last solution
+ClassifierBackend = collections.namedtuple('ClassifierBackend', ['name', 'create', 'supports_predict_proba',
+                                                                 'supports_decision_function', 'supports_partial_fit',
+                                                                 'supports_warm_start', 'supports_n_jobs',
+                                                                 'description'])
+
+
+class ClassifierRegistry:
+    """
+    Named classifier backends with their capabilities. Experiments create their classifiers by name, so a backend can
+    be selected per run and per role: final classification or logical selection, which needs predict_proba or
+    decision_function to rank samples.
+    """
+
+    CLASSIFICATION = 'classification'
+    LOGICAL_SELECTION = 'logical_selection'
+
+    __backends = collections.OrderedDict()
+
+    @classmethod
+    def register(cls, backend):
+        """
+        Registers a backend, replacing a backend with the same name
+        :param backend: ClassifierBackend
+        :return: void
+        """
+        cls.__backends[backend.name] = backend
+
+    @classmethod
+    def get(cls, name):
+        """
+        Returns a registered backend
+        :param name: string
+        :return: ClassifierBackend
+        """
+        if name not in cls.__backends:
+            raise ValueError("Unknown classifier backend: " + str(name) + ". Available backends: " +
+                             ', '.join(cls.__backends.keys()))
+
+        return cls.__backends[name]
+
+    @classmethod
+    def get_names(cls):
+        """
+        Returns names of registered backends
+        :return: list
+        """
+        return cls.__backends.keys()
+
+    @classmethod
+    def check_role(cls, name, role, probability=False):
+        """
+        Checks if a backend can be used for a role
+        :param name: string
+        :param role: string, CLASSIFICATION or LOGICAL_SELECTION
+        :param probability: bool, whether logical selection ranks by predict_proba instead of decision_function
+        :return: ClassifierBackend
+        """
+        if role not in (cls.CLASSIFICATION, cls.LOGICAL_SELECTION):
+            raise ValueError("Unknown classifier role: " + str(role))
+
+        backend = cls.get(name)
+
+        if role == cls.LOGICAL_SELECTION:
+            if probability and not backend.supports_predict_proba:
+                raise ValueError("Classifier backend " + name + " can't be used for logical selection, it has no "
+                                 "predict_proba.")
+            elif not probability and not backend.supports_decision_function:
+                raise ValueError("Classifier backend " + name + " can't be used for logical selection with margins, "
+                                 "it has no decision_function.")
+
+        return backend
+
+    @classmethod
+    def create(cls, name, role, n_features, probability=False, n_jobs=CLASSIFIER_N_JOBS):
+        """
+        Creates a new classifier of a backend for a role
+        :param name: string
+        :param role: string, CLASSIFICATION or LOGICAL_SELECTION
+        :param n_features: int, number of features the classifier will be fitted with
+        :param probability: bool, whether the classifier must have predict_proba, calibration is skipped if not
+        :param n_jobs: int, used if the backend supports it
+        :return: sklearn classifier
+        """
+        return cls.check_role(name, role, probability).create(n_features, n_jobs, probability)
+
+    @classmethod
+    def get_agreement(cls, name_one, name_two, X_train, y_train, X_test):
+        """
+        Fits classifiers of two backends on the same train set and returns how often they predict the same class, e.g.
+        to check that a faster backend can replace another
+        :param name_one: string
+        :param name_two: string
+        :param X_train: scipy.sparse
+        :param y_train: np.array
+        :param X_test: scipy.sparse
+        :return: float, ratio of test samples predicted the same
+        """
+        predictions = []
+        for name in (name_one, name_two):
+            classifier = cls.create(name, cls.CLASSIFICATION, X_train.shape[1])
+            classifier.fit(X_train, y_train)
+            predictions.append(classifier.predict(X_test))
+
+        return np.mean(predictions[0] == predictions[1])
+
+
+def _calibrate(classifier, probability):
+    """
+    Wraps a classifier without predict_proba to calibrate its decision function with 5 folds, like libsvm does
+    :param classifier: sklearn classifier
+    :param probability: bool, whether predict_proba is needed
+    :return: sklearn classifier
+    """
+    if not probability:
+        return classifier
+    return CalibratedClassifierCV(classifier, method='sigmoid', cv=5)
+
+
+ClassifierRegistry.register(ClassifierBackend(
+    name='svc',
+    create=lambda n_features, n_jobs, probability: OneVsRestClassifier(
+        SVC(C=1.0, kernel='poly', probability=probability, degree=1.0, cache_size=250007), n_jobs=n_jobs),
+    supports_predict_proba=True, supports_decision_function=True, supports_partial_fit=False, supports_warm_start=False,
+    supports_n_jobs=True,
+    description="One-vs-rest SVC with a degree 1 polynomial kernel, probabilities by libsvm's internal cross "
+                "validation if asked"))
+
+# SVC's kernel is <x, y> / n_features, which is a linear svm on unscaled features with C / n_features. libsvm doesn't
+# penalize the bias but liblinear does, as the weight of a constant feature of intercept_scaling. With C / n_features
+# a penalized bias is pushed to 0, a large intercept_scaling makes its penalty negligible. Too large ones slow down
+# convergence, 100 agreed with svc on every prediction for 300 to 30000 n-grams, see get_agreement.
+ClassifierRegistry.register(ClassifierBackend(
+    name='linear_svc',
+    create=lambda n_features, n_jobs, probability: _calibrate(
+        LinearSVC(C=1.0 / max(n_features, 1), loss='hinge', intercept_scaling=100.0, max_iter=10000), probability),
+    supports_predict_proba=True, supports_decision_function=True, supports_partial_fit=False, supports_warm_start=False,
+    supports_n_jobs=False,
+    description="liblinear one-vs-rest linear svm with the same regularization as svc and a nearly unpenalized "
+                "bias, sigmoid calibrated probabilities if asked"))
+
+ClassifierRegistry.register(ClassifierBackend(
+    name='sgd',
+    create=lambda n_features, n_jobs, probability: SGDClassifier(loss='modified_huber', max_iter=50, tol=1e-3,
+                                                                 n_jobs=n_jobs, random_state=0),
+    supports_predict_proba=True, supports_decision_function=True, supports_partial_fit=True, supports_warm_start=True,
+    supports_n_jobs=True,
+    description="One-vs-rest linear svm with smoothed hinge loss trained by stochastic gradient descent"))
+
+ClassifierRegistry.register(ClassifierBackend(
+    name='logistic',
+    create=lambda n_features, n_jobs, probability: LogisticRegression(C=1.0, solver='liblinear', multi_class='ovr'),
+    supports_predict_proba=True, supports_decision_function=True, supports_partial_fit=False, supports_warm_start=False,
+    supports_n_jobs=False,
+    description="liblinear one-vs-rest logistic regression"))
+
+ClassifierRegistry.register(ClassifierBackend(
+    name='rf',
+    create=lambda n_features, n_jobs, probability: RandomForestClassifier(n_estimators=100, n_jobs=n_jobs),
+    supports_predict_proba=True, supports_decision_function=False, supports_partial_fit=False,
+    supports_warm_start=False, supports_n_jobs=True,
+    description="Random forest of 100 trees"))
+
+ClassifierRegistry.register(ClassifierBackend(
+    name='gbm',
+    create=lambda n_features, n_jobs, probability: GradientBoostingClassifier(n_estimators=100),
+    supports_predict_proba=True, supports_decision_function=True, supports_partial_fit=False, supports_warm_start=False,
+    supports_n_jobs=False,
+    description="Gradient boosting of 100 trees"))
+
+ClassifierRegistry.register(ClassifierBackend(
+    name='nb',
+    create=lambda n_features, n_jobs, probability: MultinomialNB(),
+    supports_predict_proba=True, supports_decision_function=False, supports_partial_fit=True, supports_warm_start=False,
+    supports_n_jobs=False,
+    description="Multinomial naive bayes"))
+
+if xgb is not None:
+    ClassifierRegistry.register(ClassifierBackend(
+        name='xgb',
+        create=lambda n_features, n_jobs, probability: xgb.XGBClassifier(n_estimators=100, n_jobs=n_jobs),
+        supports_predict_proba=True, supports_decision_function=False, supports_partial_fit=False,
+        supports_warm_start=False, supports_n_jobs=True, description="XGBoost gradient boosting of 100 trees"))
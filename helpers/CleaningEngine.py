@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+import re
+
+
+class CleaningEngine:
+    """
+    Removes urls, hashtags, mentions, smileys, emojis, punctuation and RT from tweets with one scan of a combined
+    compiled pattern. Output is the same with Preprocessor's step by step cleaning. A tweet which could be cleaned
+    differently because of the step by step cleaning's replace-all behaviour (e.g. '#turkcell #turkcellsuperonline'
+    where replacing '#turkcell' also cuts the second hashtag) is detected and cleaned with the step by step method.
+    """
+
+    def __init__(self, url_pattern, smiley_pattern, smiley_eyes, smiley_noses, smiley_mouths, step_by_step_clean):
+        """
+        Constructor method
+        :param url_pattern: string, url regexp of Preprocessor
+        :param smiley_pattern: string, smiley regexp of Preprocessor
+        :param smiley_eyes: string, eye characters of smileys
+        :param smiley_noses: string, nose characters of smileys
+        :param smiley_mouths: string, mouth characters of smileys
+        :param step_by_step_clean: function, Preprocessor's step by step cleaning, used for the detected tweets
+        :return: CleaningEngine
+        """
+        self.__step_by_step_clean = step_by_step_clean
+
+        self.__smiley_left_characters = smiley_eyes + smiley_noses
+        self.__smiley_right_characters = smiley_noses + smiley_mouths
+
+        try:
+            astral_pattern = u'[\U00010000-\U0010ffff]'
+            re.compile(astral_pattern)
+        except re.error:
+            # UCS-2 build
+            astral_pattern = u'[\uD800-\uDBFF][\uDC00-\uDFFF]'
+
+        self.compiled_url_regex = re.compile(url_pattern)
+        self.compiled_combined_regex = re.compile(u'(?P<url>' + url_pattern + u')'
+                                                  u'|(?P<hashtag>(?<!\\S)#\\S*)'
+                                                  u'|(?P<mention>(?<!\\S)@\\S*)'
+                                                  u'|(?P<smiley>' + smiley_pattern + u')'
+                                                  u'|(?P<astral>' + astral_pattern + u')', re.UNICODE)
+
+        # Words are what remains after replacing non-alphanumeric characters and underscores with spaces
+        self.compiled_word_regex = re.compile(u'[^\\W_]+', re.UNICODE)
+
+        # Url regexp has a branch which starts with 30 spaces
+        self.__url_whitespace_branch = u' ' * 30
+
+    def clean(self, tweet):
+        """
+        Cleans a tweet's text
+        :param tweet: String
+        :return: String
+        """
+        # Byte strings split on different whitespace characters with str.split() and unicode regexps
+        if not isinstance(tweet, unicode) or self.__url_whitespace_branch in tweet:
+            return self.__step_by_step_clean(tweet)
+
+        pieces = []
+        last_end = 0
+        hashtag_count = 0
+        mention_count = 0
+        junctions = []
+
+        for match in self.compiled_combined_regex.finditer(tweet):
+            start, end = match.span()
+            pieces.append(tweet[last_end:start])
+            last_end = end
+
+            kind = match.lastgroup
+            if kind == 'hashtag':
+                hashtag_count += 1
+            elif kind == 'mention':
+                mention_count += 1
+            elif kind != 'astral':
+                junctions.append((start, end))
+
+        pieces.append(tweet[last_end:])
+
+        if (hashtag_count or mention_count or junctions) and \
+                not self._has_same_result_with_step_by_step(tweet, hashtag_count, mention_count, junctions):
+            return self.__step_by_step_clean(tweet)
+
+        words = self.compiled_word_regex.findall(u''.join(pieces))
+        words = [word.replace(u'RT', u'') for word in words]
+
+        return u' '.join([word for word in words if word])
+
+    def clean_many(self, tweets):
+        """
+        Cleans a list or an iterator of tweets' texts lazily
+        :param tweets: iterable, texts
+        :return: generator, cleaned texts in the same order
+        """
+        clean = self.clean
+        for tweet in tweets:
+            yield clean(tweet)
+
+    def _has_same_result_with_step_by_step(self, tweet, hashtag_count, mention_count, junctions):
+        """
+        Checks if removing matched spans gives the same result with the step by step cleaning. Step by step cleaning
+        replaces every occurrence of a removed string, so a removed string must occur only where it's matched, and
+        removing a url or a smiley must not join characters into a new smiley.
+        :param tweet: String
+        :param hashtag_count: int, matched hashtags
+        :param mention_count: int, matched mentions
+        :param junctions: list, (start, end) spans of matched urls and smileys
+        :return: bool
+        """
+        for start, end in junctions:
+            if start > 0 and end < len(tweet) and tweet[start - 1] in self.__smiley_left_characters and \
+                    tweet[end] in self.__smiley_right_characters:
+                return False
+
+        # Text after urls are removed
+        tweet_without_urls = tweet
+        if u'http' in tweet:
+            urls = self.compiled_url_regex.findall(tweet)
+            for url in set(urls):
+                if tweet.count(url) != urls.count(url):
+                    return False
+            tweet_without_urls = self.compiled_url_regex.sub(u'', tweet)
+
+        # Removing urls may leave new hashtags and mentions
+        if u'#' not in tweet_without_urls and u'@' not in tweet_without_urls:
+            return True
+
+        tokens = tweet_without_urls.split()
+        if not self._are_tokens_removed_as_whole(tweet_without_urls, tokens, u'#', hashtag_count):
+            return False
+
+        # Text after hashtags are removed
+        tokens = [token for token in tokens if not token.startswith(u'#')]
+        return self._are_tokens_removed_as_whole(u' '.join(tokens), tokens, u'@', mention_count)
+
+    def _are_tokens_removed_as_whole(self, text, tokens, prefix, matched_count):
+        """
+        Checks if replacing prefix+tag in step by step cleaning removes exactly the whole tokens starting with prefix
+        :param text: String, text at the step
+        :param tokens: list, tokens of the text at the step
+        :param prefix: String, # or @
+        :param matched_count: int, tokens matched by the combined pattern
+        :return: bool
+        """
+        prefixed_tokens = [token for token in tokens if token.startswith(prefix)]
+        if len(prefixed_tokens) != matched_count:
+            return False
+
+        for token in set(prefixed_tokens):
+            if token.strip(prefix) != token[1:] or len(token) == 1:
+                return False
+            if text.count(token) != prefixed_tokens.count(token):
+                return False
+
+        return True
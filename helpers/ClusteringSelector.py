@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from config import *
+from scipy import sparse
+from sklearn.cluster import KMeans, MiniBatchKMeans
+
+
+class ClusteringSelector:
+    """
+    Chooses the samples closest to cluster centroids. Clustering is k-means or mini-batch k-means with k-means++ seeding
+    and a bounded number of restarts. Nearest samples are found from dot products with the centroids, so sparse
+    samples are never made dense, and a sample closest to many centroids is chosen once.
+    """
+
+    KMEANS = 'kmeans'
+    MINIBATCH = 'minibatch'
+
+    def __init__(self, n_clusters, algorithm=CLUSTERING_ALGORITHM, n_init=CLUSTERING_N_INIT,
+                 batch_size=CLUSTERING_MINIBATCH_SIZE):
+        """
+        Constructor method
+        :param n_clusters: int, number of samples to choose at most
+        :param algorithm: string, KMEANS or MINIBATCH
+        :param n_init: int, restarts with different k-means++ seeds
+        :param batch_size: int, samples in a mini-batch
+        :return: ClusteringSelector
+        """
+        if algorithm not in (self.KMEANS, self.MINIBATCH):
+            raise ValueError("Unknown clustering algorithm: " + str(algorithm))
+
+        self.n_clusters = n_clusters
+        self.algorithm = algorithm
+        self.n_init = n_init
+        self.batch_size = batch_size
+
+    def select(self, X):
+        """
+        Clusters samples and returns indexes of the samples closest to the centroids
+        :param X: scipy.sparse or np.array, samples, e.g. original features or a low rank projection of them
+        :return: np.array, distinct sample indexes in centroids' order
+        """
+        n_clusters = min(self.n_clusters, X.shape[0])
+
+        if self.algorithm == self.MINIBATCH:
+            # Seeding needs more samples than clusters
+            init_size = min(X.shape[0], max(3 * self.batch_size, 3 * n_clusters))
+            clustering_model = MiniBatchKMeans(n_clusters=n_clusters, init='k-means++', n_init=self.n_init,
+                                               batch_size=self.batch_size, init_size=init_size)
+        else:
+            clustering_model = KMeans(n_clusters=n_clusters, init='k-means++', n_init=self.n_init)
+
+        clustering_model.fit(X)
+
+        return self.find_samples_closest_to_centroids(X, clustering_model.cluster_centers_)
+
+    def find_samples_closest_to_centroids(self, X, centroids):
+        """
+        Returns the distinct samples closest to each centroid
+        :param X: scipy.sparse or np.array, samples
+        :param centroids: np.array
+        :return: np.array, sample indexes in centroids' order, duplicates are removed
+        """
+        # |x - c|^2 = |x|^2 - 2 x.c + |c|^2, |c|^2 doesn't change the closest sample of a centroid
+        if sparse.issparse(X):
+            squared_sample_norms = np.asarray(X.multiply(X).sum(axis=1))
+        else:
+            squared_sample_norms = np.einsum('ij,ij->i', X, X)[:, np.newaxis]
+
+        squared_distances = squared_sample_norms - 2 * np.asarray(X.dot(centroids.T))
+        closest_sample_indexes = np.argmin(squared_distances, axis=0)
+
+        unique_indexes, first_positions = np.unique(closest_sample_indexes, return_index=True)
+        return closest_sample_indexes[np.sort(first_positions)]
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from config import *
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+
+class DensityWeightedSelector:
+    """
+    Chooses uncertain samples which also represent the pool, so outliers which a classifier is unsure about aren't
+    preferred. A sample's score is its uncertainty scaled to [0, 1] times its density ^ beta, where density is the mean
+    cosine similarity to its k nearest neighbours in the pool. Neighbours are found from sparse products of a block of
+    rows with the pool, keeping only the top k of each row, so a pool x pool similarity matrix is never built.
+    """
+
+    def __init__(self, neighbour_count=DENSITY_NEIGHBOUR_COUNT, beta=DENSITY_WEIGHT_BETA,
+                 block_size=DENSITY_BLOCK_SIZE):
+        """
+        Constructor method
+        :param neighbour_count: int, k nearest neighbours of a sample
+        :param beta: float, weight of density against uncertainty, 0 is pure uncertainty
+        :param block_size: int, rows multiplied with the pool at once
+        :return: DensityWeightedSelector
+        """
+        self.neighbour_count = neighbour_count
+        self.beta = beta
+        self.block_size = block_size
+
+    def get_densities(self, X):
+        """
+        Returns mean cosine similarity of each sample to its k nearest neighbours in X
+        :param X: scipy.sparse or np.array, pool samples
+        :return: np.array, n_samples
+        """
+        X_normalized = normalize(sparse.csr_matrix(X, dtype=np.float64))
+        X_normalized_T = X_normalized.T.tocsc()
+
+        sample_count = X_normalized.shape[0]
+        neighbour_count = min(self.neighbour_count, sample_count - 1)
+        densities = np.zeros(sample_count, dtype=np.float64)
+
+        if neighbour_count < 1:
+            return densities
+
+        for block_start in range(0, sample_count, self.block_size):
+            block_end = min(block_start + self.block_size, sample_count)
+            similarities = (X_normalized[block_start:block_end] * X_normalized_T).toarray()
+
+            # A sample isn't its own neighbour
+            block_rows = np.arange(block_end - block_start)
+            similarities[block_rows, block_rows + block_start] = -np.inf
+
+            top_similarities = -np.partition(-similarities, neighbour_count - 1, axis=1)[:, :neighbour_count]
+            densities[block_start:block_end] = top_similarities.mean(axis=1)
+
+        return densities
+
+    def select(self, uncertainties, X, k):
+        """
+        Returns indexes of the k samples with the highest density weighted uncertainties
+        :param uncertainties: np.array, n_samples, higher is more uncertain, e.g. output of UncertaintySampler.score
+        :param X: scipy.sparse or np.array, pool samples
+        :param k: int
+        :return: np.array, highest score first
+        """
+        uncertainties = np.asarray(uncertainties, dtype=np.float64)
+
+        # Scores of uncertainty strategies may be negative, scaling keeps their order
+        uncertainty_range = uncertainties.max() - uncertainties.min()
+        if uncertainty_range > 0:
+            uncertainties = (uncertainties - uncertainties.min()) / uncertainty_range
+        else:
+            uncertainties = np.ones_like(uncertainties)
+
+        negative_scores = -uncertainties * np.power(self.get_densities(X), self.beta)
+        k = min(k, len(negative_scores))
+
+        if k < len(negative_scores):
+            top_indexes = np.sort(np.argpartition(negative_scores, k - 1)[:k])
+        else:
+            top_indexes = np.arange(len(negative_scores))
+
+        return top_indexes[np.argsort(negative_scores[top_indexes], kind='mergesort')]
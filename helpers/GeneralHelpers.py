@@ -2,7 +2,9 @@
 
 import re
 import arff
+import gzip
 import json
+import atexit
 import codecs
 import random
 import pprint
@@ -11,9 +13,16 @@ import collections
 
 from config import *
 from glob import glob
+from scipy import sparse
 from subprocess import Popen, PIPE, STDOUT
 
 from classes.DBManager import DBManager
+from helpers.LexiconCache import LexiconCache
+from helpers.AppendOnlyCache import AppendOnlyCache
+from helpers.RandomProjectionIndex import RandomProjectionIndex
+from helpers.ZemberekWorkerPool import ZemberekWorkerPoolGroup, ZemberekWorkerError
+
+atexit.register(ZemberekWorkerPoolGroup.close_all)
 
 class GeneralHelpers:
 
@@ -21,6 +30,10 @@ class GeneralHelpers:
         self.__db_manager = DBManager()
         self.regexp_for_predict_lines = "\d{1,}\s{1,}\d{1}:\w{1,8}.{1,}"
         self.__dictionaries_directory = PROJECT_ROOT_DIRECTORY + DICTIONARIES_DIR_NAME
+        self.__zemberek_worker_modes = {
+            ZEMBEREK_ROOT_FINDER_JAR_FILE_NAME: 'stem',
+            ZEMBEREK_SUGGESTION_FINDER_JAR_FILE_NAME: 'suggest'
+        }
 
     def pretty_print_list(self, list_to_print, message):
         """
@@ -74,43 +87,74 @@ class GeneralHelpers:
 
     def save_changes_in_suggestion_cache(self, suggestions_cache):
         """
-        Saves given suggestion cache to file
-        :param suggestions_cache: dict, suggestions
+        Saves given suggestion cache to file. Entries are already appended to the log as they're set, so this only
+        makes sure they're on disk.
+        :param suggestions_cache: LexiconView, suggestions
         :return: void
         """
-        suggestion_cache_file_path = self.__dictionaries_directory + MODEL_NAME + '/' + SUGGESTION_CACHE_FILE_NAME
-        self._write_json_to_file(suggestions_cache, suggestion_cache_file_path)
+        suggestions_cache.save()
 
     def save_changes_in_root_cache(self, roots_cache):
         """
-        Saves given roots cache to file
-        :param roots_cache: roots_cache, dict, roots
+        Saves given roots cache to file. Entries are already appended to the log as they're set, so this only
+        makes sure they're on disk.
+        :param roots_cache: LexiconView, roots
         :return: void
         """
-        roots_file_path = self.__dictionaries_directory + MODEL_NAME + '/' + ROOTS_CACHE_FILE_NAME
-        self._write_json_to_file(roots_cache, roots_file_path)
+        roots_cache.save()
 
     def load_suggestion_cache(self):
         """
-        Loads previously asked (to zemberek) suggestion cache
-        :return: void
+        Loads previously asked (to zemberek) suggestion cache from the lexicon shared by all brands. Model's own old
+        cache is migrated to the lexicon once.
+        :return: LexiconView
         """
-        suggestion_cache_file_path = self.__dictionaries_directory + MODEL_NAME + '/' + SUGGESTION_CACHE_FILE_NAME
-        if os.path.isfile(suggestion_cache_file_path):
-            with open(suggestion_cache_file_path, "r") as suggestions_file:
-                suggestion_cache = json.load(suggestions_file)
-                return suggestion_cache
+        return self._load_lexicon_view(LexiconCache.SUGGESTION, SUGGESTION_CACHE_LOG_FILE_NAME, SUGGESTION_CACHE_FILE_NAME)
 
     def load_roots_cache(self):
         """
-        Loads previously asked (to zemberek) word roots cache
-        :return: void
+        Loads previously asked (to zemberek) word roots cache from the lexicon shared by all brands. Model's own old
+        cache is migrated to the lexicon once.
+        :return: LexiconView
+        """
+        return self._load_lexicon_view(LexiconCache.ROOT, ROOTS_CACHE_LOG_FILE_NAME, ROOTS_CACHE_FILE_NAME)
+
+    def load_document_cache(self, pipeline_fingerprint=None):
+        """
+        Loads model's cache of preprocessed tweets
+        :param pipeline_fingerprint: string, entries of other pipelines are dropped and left out when the log is
+        compacted, all entries are kept if None
+        :return: AppendOnlyCache
+        """
+        document_cache = AppendOnlyCache(self.__dictionaries_directory + MODEL_NAME + '/' + DOCUMENT_CACHE_FILE_NAME)
+
+        if pipeline_fingerprint is not None:
+            # Cache keys end with the fingerprint of their pipeline
+            key_suffix = u'\t' + pipeline_fingerprint
+            document_cache.set_key_filter(lambda key: key.endswith(key_suffix))
+
+        return document_cache
+
+    def _load_lexicon_view(self, kind, log_file_name, legacy_json_file_name):
         """
-        roots_file_path = self.__dictionaries_directory + MODEL_NAME + '/' + ROOTS_CACHE_FILE_NAME
-        if os.path.isfile(roots_file_path):
-            with open(roots_file_path, "r") as roots_file:
-                roots_cache = json.load(roots_file)
-                return roots_cache
+        Returns model's view of shared lexicon after migrating model's own cache
+        :param kind: string, LexiconCache.SUGGESTION or LexiconCache.ROOT
+        :param log_file_name: string, model's append-only cache log
+        :param legacy_json_file_name: string, model's whole-dict json cache
+        :return: LexiconView
+        """
+        lexicon = LexiconCache.get_shared()
+
+        model_dictionary_directory = self.__dictionaries_directory + MODEL_NAME + '/'
+        log_file_path = model_dictionary_directory + log_file_name
+        legacy_json_file_path = model_dictionary_directory + legacy_json_file_name
+
+        if os.path.isfile(log_file_path) or os.path.isfile(legacy_json_file_path):
+            brand_cache = AppendOnlyCache(log_file_path, legacy_json_file_path)
+            lexicon.migrate_brand_cache(kind, MODEL_NAME, brand_cache)
+            brand_cache.close()
+
+        return lexicon.get_view(kind, MODEL_NAME)
 
     def generate_arff_file(self, file_path, file_name, arff_data):
         """
@@ -127,6 +171,57 @@ class GeneralHelpers:
         arff.dump(arff_data, arff_file)
         arff_file.close()
 
+    def generate_sparse_arff_file(self, file_path, file_name, arff_header, X_sparse, classes, compress=False):
+        """
+        Writes a sparse arff file row by row straight from a csr matrix, so time and memory depend on non-zero counts.
+        Rows are written in arff sparse instance format: {index value, ..., class_index class}
+        :param file_path: string, directory of the file
+        :param file_name: string, file name, .gz is appended if compressed
+        :param arff_header: dict, arff data without rows, see FeatureManager.format_data_for_arff
+        :param X_sparse: scipy.sparse.csr_matrix, n-gram counts
+        :param classes: list, class of each row
+        :param compress: bool, whether or not to gzip the file, weka reads .arff.gz files
+        :return: string, generated file path
+        """
+
+        if not os.path.exists(file_path):
+            os.makedirs(file_path)
+
+        if compress:
+            file_name += '.gz'
+            arff_file = gzip.open(file_path + file_name, 'wb')
+        else:
+            arff_file = open(file_path + file_name, 'wb')
+
+        # Weka needs ascending indexes in a sparse row
+        if not X_sparse.has_sorted_indices:
+            X_sparse = X_sparse.sorted_indices()
+
+        class_index = X_sparse.shape[1]
+        indptr, indices, data = X_sparse.indptr, X_sparse.indices, X_sparse.data
+
+        try:
+            # Without data the encoder gives only the header
+            header = dict((key, value) for key, value in arff_header.iteritems() if key != 'data')
+            for line in arff.ArffEncoder().iter_encode(header):
+                arff_file.write(line.encode('utf-8') + '\n')
+
+            for chunk_start in range(0, X_sparse.shape[0], ARFF_WRITE_CHUNK_SIZE):
+                chunk_end = min(chunk_start + ARFF_WRITE_CHUNK_SIZE, X_sparse.shape[0])
+                lines = []
+
+                for row_index in range(chunk_start, chunk_end):
+                    row_start, row_end = indptr[row_index], indptr[row_index + 1]
+                    values = ['%d %s' % pair for pair in zip(indices[row_start:row_end], data[row_start:row_end])]
+                    values.append('%d %s' % (class_index, classes[row_index]))
+                    lines.append('{' + ','.join(values) + '}\n')
+
+                arff_file.write(''.join(lines))
+        finally:
+            arff_file.close()
+
+        return file_path + file_name
+
     def generate_random_string(self, n):
         """
         Generates random string with size of n
@@ -362,13 +457,30 @@ class GeneralHelpers:
 
     def find_most_distinct_n_samples(self, document_one, document_two, n_samples):
         """
-        Returns most distinct n_samples from document_two comparing to document_one (documents are arff data)
-        :param document_one: list
-        :param document_two: list
+        Returns most distinct n_samples from document_two comparing to document_one (documents are arff data). Samples
+        are ranked by cosine distance to their nearest sample in document_one, which is found approximately with a
+        RandomProjectionIndex of document_one.
+        :param document_one: list or scipy.sparse, arff data rows with or without their classes, or feature counts
+        :param document_two: list or scipy.sparse, same as document_one
         :param n_samples: int
-        :return: list
+        :return: list, rows of document_two, most distinct first
+        """
+        index = RandomProjectionIndex().fit(self._get_arff_data_counts(document_one))
+        most_distinct_indexes = index.find_most_distinct(self._get_arff_data_counts(document_two), n_samples)
+
+        return [document_two[idx] for idx in most_distinct_indexes]
+
+    def _get_arff_data_counts(self, document):
+        """
+        Returns feature counts of arff data, dropping the class of each row
+        :param document: list or scipy.sparse
+        :return: scipy.sparse.csr_matrix
         """
-        pass
+        if sparse.issparse(document):
+            return sparse.csr_matrix(document)
+
+        rows = [row[:-1] if isinstance(row[-1], basestring) else row for row in document]
+        return sparse.csr_matrix(np.array(rows, dtype=np.float64))
 
     def cumulate_years_scores(self, years_scores):
         """
@@ -457,7 +569,24 @@ class GeneralHelpers:
 
     def _make_jar_call(self, jar_file_name, word):
         """
-        Makes a jar call with proper parameters
+        Makes a jar call with proper parameters, uses the long-lived worker pool if it's enabled
+        :param jar_file_name: string, jar file to make call
+        :param word: string, parameter word
+        :return: string, connection output
+        """
+        if USE_ZEMBEREK_WORKER_POOL:
+            worker_mode = self.__zemberek_worker_modes[jar_file_name]
+
+            try:
+                return ZemberekWorkerPoolGroup.get_pool(worker_mode).request(word)
+            except (ZemberekWorkerError, OSError, IOError) as e:
+                print("Zemberek worker pool failed, making a single jar call. " + str(e))
+
+        return self._make_single_jar_call(jar_file_name, word)
+
+    def _make_single_jar_call(self, jar_file_name, word):
+        """
+        Makes a jar call with proper parameters by starting a new JVM
         :param jar_file_name: string, jar file to make call
         :param word: string, parameter word
         :return: string, connection output
@@ -469,4 +598,4 @@ class GeneralHelpers:
 
         # Getting output
         output = process_call.communicate()[0].decode('utf-8')
-        return output
\ No newline at end of file
+        return output
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import numpy as np
+
+from config import *
+from scipy import sparse
+
+
+class GramMatrix:
+    """
+    Dot products of a csr matrix's rows with each other. Square blocks are computed the first time they are needed and
+    kept, so kernels of any train and test subsets of the rows are taken from one matrix. The matrix is allocated
+    without being filled, pages of blocks which are never computed aren't committed to memory.
+
+    For experiments run by a process pool, the parent computes the whole matrix once into a .npy file in a
+    SharedCSRMatrix's directory and workers memory-map it read-only, so it's computed and stored once for all workers.
+    """
+
+    __attached_gram_matrices = {}
+    __lock = threading.Lock()
+
+    __FILE_NAME = 'gram.npy'
+
+    def __init__(self, X_sparse, block_size=GRAM_BLOCK_SIZE, dot_products=None, is_computed=False):
+        """
+        Constructor method
+        :param X_sparse: scipy.sparse matrix
+        :param block_size: int, rows and columns of a block
+        :param dot_products: np.array, n_rows x n_rows float64 array to fill, e.g. memory-mapped from a file, optional
+        :param is_computed: bool, whether dot_products is already filled
+        :return: GramMatrix
+        """
+        # Not copied, workers share the memory-mapped rows
+        self.X_sparse = sparse.csr_matrix(X_sparse)
+        self.block_size = block_size
+
+        row_count = self.X_sparse.shape[0]
+        block_count = (row_count + block_size - 1) // block_size
+
+        if dot_products is None:
+            dot_products = np.empty((row_count, row_count), dtype=np.float64)
+
+        # Submatrices of a np.memmap are read-only copies, of its ndarray view they are writable
+        self.__dot_products = dot_products.view(np.ndarray)
+        self.__is_block_computed = np.full((block_count, block_count), is_computed, dtype=bool)
+
+    @classmethod
+    def create_shared(cls, name, X_sparse):
+        """
+        Computes all dot products straight into a .npy file in a SharedCSRMatrix's directory, it's removed with the
+        directory when the matrix is unlinked
+        :param name: string, name of a SharedCSRMatrix
+        :param X_sparse: scipy.sparse matrix
+        :return: GramMatrix
+        """
+        row_count = X_sparse.shape[0]
+        dot_products = np.lib.format.open_memmap(os.path.join(name, cls.__FILE_NAME), mode='w+', dtype=np.float64,
+                                                 shape=(row_count, row_count))
+
+        gram_matrix = GramMatrix(X_sparse, dot_products=dot_products)
+
+        all_blocks = np.arange((row_count + gram_matrix.block_size - 1) // gram_matrix.block_size)
+        gram_matrix._compute_blocks(all_blocks, all_blocks)
+        dot_products.flush()
+
+        return gram_matrix
+
+    @classmethod
+    def attach(cls, name, X_sparse):
+        """
+        Memory-maps the gram matrix created by create_shared read-only, once per process
+        :param name: string, name of a SharedCSRMatrix
+        :param X_sparse: scipy.sparse matrix, the shared matrix's rows
+        :return: GramMatrix
+        """
+        with cls.__lock:
+            attached_key = (os.getpid(), name)
+            gram_matrix = cls.__attached_gram_matrices.get(attached_key)
+
+            if gram_matrix is None:
+                dot_products = np.load(os.path.join(name, cls.__FILE_NAME), mmap_mode='r')
+                gram_matrix = GramMatrix(X_sparse, dot_products=dot_products, is_computed=True)
+                cls.__attached_gram_matrices[attached_key] = gram_matrix
+
+            return gram_matrix
+
+    def get_dot_products(self, row_indexes, column_indexes):
+        """
+        Returns dot products of given rows with given columns, computing missing blocks
+        :param row_indexes: np.array, int
+        :param column_indexes: np.array, int
+        :return: np.array, len(row_indexes) x len(column_indexes)
+        """
+        row_indexes = np.asarray(row_indexes)
+        column_indexes = np.asarray(column_indexes)
+
+        self._compute_blocks(np.unique(row_indexes // self.block_size),
+                             np.unique(column_indexes // self.block_size))
+
+        return self.__dot_products[np.ix_(row_indexes, column_indexes)]
+
+    def _compute_blocks(self, row_blocks, column_blocks):
+        """
+        Computes missing blocks, a block's transpose is filled with it since the matrix is symmetric
+        :param row_blocks: np.array, int
+        :param column_blocks: np.array, int
+        :return: void
+        """
+        for row_block in row_blocks:
+            missing_column_blocks = [column_block for column_block in column_blocks
+                                     if not self.__is_block_computed[row_block, column_block]]
+            if not missing_column_blocks:
+                continue
+
+            row_slice = self._get_block_slice(row_block)
+            # Compact integer counts would overflow in products
+            X_rows = self.X_sparse[row_slice].astype(np.float64)
+
+            for column_block in missing_column_blocks:
+                column_slice = self._get_block_slice(column_block)
+                block = (X_rows * self.X_sparse[column_slice].astype(np.float64).T).toarray()
+
+                self.__dot_products[row_slice, column_slice] = block
+                self.__dot_products[column_slice, row_slice] = block.T
+
+                self.__is_block_computed[row_block, column_block] = True
+                self.__is_block_computed[column_block, row_block] = True
+
+    def _get_block_slice(self, block):
+        """
+        Returns row or column range of a block
+        :param block: int
+        :return: slice
+        """
+        return slice(block * self.block_size, (block + 1) * self.block_size)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from config import *
+from scipy import sparse
+
+
+class KCenterSelector:
+    """
+    Chooses a diverse batch with greedy k-center selection, a core-set of the pool. Each pick is the sample farthest
+    from its nearest center, then every sample's distance to its nearest center is updated with its distance to the
+    new center, one vectorized computation per pick. Cost is O(n * k) with no restarts, for sparse features and dense
+    features like class probabilities.
+    """
+
+    def __init__(self, n_centers, block_size=KCENTER_BLOCK_SIZE):
+        """
+        Constructor method
+        :param n_centers: int, number of samples to choose
+        :param block_size: int, initial centers compared with the pool at once
+        :return: KCenterSelector
+        """
+        self.n_centers = n_centers
+        self.block_size = block_size
+
+    def select(self, X, X_centers=None):
+        """
+        Returns indexes of samples chosen as centers, in picking order
+        :param X: scipy.sparse or np.array, pool samples
+        :param X_centers: scipy.sparse or np.array, samples which are already centers, e.g. train set, optional
+        :return: np.array
+        """
+        sample_count = X.shape[0]
+        n_centers = min(self.n_centers, sample_count)
+        squared_norms = self._get_squared_norms(X)
+
+        if X_centers is not None and X_centers.shape[0]:
+            min_distances = self._get_min_distances_to_centers(X, squared_norms, X_centers)
+            next_index = np.argmax(min_distances)
+        else:
+            min_distances = np.full(sample_count, np.inf)
+
+            # Starting from the sample farthest from the pool's mean
+            mean = np.asarray(X.mean(axis=0)).ravel()
+            next_index = np.argmax(squared_norms - 2 * self._dot(X, mean))
+
+        chosen_indexes = np.empty(n_centers, dtype=np.int64)
+
+        for pick in range(n_centers):
+            chosen_indexes[pick] = next_index
+
+            center = X[next_index]
+            if sparse.issparse(center):
+                center = center.toarray()
+            center = np.asarray(center).ravel()
+
+            distances = squared_norms - 2 * self._dot(X, center) + squared_norms[next_index]
+            np.minimum(min_distances, distances, out=min_distances)
+
+            # Chosen samples are never picked again, even if remaining samples are their duplicates
+            min_distances[next_index] = -1.0
+            next_index = np.argmax(min_distances)
+
+        return chosen_indexes
+
+    def _get_min_distances_to_centers(self, X, squared_norms, X_centers):
+        """
+        Returns squared euclidean distances of samples to their nearest centers, comparing a block of centers at once
+        :param X: scipy.sparse or np.array
+        :param squared_norms: np.array
+        :param X_centers: scipy.sparse or np.array
+        :return: np.array
+        """
+        min_distances = np.full(X.shape[0], np.inf)
+        centers_squared_norms = self._get_squared_norms(X_centers)
+
+        for block_start in range(0, X_centers.shape[0], self.block_size):
+            block = slice(block_start, block_start + self.block_size)
+            products = X.dot(X_centers[block].T)
+            if sparse.issparse(products):
+                products = products.toarray()
+
+            distances = squared_norms[:, np.newaxis] - 2 * np.asarray(products) + centers_squared_norms[block]
+            np.minimum(min_distances, distances.min(axis=1), out=min_distances)
+
+        return np.maximum(min_distances, 0.0)
+
+    def _get_squared_norms(self, X):
+        """
+        Returns squared euclidean norms of samples
+        :param X: scipy.sparse or np.array
+        :return: np.array
+        """
+        if sparse.issparse(X):
+            return np.asarray(X.multiply(X).sum(axis=1), dtype=np.float64).ravel()
+
+        X = np.asarray(X, dtype=np.float64)
+        return np.einsum('ij,ij->i', X, X)
+
+    def _dot(self, X, vector):
+        """
+        Returns dot products of samples with a dense vector
+        :param X: scipy.sparse or np.array
+        :param vector: np.array
+        :return: np.array
+        """
+        return np.asarray(X.dot(vector), dtype=np.float64).ravel()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+
+class KeywordMatcher:
+    """
+    Finds which keyword a word contains with an Aho-Corasick automaton, in one pass over the word regardless of the
+    number of keywords. Matching is case insensitive. If a word contains many keywords, the last one in keywords' order
+    is returned.
+    """
+
+    __shared_matchers = {}
+    __lock = threading.Lock()
+
+    def __init__(self, keywords):
+        """
+        Constructor method
+        :param keywords: list, keywords in priority order, later ones win
+        :return: KeywordMatcher
+        """
+        self.keywords = list(keywords)
+
+        # Automaton states: transitions, failure link and index of the best keyword ending at the state
+        self.__transitions = [{}]
+        self.__failures = [0]
+        self.__best_indexes = [-1]
+
+        for keyword_index, keyword in enumerate(self.keywords):
+            self._add_keyword(keyword_index, self._normalize(keyword))
+
+        self._build_failure_links()
+
+        self.__last_index = len(self.keywords) - 1
+
+    @classmethod
+    def get_shared(cls, keywords):
+        """
+        Returns the matcher of given keywords, builds it once per process
+        :param keywords: list
+        :return: KeywordMatcher
+        """
+        matcher_key = tuple(keywords)
+
+        with cls.__lock:
+            matcher = cls.__shared_matchers.get(matcher_key)
+
+            if matcher is None:
+                matcher = KeywordMatcher(keywords)
+                cls.__shared_matchers[matcher_key] = matcher
+
+            return matcher
+
+    def match(self, word):
+        """
+        Returns the keyword contained by the word
+        :param word: string
+        :return: string, or None if word contains no keyword
+        """
+        transitions = self.__transitions
+        failures = self.__failures
+        best_indexes = self.__best_indexes
+
+        # An empty keyword is contained by every word
+        state = 0
+        best_index = best_indexes[0]
+
+        for character in self._normalize(word):
+            while state and character not in transitions[state]:
+                state = failures[state]
+            state = transitions[state].get(character, 0)
+
+            if best_indexes[state] > best_index:
+                best_index = best_indexes[state]
+
+                # Nothing can beat the last keyword
+                if best_index == self.__last_index:
+                    break
+
+        if best_index < 0:
+            return None
+        return self.keywords[best_index]
+
+    def match_many(self, words):
+        """
+        Tags a list of words with the keywords they contain
+        :param words: iterable, words
+        :return: list, keyword or None for each word
+        """
+        match = self.match
+        return [match(word) for word in words]
+
+    def _normalize(self, text):
+        """
+        Lowercases text, byte strings are decoded as utf-8 so they match unicode words
+        :param text: string
+        :return: unicode
+        """
+        if not isinstance(text, unicode):
+            text = text.decode('utf-8')
+        return text.lower()
+
+    def _add_keyword(self, keyword_index, keyword):
+        """
+        Adds a keyword to the trie
+        :param keyword_index: int, priority of the keyword
+        :param keyword: unicode, normalized keyword
+        :return: void
+        """
+        state = 0
+        for character in keyword:
+            next_state = self.__transitions[state].get(character)
+
+            if next_state is None:
+                next_state = len(self.__transitions)
+                self.__transitions.append({})
+                self.__failures.append(0)
+                self.__best_indexes.append(-1)
+                self.__transitions[state][character] = next_state
+
+            state = next_state
+
+        self.__best_indexes[state] = max(self.__best_indexes[state], keyword_index)
+
+    def _build_failure_links(self):
+        """
+        Sets failure links breadth first. A state's best keyword also covers the keywords ending at its failure
+        states, which are its suffixes.
+        :return: void
+        """
+        queue = list(self.__transitions[0].values())
+        position = 0
+
+        while position < len(queue):
+            state = queue[position]
+            position += 1
+
+            for character, next_state in self.__transitions[state].iteritems():
+                failure = self.__failures[state]
+                while failure and character not in self.__transitions[failure]:
+                    failure = self.__failures[failure]
+
+                self.__failures[next_state] = self.__transitions[failure].get(character, 0)
+                self.__best_indexes[next_state] = max(self.__best_indexes[next_state],
+                                                      self.__best_indexes[self.__failures[next_state]])
+                queue.append(next_state)
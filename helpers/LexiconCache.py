@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+
+from config import *
+from helpers.AppendOnlyCache import AppendOnlyCache
+
+
+class LexiconCache:
+    """
+    Zemberek results shared by all brands and all processes. Zemberek results don't depend on the brand, so they're
+    stored once. Only special keyword handling depends on the brand, those entries are stored as per-brand overrides.
+    """
+
+    SUGGESTION = 'suggestion'
+    ROOT = 'root'
+
+    __shared_lexicons = {}
+    __lock = threading.Lock()
+
+    def __init__(self, file_path):
+        """
+        Constructor method
+        :param file_path: string, path of the shared lexicon log
+        :return: LexiconCache
+        """
+        self.__store = AppendOnlyCache(file_path)
+
+    @classmethod
+    def get_shared(cls):
+        """
+        Returns the lexicon of the current process, creates it if necessary
+        :return: LexiconCache
+        """
+        with cls.__lock:
+            lexicon = cls.__shared_lexicons.get(os.getpid())
+
+            if lexicon is None:
+                lexicon = LexiconCache(PROJECT_ROOT_DIRECTORY + DICTIONARIES_DIR_NAME + LEXICON_CACHE_FILE_NAME)
+                cls.__shared_lexicons = {os.getpid(): lexicon}
+
+            return lexicon
+
+    def get_view(self, kind, brand):
+        """
+        Returns a dict-like view of the lexicon for given kind and brand
+        :param kind: string, SUGGESTION or ROOT
+        :param brand: string, model name
+        :return: LexiconView
+        """
+        return LexiconView(self, kind, brand)
+
+    def lookup(self, kind, brand, word):
+        """
+        Returns brand's override if there's one, shared entry otherwise. Almost no word has an override, so its key is
+        only looked up in memory, other processes' entries are read only when the shared entry is missing.
+        :param kind: string
+        :param brand: string
+        :param word: string
+        :return: string or None
+        """
+        override_key = self._get_key(kind, word, brand)
+        override = self.__store.peek(override_key)
+        if override is not None:
+            return override
+
+        shared_value = self.__store.get(self._get_key(kind, word))
+
+        # Reading other processes' entries may have brought an override too
+        override = self.__store.peek(override_key)
+        if override is not None:
+            return override
+
+        return shared_value
+
+    def set_shared(self, kind, word, value):
+        """
+        Stores a brand independent entry
+        :param kind: string
+        :param word: string
+        :param value: string
+        :return: void
+        """
+        self.__store[self._get_key(kind, word)] = value
+
+    def set_override(self, kind, brand, word, value):
+        """
+        Stores a brand's override, only if it differs from the shared entry
+        :param kind: string
+        :param brand: string
+        :param word: string
+        :param value: string
+        :return: void
+        """
+        if self.__store.get(self._get_key(kind, word)) != value:
+            self.__store[self._get_key(kind, word, brand)] = value
+
+    def update_shared(self, kind, entries):
+        """
+        Stores many brand independent entries with one write
+        :param kind: string
+        :param entries: dict, word to value
+        :return: void
+        """
+        self.__store.update(dict((self._get_key(kind, word), value) for word, value in entries.iteritems()))
+
+    def migrate_brand_cache(self, kind, brand, brand_cache):
+        """
+        Imports a brand's old cache. Entries resolved to a special keyword are imported as the brand's overrides.
+        :param kind: string
+        :param brand: string
+        :param brand_cache: AppendOnlyCache
+        :return: void
+        """
+        migration_key = self._get_key('migrated', kind, brand)
+        if migration_key in self.__store:
+            return
+
+        print("Migrating " + str(len(brand_cache)) + " entries from " + brand_cache.file_path + " to shared lexicon.")
+        shared_entries = {}
+        for word, value in brand_cache.iteritems():
+            if value in SPECIAL_KEYWORDS:
+                self.set_override(kind, brand, word, value)
+            elif self.lookup(kind, brand, word) is None:
+                shared_entries[word] = value
+
+        self.update_shared(kind, shared_entries)
+        self.__store[migration_key] = brand
+
+    def save(self):
+        """
+        Makes sure everything is on disk
+        :return: void
+        """
+        self.__store.save()
+
+    def _get_key(self, kind, word, brand=None):
+        """
+        Returns store key. Words never contain tabs, they're split by whitespace.
+        :param kind: string
+        :param word: string
+        :param brand: string
+        :return: string
+        """
+        if brand is None:
+            return kind + '\t' + word
+        return kind + '\t' + word + '\t' + brand
+
+
+class LexiconView:
+    """
+    Dict-like view of the lexicon for a kind and a brand, used as suggestion and root cache by PreprocessManager
+    """
+
+    def __init__(self, lexicon, kind, brand):
+        """
+        Constructor method
+        :param lexicon: LexiconCache
+        :param kind: string
+        :param brand: string
+        :return: LexiconView
+        """
+        self.__lexicon = lexicon
+        self.__kind = kind
+        self.__brand = brand
+
+    def __contains__(self, word):
+        return self.__lexicon.lookup(self.__kind, self.__brand, word) is not None
+
+    def __getitem__(self, word):
+        value = self.__lexicon.lookup(self.__kind, self.__brand, word)
+        if value is None:
+            raise KeyError(word)
+        return value
+
+    def __setitem__(self, word, value):
+        self.__lexicon.set_shared(self.__kind, word, value)
+
+    def set_override(self, word, value):
+        """
+        Stores brand's special keyword handling of a word
+        :param word: string
+        :param value: string
+        :return: void
+        """
+        self.__lexicon.set_override(self.__kind, self.__brand, word, value)
+
+    def update(self, entries):
+        self.__lexicon.update_shared(self.__kind, entries)
+
+    def save(self):
+        self.__lexicon.save()
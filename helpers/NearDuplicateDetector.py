@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+import zlib
+import collections
+import numpy as np
+
+from config import *
+
+
+class NearDuplicateDetector:
+    """
+    Groups retweets and copy-pasted tweets into clusters with MinHash signatures and locality sensitive hashing.
+    Cleaned texts are compared by their character shingles. Each text is hashed once and only texts sharing an LSH
+    bucket are compared, so cost grows linearly with the number of tweets.
+    """
+
+    DROP = 'drop'
+    COLLAPSE = 'collapse'
+    WEIGHT = 'weight'
+
+    # Largest prime below 2^32, a * x + b stays in uint64 for 32 bit shingle hashes
+    __PRIME = 4294967291
+
+    def __init__(self, threshold=NEAR_DUPLICATE_THRESHOLD, permutation_count=MINHASH_PERMUTATION_COUNT,
+                 band_count=MINHASH_BAND_COUNT, shingle_size=MINHASH_SHINGLE_SIZE, seed=0):
+        """
+        Constructor method
+        :param threshold: float, estimated jaccard similarity for two texts to be near-duplicates
+        :param permutation_count: int, length of minhash signatures
+        :param band_count: int, lsh bands, must divide permutation_count
+        :param shingle_size: int, characters in a shingle
+        :param seed: int, seed of hash functions
+        :return: NearDuplicateDetector
+        """
+        if permutation_count % band_count:
+            raise ValueError("permutation_count must be a multiple of band_count.")
+
+        self.threshold = threshold
+        self.permutation_count = permutation_count
+        self.band_count = band_count
+        self.shingle_size = shingle_size
+
+        random_state = np.random.RandomState(seed)
+        self.__a = random_state.randint(1, self.__PRIME, size=permutation_count).astype(np.uint64)
+        self.__b = random_state.randint(0, self.__PRIME, size=permutation_count).astype(np.uint64)
+
+    def find_clusters(self, texts):
+        """
+        Finds near-duplicate clusters of texts
+        :param texts: list, cleaned texts, e.g. output of Preprocessor.clean_all
+        :return: list, cluster id of each text, which is the index of cluster's first text
+        """
+        parents = range(len(texts))
+
+        # Exact copies don't need signatures
+        first_indexes_of_texts = {}
+        unique_indexes = []
+        for idx, text in enumerate(texts):
+            normalized_text = text.lower()
+            if normalized_text in first_indexes_of_texts:
+                parents[idx] = first_indexes_of_texts[normalized_text]
+            else:
+                first_indexes_of_texts[normalized_text] = idx
+                unique_indexes.append(idx)
+
+        signatures = dict((idx, self._get_signature(texts[idx].lower())) for idx in unique_indexes)
+        rows_per_band = self.permutation_count / self.band_count
+
+        for band in range(self.band_count):
+            band_slice = slice(band * rows_per_band, (band + 1) * rows_per_band)
+            buckets = {}
+
+            for idx in unique_indexes:
+                band_key = signatures[idx][band_slice].tostring()
+
+                # Members are compared only to the first text of the bucket, not to each other
+                bucket_head = buckets.setdefault(band_key, idx)
+                if bucket_head != idx and self._find_root(parents, idx) != self._find_root(parents, bucket_head) and \
+                        self._estimate_similarity(signatures[idx], signatures[bucket_head]) >= self.threshold:
+                    self._union(parents, idx, bucket_head)
+
+        return [self._find_root(parents, idx) for idx in range(len(texts))]
+
+    def get_cluster_sizes(self, cluster_ids):
+        """
+        Returns how many clusters there are of each size
+        :param cluster_ids: list, output of find_clusters
+        :return: OrderedDict, cluster size to number of clusters, sorted by size
+        """
+        size_counts = collections.Counter(collections.Counter(cluster_ids).values())
+        return collections.OrderedDict(sorted(size_counts.items()))
+
+    def print_cluster_report(self, cluster_ids, top_n=10):
+        """
+        Prints number of duplicates and the largest cluster sizes
+        :param cluster_ids: list, output of find_clusters
+        :param top_n: int, number of largest clusters to print
+        :return: void
+        """
+        cluster_sizes = collections.Counter(cluster_ids)
+        duplicate_count = len(cluster_ids) - len(cluster_sizes)
+
+        print(str(len(cluster_ids)) + " tweets in " + str(len(cluster_sizes)) + " clusters, " + str(duplicate_count) +
+              " near-duplicates.")
+        print("Largest clusters' sizes: " + str([size for cluster_id, size in cluster_sizes.most_common(top_n)]))
+
+        for size, cluster_count in self.get_cluster_sizes(cluster_ids).iteritems():
+            print("Size " + str(size) + ": " + str(cluster_count) + " clusters")
+
+    def reduce(self, cluster_ids, classes, mode):
+        """
+        Applies a duplicate handling mode
+        drop: keeps the first tweet of each cluster with its own class
+        collapse: keeps the first tweet of each cluster with the most common class of the cluster
+        weight: keeps all tweets, weights them by 1 / cluster size so every cluster counts once
+        :param cluster_ids: list, output of find_clusters
+        :param classes: list, classes of tweets
+        :param mode: string, DROP, COLLAPSE or WEIGHT
+        :return: list, list, list, kept indexes, their classes and their sample weights
+        """
+        cluster_sizes = collections.Counter(cluster_ids)
+
+        if mode == self.WEIGHT:
+            kept_indexes = range(len(cluster_ids))
+            weights = [1.0 / cluster_sizes[cluster_id] for cluster_id in cluster_ids]
+            return kept_indexes, list(classes), weights
+
+        kept_indexes = [idx for idx, cluster_id in enumerate(cluster_ids) if idx == cluster_id]
+
+        if mode == self.DROP:
+            kept_classes = [classes[idx] for idx in kept_indexes]
+        elif mode == self.COLLAPSE:
+            clusters_classes = collections.defaultdict(collections.Counter)
+            for cluster_id, a_class in zip(cluster_ids, classes):
+                clusters_classes[cluster_id][a_class] += 1
+
+            # Ties are broken in favor of the first tweet's class
+            kept_classes = []
+            for idx in kept_indexes:
+                class_counts = clusters_classes[idx]
+                most_common_count = max(class_counts.values())
+                if class_counts[classes[idx]] == most_common_count:
+                    kept_classes.append(classes[idx])
+                else:
+                    kept_classes.append(class_counts.most_common(1)[0][0])
+        else:
+            raise ValueError("Unknown near-duplicate mode: " + str(mode))
+
+        return kept_indexes, kept_classes, [1.0] * len(kept_indexes)
+
+    def _get_signature(self, text):
+        """
+        Returns minhash signature of a text
+        :param text: unicode, normalized text
+        :return: numpy.ndarray, uint64
+        """
+        if not isinstance(text, unicode):
+            text = text.decode('utf-8')
+
+        shingle_count = max(1, len(text) - self.shingle_size + 1)
+        shingle_hashes = np.fromiter((zlib.crc32(text[i:i + self.shingle_size].encode('utf-8')) & 0xffffffff
+                                      for i in range(shingle_count)), dtype=np.uint64, count=shingle_count)
+
+        hashes = (np.outer(self.__a, shingle_hashes) + self.__b[:, np.newaxis]) % np.uint64(self.__PRIME)
+        return hashes.min(axis=1)
+
+    def _estimate_similarity(self, signature_one, signature_two):
+        """
+        Estimates jaccard similarity of two texts from their signatures
+        :param signature_one: numpy.ndarray
+        :param signature_two: numpy.ndarray
+        :return: float
+        """
+        return np.count_nonzero(signature_one == signature_two) / float(self.permutation_count)
+
+    def _find_root(self, parents, idx):
+        """
+        Finds cluster id of a text, with path halving
+        :param parents: list
+        :param idx: int
+        :return: int
+        """
+        while parents[idx] != idx:
+            parents[idx] = parents[parents[idx]]
+            idx = parents[idx]
+        return idx
+
+    def _union(self, parents, idx_one, idx_two):
+        """
+        Merges clusters of two texts, smaller index becomes the cluster id so the first text represents the cluster
+        :param parents: list
+        :param idx_one: int
+        :param idx_two: int
+        :return: void
+        """
+        root_one = self._find_root(parents, idx_one)
+        root_two = self._find_root(parents, idx_two)
+
+        if root_one < root_two:
+            parents[root_two] = root_one
+        elif root_two < root_one:
+            parents[root_one] = root_two
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from sklearn.svm import SVC
+from sklearn.multiclass import OneVsRestClassifier
+
+
+class PrecomputedKernelClassifier:
+    """
+    Wraps a classifier to fit and predict rows given by their indexes in a GramMatrix. An SVC with a linear or a
+    polynomial kernel, alone or in OneVsRestClassifier, is switched to kernel='precomputed' and gets submatrices of the
+    gram matrix, so kernel values of the same rows aren't computed again in every fit. Other classifiers get the rows'
+    features.
+    """
+
+    def __init__(self, classifier, gram_matrix):
+        """
+        Constructor method
+        :param classifier: sklearn classifier
+        :param gram_matrix: GramMatrix
+        :return: PrecomputedKernelClassifier
+        """
+        self.classifier = classifier
+        self.gram_matrix = gram_matrix
+
+        svc = classifier.estimator if isinstance(classifier, OneVsRestClassifier) else classifier
+        self.__kernel_parameters = self._get_kernel_parameters(svc)
+
+        if self.__kernel_parameters is not None:
+            svc.set_params(kernel='precomputed')
+
+        self.__train_indexes = None
+
+    def fit(self, X_rows, y):
+        """
+        Fits the classifier
+        :param X_rows: np.array, row indexes as a column
+        :param y: np.array
+        :return: PrecomputedKernelClassifier
+        """
+        self.__train_indexes = X_rows[:, 0]
+        self.classifier.fit(self._get_input(self.__train_indexes), y)
+        return self
+
+    def partial_fit(self, X_rows, y, classes=None):
+        """
+        Updates the classifier with more rows, only for classifiers fitted with features
+        :param X_rows: np.array, row indexes as a column
+        :param y: np.array
+        :param classes: np.array, all classes, needed in the first call
+        :return: PrecomputedKernelClassifier
+        """
+        if self.__kernel_parameters is not None:
+            raise ValueError("A classifier with a precomputed kernel can't be updated incrementally.")
+
+        self.classifier.partial_fit(self._get_input(X_rows[:, 0]), y, classes=classes)
+        return self
+
+    def predict(self, X_rows):
+        """
+        Predicts classes of rows
+        :param X_rows: np.array, row indexes as a column
+        :return: np.array
+        """
+        return self.classifier.predict(self._get_input(X_rows[:, 0]))
+
+    def predict_proba(self, X_rows):
+        """
+        Predicts class probabilities of rows
+        :param X_rows: np.array, row indexes as a column
+        :return: np.array
+        """
+        return self.classifier.predict_proba(self._get_input(X_rows[:, 0]))
+
+    def decision_function(self, X_rows):
+        """
+        Returns decision function values of rows
+        :param X_rows: np.array, row indexes as a column
+        :return: np.array
+        """
+        return self.classifier.decision_function(self._get_input(X_rows[:, 0]))
+
+    def _get_input(self, row_indexes):
+        """
+        Returns kernel values of rows with train rows, or features of rows if the kernel isn't precomputed
+        :param row_indexes: np.array, int
+        :return: np.array or scipy.sparse.csr_matrix
+        """
+        if self.__kernel_parameters is None:
+            return self.gram_matrix.X_sparse[row_indexes]
+
+        gamma, coef0, degree = self.__kernel_parameters
+
+        # Same formula with libsvm: (gamma * <x, y> + coef0) ^ degree
+        kernel = self.gram_matrix.get_dot_products(row_indexes, self.__train_indexes)
+        if gamma != 1.0:
+            kernel *= gamma
+        if coef0:
+            kernel += coef0
+        if degree != 1:
+            kernel **= degree
+
+        return kernel
+
+    def _get_kernel_parameters(self, svc):
+        """
+        Returns gamma, coef0 and degree which make the svc's kernel from dot products
+        :param svc: sklearn estimator
+        :return: tuple, or None if the kernel can't be precomputed from dot products
+        """
+        if not isinstance(svc, SVC):
+            return None
+
+        if svc.kernel == 'linear':
+            return 1.0, 0.0, 1
+
+        if svc.kernel == 'poly':
+            if svc.gamma in ('auto', 'auto_deprecated'):
+                gamma = 1.0 / self.gram_matrix.X_sparse.shape[1]
+            elif isinstance(svc.gamma, (int, float, np.number)):
+                gamma = float(svc.gamma)
+            else:
+                # 'scale' depends on variance of the train set
+                return None
+
+            return gamma, float(svc.coef0), svc.degree
+
+        return None
@@ -7,6 +7,8 @@ import json
 import string
 import difflib
 
+from helpers.CleaningEngine import CleaningEngine
+
 class Preprocessor:
     """
     This is a helper classin preprocessing step which removes irrelevant information from tweets
@@ -18,6 +20,7 @@ class Preprocessor:
         """
         self.regexpForURLs = 'http[s]?:?/?/(?:[a-zA-Z]|[0-9]|[$-_@.&+]|\
                               [!*\(\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
+        self.compiledURLRegex = re.compile(self.regexpForURLs)
         self.compiledDigitRegex = re.compile('\d')
         self.compiledAlphanumericRegex = re.compile('\W+', re.UNICODE)
         self.compiledRTRegex = re.compile(r'RT')
@@ -25,7 +28,33 @@ class Preprocessor:
         eyes, noses, mouths = r':;8BX=', r'-~\'^', r')\(/\|ODP'
         self.pattern1 = "[%s][%s]?[%s]" % tuple(map(re.escape, [eyes, noses, mouths]))
 
+        try:
+            self.compiledHighpointsRegex = re.compile(u'[\U00010000-\U0010ffff]')
+        except re.error:
+            # UCS-2 build
+            self.compiledHighpointsRegex = re.compile(u'[\uD800-\uDBFF][\uDC00-\uDFFF]')
+
+        self.cleaningEngine = CleaningEngine(self.regexpForURLs, self.pattern1, eyes, noses, mouths,
+                                             self.clean_all_step_by_step)
+
     def clean_all(self, tweet):
+        """
+        Removes all irrelevant information from a given tweet's text in one scan. Gives the same result with
+        clean_all_step_by_step.
+        :param tweet: String
+        :return: String
+        """
+        return self.cleaningEngine.clean(tweet)
+
+    def clean_many(self, tweets):
+        """
+        Removes all irrelevant information from given tweets' texts lazily
+        :param tweets: iterable, list or iterator of texts
+        :return: generator, cleaned texts in the same order
+        """
+        return self.cleaningEngine.clean_many(tweets)
+
+    def clean_all_step_by_step(self, tweet):
         """
         Makes necessary function calls to remove all irrelevant information from a given tweet's text.
         :param tweet: String
@@ -72,7 +101,7 @@ class Preprocessor:
         :param tweet:
         :return:
         """
-        self.urls = re.findall(self.regexpForURLs, tweet)
+        self.urls = re.findall(self.compiledURLRegex, tweet)
 
         for url in self.urls:
             tweet = tweet.replace(url, '')
@@ -122,14 +151,7 @@ class Preprocessor:
         for smiley in smileys:
             tweet = tweet.replace(smiley, '')
 
-        try:
-            highpoints = re.compile(u'[\U00010000-\U0010ffff]')
-
-        except re.error:
-            # UCS-2 build
-            highpoints = re.compile(u'[\uD800-\uDBFF][\uDC00-\uDFFF]')
-
-        tweet = highpoints.sub(u'', tweet)
+        tweet = self.compiledHighpointsRegex.sub(u'', tweet)
 
         tweet =  self.clean_unnecessary_whitespaces(tweet)
         return tweet
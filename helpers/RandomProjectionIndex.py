@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from config import *
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+
+class RandomProjectionIndex:
+    """
+    Approximate nearest neighbour index of count vectors by cosine distance, with random hyperplane locality sensitive
+    hashing. Each table hashes a vector to the signs of its projections on hash_size random hyperplanes, so vectors
+    with a small angle between them likely share a bucket. A query is compared only to the indexed vectors sharing a
+    bucket with it in any table, at most max_bucket_candidates of a bucket, so cost grows linearly with the number of
+    vectors instead of building a pairwise distance matrix, even if a bucket is filled by a retweet cluster.
+    """
+
+    def __init__(self, table_count=LSH_TABLE_COUNT, hash_size=LSH_HASH_SIZE,
+                 max_bucket_candidates=LSH_MAX_BUCKET_CANDIDATES, seed=0):
+        """
+        Constructor method
+        :param table_count: int, hash tables, more tables find more candidates
+        :param hash_size: int, hyperplanes of a table, more hyperplanes make smaller buckets
+        :param max_bucket_candidates: int, indexed vectors of a bucket compared to a query at most, evenly spaced in
+        larger buckets
+        :param seed: int, seed of hyperplanes
+        :return: RandomProjectionIndex
+        """
+        if not 0 < hash_size < 63:
+            raise ValueError("hash_size must be between 1 and 62.")
+        if max_bucket_candidates < 1:
+            raise ValueError("max_bucket_candidates must be positive.")
+
+        self.table_count = table_count
+        self.hash_size = hash_size
+        self.max_bucket_candidates = max_bucket_candidates
+        self.seed = seed
+
+        self.__hyperplanes = None
+        self.__X_indexed = None
+        self.__sorted_codes = None
+        self.__code_orders = None
+
+    def fit(self, X):
+        """
+        Indexes vectors
+        :param X: scipy.sparse or np.array, n_samples x n_features
+        :return: RandomProjectionIndex
+        """
+        self.__X_indexed = normalize(sparse.csr_matrix(X, dtype=np.float64))
+
+        random_state = np.random.RandomState(self.seed)
+        self.__hyperplanes = random_state.standard_normal((X.shape[1], self.table_count * self.hash_size))
+
+        codes = self._get_codes(self.__X_indexed)
+        self.__code_orders = np.argsort(codes, axis=0, kind='mergesort')
+        self.__sorted_codes = codes[self.__code_orders, np.arange(self.table_count)]
+
+        return self
+
+    def get_nearest_distances(self, X):
+        """
+        Returns approximate cosine distances of vectors to their nearest indexed vectors. A vector sharing no bucket
+        with any indexed vector gets 1.0, the largest distance between count vectors. A vector without features gets 0.0
+        since it can't be compared.
+        :param X: scipy.sparse or np.array, n_samples x n_features
+        :return: np.array, n_samples
+        """
+        if self.__X_indexed is None:
+            raise ValueError("Index must be fitted before querying.")
+
+        X_query = normalize(sparse.csr_matrix(X, dtype=np.float64))
+        query_codes = self._get_codes(X_query)
+
+        query_indexes, indexed_indexes = self._get_candidate_pairs(query_codes)
+
+        distances = np.ones(X_query.shape[0], dtype=np.float64)
+        distances[X_query.getnnz(axis=1) == 0] = 0.0
+
+        if len(query_indexes):
+            similarities = np.asarray(X_query[query_indexes].multiply(self.__X_indexed[indexed_indexes]).sum(axis=1))
+            candidate_distances = np.clip(1.0 - similarities.ravel(), 0.0, 1.0)
+
+            # Pairs are sorted by query, minimum of each query's run
+            run_starts = np.flatnonzero(np.r_[True, query_indexes[1:] != query_indexes[:-1]])
+            queried = query_indexes[run_starts]
+            distances[queried] = np.minimum(distances[queried],
+                                            np.minimum.reduceat(candidate_distances, run_starts))
+
+        return distances
+
+    def find_most_distinct(self, X, n_samples):
+        """
+        Returns indexes of the vectors farthest from their nearest indexed vectors, most distinct first
+        :param X: scipy.sparse or np.array, n_samples x n_features
+        :param n_samples: int
+        :return: np.array
+        """
+        negative_distances = -self.get_nearest_distances(X)
+        n_samples = min(n_samples, len(negative_distances))
+
+        if n_samples < len(negative_distances):
+            top_indexes = np.argpartition(negative_distances, n_samples - 1)[:n_samples]
+        else:
+            top_indexes = np.arange(len(negative_distances))
+
+        # Ties keep the vectors' order
+        top_indexes = np.sort(top_indexes)
+        return top_indexes[np.argsort(negative_distances[top_indexes], kind='mergesort')]
+
+    def _get_codes(self, X_normalized):
+        """
+        Returns bucket codes of vectors in each table
+        :param X_normalized: scipy.sparse.csr_matrix
+        :return: np.array, n_samples x table_count, int64
+        """
+        signs = np.asarray(X_normalized.dot(self.__hyperplanes)) > 0
+        signs = signs.reshape(X_normalized.shape[0], self.table_count, self.hash_size)
+
+        bit_values = np.left_shift(np.int64(1), np.arange(self.hash_size, dtype=np.int64))
+        return signs.dot(bit_values)
+
+    def _get_candidate_pairs(self, query_codes):
+        """
+        Returns distinct pairs of queries and indexed vectors sharing a bucket in any table, sorted by query. A query
+        is paired with at most max_bucket_candidates vectors of a bucket, spread evenly over the bucket.
+        :param query_codes: np.array, n_queries x table_count
+        :return: np.array, np.array, query indexes and indexed vector indexes
+        """
+        indexed_count = self.__X_indexed.shape[0]
+        pair_keys = []
+
+        for table in range(self.table_count):
+            sorted_codes = self.__sorted_codes[:, table]
+            bucket_starts = np.searchsorted(sorted_codes, query_codes[:, table], side='left')
+            bucket_sizes = np.searchsorted(sorted_codes, query_codes[:, table], side='right') - bucket_starts
+            candidate_counts = np.minimum(bucket_sizes, self.max_bucket_candidates)
+
+            pair_count = candidate_counts.sum()
+            if not pair_count:
+                continue
+
+            # j-th candidate of a query is at j * bucket size / candidate count in its bucket, j itself if not capped
+            query_indexes = np.repeat(np.arange(len(bucket_sizes), dtype=np.int64), candidate_counts)
+            run_offsets = np.arange(pair_count) - np.repeat(np.cumsum(candidate_counts) - candidate_counts,
+                                                            candidate_counts)
+            bucket_offsets = run_offsets * np.repeat(bucket_sizes, candidate_counts) // \
+                             np.repeat(candidate_counts, candidate_counts)
+            indexed_indexes = self.__code_orders[np.repeat(bucket_starts, candidate_counts) + bucket_offsets, table]
+
+            pair_keys.append(query_indexes * indexed_count + indexed_indexes)
+
+        if not pair_keys:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+
+        pair_keys = np.unique(np.concatenate(pair_keys))
+        return pair_keys // indexed_count, pair_keys % indexed_count
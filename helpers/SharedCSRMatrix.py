@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import shutil
+import tempfile
+import threading
+import numpy as np
+
+from config import *
+from scipy import sparse
+
+
+class SharedCSRMatrix:
+    """
+    A CSR matrix and its label codes stored as .npy files in a directory, preferably on a memory file system. Worker
+    processes attach to it by name and memory-map the arrays read-only, so they share one copy of the data and tasks
+    only send the name.
+    """
+
+    __attached_matrices = {}
+    __lock = threading.Lock()
+
+    __ARRAY_NAMES = ('data', 'indices', 'indptr', 'label_codes', 'features')
+
+    def __init__(self, name, X_sparse, label_codes, label_names, features):
+        """
+        Constructor method, use create or attach
+        :param name: string, directory of the arrays
+        :param X_sparse: scipy.sparse.csr_matrix
+        :param label_codes: numpy.ndarray, int
+        :param label_names: list, label of each code
+        :param features: np.array
+        :return: SharedCSRMatrix
+        """
+        self.name = name
+        self.X_sparse = X_sparse
+        self.label_codes = label_codes
+        self.label_names = label_names
+        self.features = features
+
+    @classmethod
+    def create(cls, X_sparse, labels, features, label_names=SENTIMENT_CLASSES):
+        """
+        Writes matrix, labels and features to a new directory
+        :param X_sparse: scipy.sparse matrix
+        :param labels: list, class of each row
+        :param features: list or np.array
+        :param label_names: list, possible labels
+        :return: SharedCSRMatrix
+        """
+        X_sparse = sparse.csr_matrix(X_sparse)
+
+        directory = SHARED_MATRIX_DIRECTORY if os.path.isdir(SHARED_MATRIX_DIRECTORY) else None
+        name = tempfile.mkdtemp(prefix='shared_csr_', dir=directory)
+
+        label_indexes = dict((label, code) for code, label in enumerate(label_names))
+        label_codes = np.array([label_indexes[label] for label in labels], dtype=np.int8)
+
+        arrays = {
+            'data': X_sparse.data,
+            'indices': X_sparse.indices,
+            'indptr': X_sparse.indptr,
+            'label_codes': label_codes,
+            'features': np.asarray(features)
+        }
+        for array_name, array in arrays.iteritems():
+            np.save(os.path.join(name, array_name + '.npy'), array)
+
+        with open(os.path.join(name, 'meta.json'), 'w') as meta_file:
+            json.dump({'shape': X_sparse.shape, 'label_names': list(label_names)}, meta_file)
+
+        return SharedCSRMatrix(name, X_sparse, label_codes, list(label_names), arrays['features'])
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Memory-maps a matrix created by another process, once per process
+        :param name: string
+        :return: SharedCSRMatrix
+        """
+        with cls.__lock:
+            attached_key = (os.getpid(), name)
+            shared_matrix = cls.__attached_matrices.get(attached_key)
+
+            if shared_matrix is None:
+                with open(os.path.join(name, 'meta.json'), 'r') as meta_file:
+                    meta = json.load(meta_file)
+
+                arrays = dict((array_name, np.load(os.path.join(name, array_name + '.npy'), mmap_mode='r'))
+                              for array_name in cls.__ARRAY_NAMES)
+
+                X_sparse = sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                                             shape=tuple(meta['shape']), copy=False)
+
+                # Json gives unicode, labels must stay the same type with SENTIMENT_CLASSES for LabelEncoder
+                label_names = [label.encode('utf-8') for label in meta['label_names']]
+
+                shared_matrix = SharedCSRMatrix(name, X_sparse, arrays['label_codes'], label_names, arrays['features'])
+                cls.__attached_matrices[attached_key] = shared_matrix
+
+            return shared_matrix
+
+    def get_labels(self):
+        """
+        Returns labels of rows
+        :return: list
+        """
+        return [self.label_names[code] for code in self.label_codes]
+
+    def unlink(self):
+        """
+        Removes the files, processes which already attached keep their mappings
+        :return: void
+        """
+        shutil.rmtree(self.name, ignore_errors=True)
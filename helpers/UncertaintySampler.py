@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+
+class UncertaintySampler:
+    """
+    Scores how uncertain a classifier is about samples and chooses the most uncertain ones. Whole probability matrices
+    are scored in single numpy calls along the last axis, so a stacked batch of matrices from many experiments, shaped
+    (n_experiments, n_samples, n_classes), is scored and sampled at once. Top k samples are found with argpartition
+    instead of sorting all samples.
+    """
+
+    STD = 'std'
+    MARGIN = 'margin'
+    LEAST_CONFIDENCE = 'least_confidence'
+    ENTROPY = 'entropy'
+
+    STRATEGIES = (STD, MARGIN, LEAST_CONFIDENCE, ENTROPY)
+
+    def __init__(self, strategy=STD):
+        """
+        Constructor method
+        :param strategy: string
+        std: small standart deviation of class probabilities
+        margin: small difference between the two highest class scores, works with decision function values too
+        least_confidence: small highest class probability
+        entropy: high entropy of class probabilities
+        :return: UncertaintySampler
+        """
+        if strategy not in self.STRATEGIES:
+            raise ValueError("Unknown uncertainty strategy: " + str(strategy) + ". Available strategies: " +
+                             ', '.join(self.STRATEGIES))
+
+        self.strategy = strategy
+
+    def score(self, class_scores):
+        """
+        Returns uncertainties of samples, higher is more uncertain
+        :param class_scores: np.array, (..., n_samples, n_classes) probabilities or decision function values, a 1-d
+        array is taken as signed distances of a binary decision function
+        :return: np.array, (..., n_samples)
+        """
+        class_scores = np.asarray(class_scores, dtype=np.float64)
+
+        if class_scores.ndim == 1:
+            if self.strategy != self.MARGIN:
+                raise ValueError("Only margin strategy can score a binary decision function.")
+            return -np.abs(class_scores)
+
+        if self.strategy == self.STD:
+            return -np.std(class_scores, axis=-1)
+
+        elif self.strategy == self.MARGIN:
+            two_highest_scores = np.partition(class_scores, -2, axis=-1)[..., -2:]
+            return two_highest_scores[..., 0] - two_highest_scores[..., 1]
+
+        elif self.strategy == self.LEAST_CONFIDENCE:
+            return 1.0 - np.max(class_scores, axis=-1)
+
+        # Entropy, 0 * log(0) is taken as 0
+        log_scores = np.log(np.clip(class_scores, np.finfo(np.float64).tiny, None))
+        return -np.sum(class_scores * log_scores, axis=-1)
+
+    def select(self, class_scores, k):
+        """
+        Returns indexes of the k most uncertain samples, most uncertain first
+        :param class_scores: np.array, (..., n_samples, n_classes), see score
+        :param k: int
+        :return: np.array, (..., k)
+        """
+        negative_uncertainties = -self.score(class_scores)
+        sample_count = negative_uncertainties.shape[-1]
+        k = min(k, sample_count)
+
+        # One row of uncertainties for each matrix of the batch
+        batch_shape = negative_uncertainties.shape[:-1]
+        negative_uncertainties = negative_uncertainties.reshape(-1, sample_count)
+        batch_rows = np.arange(negative_uncertainties.shape[0])[:, np.newaxis]
+
+        if k < sample_count:
+            top_indexes = np.argpartition(negative_uncertainties, k - 1, axis=-1)[:, :k]
+        else:
+            top_indexes = np.tile(np.arange(sample_count), (negative_uncertainties.shape[0], 1))
+
+        # Only the k chosen samples are sorted
+        order = np.argsort(negative_uncertainties[batch_rows, top_indexes], axis=-1, kind='mergesort')
+        top_indexes = top_indexes[batch_rows, order]
+
+        return top_indexes.reshape(batch_shape + (k,))
@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import Queue
+import select
+import zipfile
+import threading
+
+from config import *
+from subprocess import Popen, PIPE
+
+
+class ZemberekWorkerError(Exception):
+    """
+    Raised when a Zemberek worker can not answer a request
+    """
+    pass
+
+
+class ZemberekWorker:
+    """
+    A long-lived JVM process which answers one word per line over stdin/stdout
+    """
+
+    PING_REQUEST = "__PING__"
+    PING_RESPONSE = "__PONG__"
+
+    def __init__(self, mode, command):
+        """
+        Constructor method
+        :param mode: string, stem or suggest
+        :param command: list, command to start the JVM with
+        :return: ZemberekWorker
+        """
+        self.mode = mode
+        self.__command = command
+        self.__process = None
+        self.__buffer = ""
+        self.last_used_at = 0
+
+    def start(self):
+        """
+        Starts the JVM and waits until it answers a ping
+        :return: void
+        """
+        self.stop()
+        self.__buffer = ""
+        self.__process = Popen(self.__command + [self.mode], stdin=PIPE, stdout=PIPE, bufsize=0)
+
+        if not self.ping(ZEMBEREK_WORKER_STARTUP_TIMEOUT):
+            self.stop()
+            raise ZemberekWorkerError("Zemberek worker(" + self.mode + ") could not be started.")
+
+    def stop(self):
+        """
+        Stops the JVM if it's running
+        :return: void
+        """
+        if self.__process is not None:
+            try:
+                self.__process.stdin.close()
+                self.__process.kill()
+                self.__process.wait()
+            except (OSError, IOError):
+                pass
+            self.__process = None
+
+    def is_alive(self):
+        """
+        Checks if JVM is still running
+        :return: bool
+        """
+        return self.__process is not None and self.__process.poll() is None
+
+    def ping(self, timeout=ZEMBEREK_WORKER_REQUEST_TIMEOUT):
+        """
+        Health check of the worker
+        :param timeout: int, seconds
+        :return: bool
+        """
+        try:
+            return self._send_and_receive(self.PING_REQUEST, timeout) == self.PING_RESPONSE
+        except ZemberekWorkerError:
+            return False
+
+    def request(self, word, timeout=ZEMBEREK_WORKER_REQUEST_TIMEOUT):
+        """
+        Asks the worker for given word
+        :param word: string, word
+        :param timeout: int, seconds
+        :return: string, same output with the one-shot jar call
+        """
+        return self._send_and_receive(word, timeout)
+
+    def _send_and_receive(self, line, timeout):
+        """
+        Writes a line to worker's stdin and reads one line from its stdout
+        :param line: string
+        :param timeout: int, seconds
+        :return: string
+        """
+        if not self.is_alive():
+            raise ZemberekWorkerError("Zemberek worker(" + self.mode + ") is not running.")
+
+        if isinstance(line, unicode):
+            line = line.encode('utf-8')
+
+        # Words never contain new lines, but a stray one would break the protocol
+        line = line.replace("\n", " ").replace("\r", " ")
+
+        try:
+            self.__process.stdin.write(line + "\n")
+            self.__process.stdin.flush()
+        except (OSError, IOError):
+            raise ZemberekWorkerError("Zemberek worker(" + self.mode + ") crashed while writing.")
+
+        response = self._read_line(timeout)
+        self.last_used_at = time.time()
+
+        return response.decode('utf-8')
+
+    def _read_line(self, timeout):
+        """
+        Reads a line from worker's stdout within given timeout
+        :param timeout: int, seconds
+        :return: string
+        """
+        deadline = time.time() + timeout
+        stdout_fd = self.__process.stdout.fileno()
+
+        while "\n" not in self.__buffer:
+            remaining_time = deadline - time.time()
+            if remaining_time <= 0:
+                # Worker is in an unknown state, it must be restarted
+                self.stop()
+                raise ZemberekWorkerError("Zemberek worker(" + self.mode + ") timed out.")
+
+            readable, _, _ = select.select([stdout_fd], [], [], remaining_time)
+            if readable:
+                chunk = os.read(stdout_fd, 4096)
+                if not chunk:
+                    self.stop()
+                    raise ZemberekWorkerError("Zemberek worker(" + self.mode + ") crashed while reading.")
+                self.__buffer += chunk
+
+        line, self.__buffer = self.__buffer.split("\n", 1)
+        return line.rstrip("\r")
+
+
+class ZemberekWorkerPool:
+    """
+    Pool of long-lived Zemberek workers, so a JVM is started once per worker instead of once per word
+    """
+
+    def __init__(self, mode, pool_size=ZEMBEREK_WORKER_POOL_SIZE):
+        """
+        Constructor method
+        :param mode: string, stem or suggest
+        :param pool_size: int, number of worker processes
+        :return: ZemberekWorkerPool
+        """
+        self.mode = mode
+        self.pool_size = max(1, pool_size)
+        self.owner_pid = os.getpid()
+
+        self.__idle_workers = Queue.Queue()
+        self.__command = self._get_worker_command()
+
+        for _ in range(self.pool_size):
+            self.__idle_workers.put(ZemberekWorker(mode, self.__command))
+
+    def request(self, word):
+        """
+        Makes a request to one of the idle workers, restarts the worker and retries if it fails
+        :param word: string, word
+        :return: string, worker output
+        """
+        worker = self.__idle_workers.get()
+
+        try:
+            for attempt in range(ZEMBEREK_WORKER_MAX_RETRIES + 1):
+                try:
+                    self._ensure_healthy(worker)
+                    return worker.request(word)
+                except ZemberekWorkerError as e:
+                    print(str(e) + " Attempt:" + str(attempt + 1))
+                    worker.stop()
+
+            raise ZemberekWorkerError("Zemberek worker(" + self.mode + ") failed for word after retries.")
+        finally:
+            self.__idle_workers.put(worker)
+
+    def health_check(self):
+        """
+        Pings all idle workers and restarts the ones which are not healthy
+        :return: int, number of healthy workers
+        """
+        healthy_worker_count = 0
+        workers = [self.__idle_workers.get() for _ in range(self.pool_size)]
+
+        try:
+            for worker in workers:
+                try:
+                    if not worker.is_alive() or not worker.ping():
+                        worker.start()
+                    healthy_worker_count += 1
+                except ZemberekWorkerError as e:
+                    print(str(e))
+        finally:
+            for worker in workers:
+                self.__idle_workers.put(worker)
+
+        return healthy_worker_count
+
+    def close(self):
+        """
+        Stops all workers
+        :return: void
+        """
+        for _ in range(self.pool_size):
+            worker = self.__idle_workers.get()
+            worker.stop()
+            self.__idle_workers.put(worker)
+
+    def _ensure_healthy(self, worker):
+        """
+        Starts a worker which is not running yet or crashed, pings a worker which was idle for a long time
+        :param worker: ZemberekWorker
+        :return: void
+        """
+        if not worker.is_alive():
+            worker.start()
+        elif time.time() - worker.last_used_at > ZEMBEREK_WORKER_HEALTH_CHECK_INTERVAL and not worker.ping():
+            worker.start()
+
+    def _get_worker_command(self):
+        """
+        Returns the command which starts a worker, Zemberek libraries are extracted from the jar once
+        :return: list
+        """
+        lib_directory = JAR_FILE_DIR_NAME + ZEMBEREK_WORKER_LIB_DIR_NAME
+        jar_file_path = JAR_FILE_DIR_NAME + ZEMBEREK_ROOT_FINDER_JAR_FILE_NAME
+
+        with zipfile.ZipFile(jar_file_path) as jar_file:
+            library_names = [name for name in jar_file.namelist() if name.startswith('zemberek') and name.endswith('.jar')]
+
+            for library_name in library_names:
+                if not os.path.isfile(lib_directory + library_name):
+                    self._extract_library(jar_file, library_name, lib_directory + library_name)
+
+        class_path = os.pathsep.join([lib_directory + library_name for library_name in library_names])
+        source_file_path = JAR_FILE_DIR_NAME + ZEMBEREK_WORKER_SOURCE_FILE_NAME
+
+        return ['java', '-Dfile.encoding=UTF-8', '-cp', class_path, source_file_path]
+
+    def _extract_library(self, jar_file, library_name, library_file_path):
+        """
+        Extracts a library to a temporary file of this process and renames it, so a pool started by another process at
+        the same time never sees a half written library
+        :param jar_file: zipfile.ZipFile
+        :param library_name: string, name in the jar
+        :param library_file_path: string
+        :return: void
+        """
+        library_directory = os.path.dirname(library_file_path)
+        try:
+            os.makedirs(library_directory)
+        except OSError:
+            # Created by another process
+            if not os.path.isdir(library_directory):
+                raise
+
+        temporary_file_path = library_file_path + '.' + str(os.getpid()) + '.tmp'
+        try:
+            with open(temporary_file_path, 'wb') as temporary_file:
+                temporary_file.write(jar_file.read(library_name))
+                temporary_file.flush()
+                os.fsync(temporary_file.fileno())
+
+            os.rename(temporary_file_path, library_file_path)
+        finally:
+            if os.path.isfile(temporary_file_path):
+                os.remove(temporary_file_path)
+
+
+class ZemberekWorkerPoolGroup:
+    """
+    Keeps one pool per mode for the current process. Pools are not shared with forked child processes.
+    """
+
+    __pools = {}
+    __lock = threading.Lock()
+
+    @classmethod
+    def get_pool(cls, mode):
+        """
+        Returns the pool of given mode, creates it if necessary
+        :param mode: string, stem or suggest
+        :return: ZemberekWorkerPool
+        """
+        with cls.__lock:
+            pool = cls.__pools.get(mode)
+
+            # A forked process must not talk to its parent's workers
+            if pool is None or pool.owner_pid != os.getpid():
+                pool = ZemberekWorkerPool(mode)
+                cls.__pools[mode] = pool
+
+            return pool
+
+    @classmethod
+    def close_all(cls):
+        """
+        Stops all pools' workers of the current process
+        :return: void
+        """
+        with cls.__lock:
+            for mode, pool in cls.__pools.items():
+                if pool.owner_pid == os.getpid():
+                    pool.close()
+            cls.__pools = {}
@@ -0,0 +1,74 @@
+import java.io.BufferedReader;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+
+import net.zemberek.erisim.Zemberek;
+import net.zemberek.tr.yapi.TurkiyeTurkcesi;
+
+/**
+ * Long-lived Zemberek worker. Reads one word per line from stdin and writes exactly one line of output per word,
+ * so a single JVM can serve every request of a preprocessing run.
+ *
+ * Modes:
+ *   stem    - same output as ZemberekWordStemFinder.jar (KelimeKokuBulucu)
+ *   suggest - same output as ZemberekSuggestionFinder.jar (KelimeOnerici)
+ *
+ * A line containing only __PING__ is answered with __PONG__ and is used for health checks.
+ *
+ * Runs without a build step on JDK 11+ (source-file mode):
+ *   java -cp zemberek-cekirdek-2.1.1.jar:zemberek-tr-2.1.1.jar ZemberekWorker.java stem
+ */
+public class ZemberekWorker {
+
+    private static final String PING = "__PING__";
+    private static final String PONG = "__PONG__";
+
+    private static final Zemberek z = new Zemberek(new TurkiyeTurkcesi());
+
+    public static void main(String[] args) throws IOException {
+        String mode = args.length > 0 ? args[0] : "stem";
+
+        BufferedReader reader = new BufferedReader(new InputStreamReader(System.in, "UTF-8"));
+        PrintStream writer = new PrintStream(new FileOutputStream(FileDescriptor.out), false, "UTF-8");
+
+        String word;
+        while ((word = reader.readLine()) != null) {
+            if (PING.equals(word)) {
+                writer.println(PONG);
+            } else if ("suggest".equals(mode)) {
+                writer.println(suggest(word));
+            } else {
+                writer.println(stem(word));
+            }
+            writer.flush();
+        }
+    }
+
+    private static String stem(String word) {
+        try {
+            return z.kelimeCozumle(word)[0].kok().icerik();
+        } catch (ArrayIndexOutOfBoundsException exception) {
+            return word;
+        }
+    }
+
+    private static String suggest(String word) {
+        try {
+            String[] suggestions = z.oner(word);
+            if (suggestions.length == 0) {
+                return word;
+            }
+
+            StringBuilder output = new StringBuilder();
+            for (String suggestion : suggestions) {
+                output.append(suggestion).append(",");
+            }
+            return output.toString();
+        } catch (ArrayIndexOutOfBoundsException exception) {
+            return word;
+        }
+    }
+}